@@ -0,0 +1,188 @@
+"""
+Bitmap Index
+
+Variant of HashtableIndex for low-cardinality columns (grades, flags), where each key holds a large share of the records.
+Instead of a posting list of RIDs per key, each key has a bitmap over base record positions.
+A base RID is a page number followed by an offset within the page, so a bitmap keeps one int per base page,
+with bit n set if the record at offset n has the key. Pages without any record with the key take no space.
+Bitmaps of several keys or columns can be combined with & and |, and counted without reading any page.
+Created with New_Index.create_index(column_num, bitmap=True).
+"""
+
+from typing import List, Iterator
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from pathlib import Path
+from lstore.config import INDEX_VERSION_RETENTION, OFFSET_BITS
+from lstore.config import debug_print as print
+from lstore.hashtable_index import HashtableIndex, RID
+
+class Bitmap:
+    """
+    A set of base RIDs, stored as base page number -> int with one bit per offset in the page.
+    Iterating gives the RIDs in increasing order.
+    """
+    def __init__(self, chunks:dict[int, int]|None=None):
+        # pages with no bit set are never stored
+        self.chunks:dict[int, int] = chunks if chunks is not None else {}
+
+    def add(self, rid:RID) -> None:
+        page = rid >> OFFSET_BITS
+        self.chunks[page] = self.chunks.get(page, 0) | (1 << (rid & ((1 << OFFSET_BITS) - 1)))
+
+    def remove(self, rid:RID) -> None:
+        """Remove the RID, raises KeyError if it is not in the bitmap"""
+        page = rid >> OFFSET_BITS
+        bit = 1 << (rid & ((1 << OFFSET_BITS) - 1))
+        bits = self.chunks.get(page, 0)
+        if not bits & bit:
+            raise KeyError(f"RID {rid} is not in the bitmap")
+        if bits == bit:
+            del self.chunks[page]
+        else:
+            self.chunks[page] = bits ^ bit
+
+    def __contains__(self, rid:RID) -> bool:
+        return bool(self.chunks.get(rid >> OFFSET_BITS, 0) & (1 << (rid & ((1 << OFFSET_BITS) - 1))))
+
+    def __len__(self) -> int:
+        return sum(bits.bit_count() for bits in self.chunks.values())
+
+    def __iter__(self) -> Iterator[RID]:
+        for page in sorted(self.chunks):
+            bits = self.chunks[page]
+            while bits:
+                # lowest set bit first
+                low = bits & -bits
+                yield RID((page << OFFSET_BITS) | (low.bit_length() - 1))
+                bits ^= low
+
+    def __and__(self, other:"Bitmap") -> "Bitmap":
+        small, large = (self, other) if len(self.chunks) <= len(other.chunks) else (other, self)
+        chunks = {}
+        for page, bits in small.chunks.items():
+            both = bits & large.chunks.get(page, 0)
+            if both:
+                chunks[page] = both
+        return Bitmap(chunks)
+
+    def __or__(self, other:"Bitmap") -> "Bitmap":
+        chunks = dict(self.chunks)
+        for page, bits in other.chunks.items():
+            chunks[page] = chunks.get(page, 0) | bits
+        return Bitmap(chunks)
+
+    def rids(self) -> List[RID]:
+        return list(self)
+
+
+class BitmapIndex(HashtableIndex):
+
+    def __init__(self, retention:int=INDEX_VERSION_RETENTION):
+        super().__init__(retention)
+        # key -> bitmap of the RIDs with the key, replaces the posting lists in self.hashtable
+        self.bitmaps:dict[int, Bitmap] = {}
+
+    # public methods
+
+    def insert(self, key: int, rid: RID, abs_ver=0, prev_ver_key=None) -> None:
+        if key not in self.bitmaps:
+            self.bitmaps[key] = Bitmap()
+            insort(self.sorted_keys, key)
+        self.bitmaps[key].add(rid)
+        self.rid_val_map[rid] = key
+
+    def insert_many(self, keys: List[int], rids: List[RID]) -> None:
+        for key, rid in zip(keys, rids):
+            self.insert(key, rid)
+
+    def update(self, new_val:int, rid:RID) -> None:
+        if rid not in self.rid_val_map:
+            raise KeyError(f"RID {rid} is not in the hashtable")
+        if new_val == self.rid_val_map[rid]:
+            return
+        self.__remove(self.rid_val_map[rid], rid)
+        self.insert(new_val, rid)
+
+    def delete(self, key: int, rid: RID):
+        """Remove RID with key, return True if RID exists, False otherwise"""
+        if self.rid_val_map.get(rid) != key:
+            return False
+        self.__remove(key, rid)
+        del self.rid_val_map[rid]
+        self.drop_history(rid)
+        return True
+
+    def point_query(self, key: int) -> List[RID]:
+        #Return list of RIDs associated with key, in increasing order
+        if key in self.bitmaps:
+            return self.bitmaps[key].rids()
+        return []
+
+    def contains(self, key: int) -> bool:
+        return key in self.bitmaps
+
+    def range_query(self, key_start: int, key_end: int) -> List[RID]:
+        #Return list of RIDs within range of key values, in increasing order
+        return self.range_bitmap(key_start, key_end).rids()
+
+    def key_count(self, key: int) -> int:
+        #Return the number of RIDs with the key, used by count_range, rank and select_kth
+        return len(self.bitmaps[key]) if key in self.bitmaps else 0
+
+    def bitmap(self, key: int) -> Bitmap:
+        """
+        Return the bitmap of the RIDs with the key
+        NOTE: this is the index's own bitmap, callers must not modify it
+        """
+        return self.bitmaps.get(key, Bitmap())
+
+    def range_bitmap(self, key_start: int, key_end: int) -> Bitmap:
+        """Return the bitmap of the RIDs with a key in the inclusive range"""
+        result = Bitmap()
+        for i in range(bisect_left(self.sorted_keys, key_start), bisect_right(self.sorted_keys, key_end)):
+            result = result | self.bitmaps[self.sorted_keys[i]]
+        return result
+
+    def save_index(self, path:str, col_num:int) -> None:
+        """Path goes up to table_name"""
+        index_path = Path(path, "index", f"col{col_num}")
+        if not index_path.exists():
+            index_path.mkdir(parents=True)
+        # the bitmaps are rebuilt from the RID -> value pairs on load
+        Path(index_path, "bitmap_rids.bin").write_bytes(array('Q', self.rid_val_map.keys()).tobytes())
+        Path(index_path, "bitmap_vals.bin").write_bytes(array('Q', self.rid_val_map.values()).tobytes())
+        self.save_history(index_path)
+
+    def load_index(self, path:str, col_num:int) -> None:
+        """Path goes up to table_name"""
+        index_path = Path(path, "index", f"col{col_num}")
+        rids_path = Path(index_path, "bitmap_rids.bin")
+        vals_path = Path(index_path, "bitmap_vals.bin")
+        if not rids_path.exists() or not vals_path.exists():
+            raise FileNotFoundError(f"Error: Bitmap index for column {col_num} not on disk")
+        rids = array('Q')
+        rids.frombytes(rids_path.read_bytes())
+        vals = array('Q')
+        vals.frombytes(vals_path.read_bytes())
+        self.bitmaps = {}
+        self.rid_val_map = {}
+        self.sorted_keys = []
+        self.insert_many(vals.tolist(), rids.tolist())
+        self.load_history(index_path)
+
+    @staticmethod
+    def is_saved(path:str, col_num:int) -> bool:
+        """Return True if the index saved for the column is a bitmap index"""
+        return Path(path, "index", f"col{col_num}", "bitmap_rids.bin").exists()
+
+    # private methods
+
+    def __remove(self, key: int, rid: RID) -> None:
+        #Remove the RID from the key's bitmap, dropping the key once no RID has it
+        bitmap = self.bitmaps[key]
+        bitmap.remove(rid)
+        if not bitmap.chunks:
+            del self.bitmaps[key]
+            i = bisect_left(self.sorted_keys, key)
+            del self.sorted_keys[i]
@@ -4,7 +4,7 @@ B Plus Tree
 """
 
 from sys import base_prefix
-from typing import NewType, List, Union, Tuple
+from typing import NewType, List, Union, Tuple, Iterator
 from lstore.config import debug_print as print
 
 # NOTE: Assuming RIDs are integers for typing purposes
@@ -16,6 +16,8 @@ class TreeEntry:
         self.prev_ver_key = prev_ver_key
         self.next_ver_key = next_ver_key
         self.abs_ver = abs_ver
+        # column -> value of the record, kept next to the RID by covering indices
+        self.included: dict[int, int] | None = None
 
     def __str__(self):
         rid_str = str(self.rid)
@@ -36,6 +38,8 @@ class Node:
         self.keys: List[int] = []
         self.parent: Union[InternalNode, None] = None
         self.is_root: bool = is_root
+        # number of latest entries (entries with no next version) in the subtree, used for order statistics
+        self.count: int = 0
 
     def _pretty_print_keys(self) -> str:
         """
@@ -116,7 +120,8 @@ class LeafNode(Node):
             return -1 # bad key lookup
 
         for entry in self.tree_entry_lists[self.keys.index(key)]:
-            if entry.rid == rid:
+            # the latest entry, the RID may have had the key in an older version too
+            if entry.rid == rid and entry.next_ver_key is None:
                 entry.next_ver_key = next_ver_key
                 return entry.abs_ver
         # print(f"key::{key}, RID::{rid}, next_ver_key::{next_ver_key}")
@@ -148,6 +153,12 @@ class LeafNode(Node):
         raise ValueError("There was no latest entry to delete. Possibly mistaken call to delete() in BPlusTree.")
 
 
+    def latest_count(self, key) -> int:
+        """
+        Get the number of entries under the key with no next pointer, i.e. the number of records with the key now.
+        """
+        return sum(1 for tree_entry in self.tree_entry_lists[self.keys.index(key)] if tree_entry.next_ver_key is None)
+
     def get_raw_latest_rids(self, key) -> List[RID]:
         """
         Get the raw RIDs with no next pointer associated with versions,
@@ -189,11 +200,13 @@ class BPlusTree:
             # empty tree, create and insert into the root
             self.root = LeafNode(is_root=True)
             self.root.insert_entry(key, rid)
+            self.root.count = 1
             return
 
         # find leaf and insert
         leaf = self._find_leaf(self.root, key)
         leaf.insert_entry(key, rid, abs_ver, prev_ver_key)
+        self._add_count(leaf, 1)
 
         if len(leaf.keys) > self.max_degree - 1:
             self._split_leaf(leaf)
@@ -207,6 +220,8 @@ class BPlusTree:
 
         # update previous record with new pointer to current value
         prev_abs_ver = leaf.update_entry_next_ver_key(prev_ver_key, rid, new_ver_key)
+        # the previous entry is no longer the latest
+        self._add_count(leaf, -1)
 
         # insert new record
         self.insert(new_ver_key, rid, prev_abs_ver + 1, prev_ver_key)
@@ -228,12 +243,14 @@ class BPlusTree:
 
         # now perform the deletion of the entry and its preceding entries (versions) from the index
         prev_ver_key, abs_ver = deletion_leaf.remove_latest_entry(key, rid)
+        self._add_count(deletion_leaf, -1)
         # NOTE this method should confirm that there is exactly one entry with this particular RID whose next_ver_key is None
         # it should then delete that entry from the tree_entries_list and return prev_ver_key and abs_ver of that entry
 
         while (prev_ver_key is not None):
             abs_ver -= 1
-            assert abs_ver < 0
+            # versions count up from 0, the base version
+            assert abs_ver >= 0
             deletion_leaf = self._find_leaf(self.root, prev_ver_key)
             prev_ver_key = deletion_leaf.remove_entry(prev_ver_key, rid, abs_ver)
 
@@ -270,6 +287,73 @@ class BPlusTree:
             leaf = leaf.next
         return rids
 
+    def find_entry(self, key: int, rid: RID) -> TreeEntry | None:
+        """
+        Return the latest entry of the RID under the key, or None if there is none.
+        """
+        if self.root is None:
+            return None
+        leaf = self._find_leaf(self.root, key)
+        if key not in leaf.keys:
+            return None
+        for entry in leaf.tree_entry_lists[leaf.keys.index(key)]:
+            if entry.rid == rid and entry.next_ver_key is None:
+                return entry
+        return None
+
+    def range_entries(self, key_start: int, key_end: int) -> Iterator[TreeEntry]:
+        """
+        Yield the latest entries of keys in the range [key_start, key_end], in key order.
+        """
+        if self.root is None:
+            return
+        leaf = self._find_leaf(self.root, key_start)
+        while leaf is not None:
+            for curr_key, entries in zip(leaf.keys, leaf.tree_entry_lists):
+                if key_start <= curr_key <= key_end:
+                    for entry in entries:
+                        if entry.next_ver_key is None:
+                            yield entry
+            if leaf.keys[-1] >= key_end:
+                break
+            leaf = leaf.next
+
+    def count_range(self, key_start: int, key_end: int) -> int:
+        """
+        Return the number of records with a key in the range [key_start, key_end], in O(log n) using the subtree counts.
+        """
+        if key_end < key_start:
+            return 0
+        return self._count_before(key_end, inclusive=True) - self._count_before(key_start, inclusive=False)
+
+    def rank(self, key: int) -> int:
+        """
+        Return the number of records with a key smaller than the given key, i.e. the position of the key in sorted order.
+        """
+        return self._count_before(key, inclusive=False)
+
+    def select_kth(self, k: int) -> int:
+        """
+        Return the k-th smallest key over all records, counting from 0, in O(log n) using the subtree counts.
+        A key held by several records is counted once per record. Raises IndexError if there are k or fewer records.
+        """
+        if self.root is None or k < 0 or k >= self.root.count:
+            raise IndexError(f"There is no record number {k} in the tree")
+        node = self.root
+        while isinstance(node, InternalNode):
+            for child in node.children:
+                if k < child.count:
+                    node = child
+                    break
+                k -= child.count
+        assert isinstance(node, LeafNode)
+        for key in node.keys:
+            count = node.latest_count(key)
+            if k < count:
+                return key
+            k -= count
+        raise IndexError(f"There is no record number {k} in the tree")
+
     def __get_relative_entry_version(self, base_entry: TreeEntry) -> int:
         assert isinstance(self.root, Node)
 
@@ -297,9 +381,9 @@ class BPlusTree:
                 # print(curr_entry)
                 raise ValueError("Invalid next version key") # rid not associated with value, next pointer is bad
 
-            if curr_entry and curr_entry.next_ver_key is not None:
-                next_key = curr_entry.next_ver_key # iterate to determine next hops
-                rel_ver -= 1
+            # every hop is one version newer, the latest entry has no next version key
+            next_key = curr_entry.next_ver_key
+            rel_ver -= 1
 
         return rel_ver
 
@@ -326,6 +410,36 @@ class BPlusTree:
 
     # private methods
 
+    def _add_count(self, leaf: LeafNode, delta: int) -> None:
+        """
+        Add delta to the latest entry counts of the leaf and all its ancestors.
+        """
+        node: Union[Node, None] = leaf
+        while node is not None:
+            node.count += delta
+            node = node.parent
+
+    def _count_before(self, key: int, inclusive: bool) -> int:
+        """
+        Return the number of records with a key smaller than (or with inclusive, at most) the given key.
+        Descends to the key's leaf, adding the counts of the subtrees left of the path.
+        """
+        if self.root is None:
+            return 0
+        total = 0
+        node = self.root
+        while isinstance(node, InternalNode):
+            i = 0
+            while i < len(node.keys) and not key < node.keys[i]:
+                total += node.children[i].count
+                i += 1
+            node = node.children[i]
+        assert isinstance(node, LeafNode)
+        for curr_key in node.keys:
+            if curr_key < key or (inclusive and curr_key == key):
+                total += node.latest_count(curr_key)
+        return total
+
     def _find_leaf(self, start_node: Node, key: int) -> LeafNode:
         """
         Traverse the tree to find a leaf node.
@@ -357,6 +471,10 @@ class BPlusTree:
         old_leaf.keys = old_leaf.keys[:midpoint]
         old_leaf.tree_entry_lists = old_leaf.tree_entry_lists[:midpoint]
 
+        # split the latest entry count, the total stays the same for the ancestors
+        new_leaf.count = sum(new_leaf.latest_count(key) for key in new_leaf.keys)
+        old_leaf.count -= new_leaf.count
+
         # Update the linked list pointers
         new_leaf.next = old_leaf.next
         if new_leaf.next:
@@ -369,6 +487,7 @@ class BPlusTree:
             new_root = InternalNode(is_root=True)
             new_root.keys = [new_leaf.keys[0]]
             new_root.children = [old_leaf, new_leaf]
+            new_root.count = old_leaf.count + new_leaf.count
             old_leaf.is_root = False
             old_leaf.parent = new_root
             new_leaf.parent = new_root
@@ -389,6 +508,7 @@ class BPlusTree:
             new_root = InternalNode(is_root=True)
             new_root.keys = [key]
             new_root.children = [old_node, new_node]
+            new_root.count = old_node.count + new_node.count
             old_node.parent = new_root
             new_node.parent = new_root
             self.root = new_root
@@ -428,10 +548,15 @@ class BPlusTree:
         for child in new_node.children:
             child.parent = new_node
 
+        # split the latest entry count, the total stays the same for the ancestors
+        new_node.count = sum(child.count for child in new_node.children)
+        old_node.count -= new_node.count
+
         if old_node.is_root:
             new_root = InternalNode(is_root=True)
             new_root.keys = [middle_key]
             new_root.children = [old_node, new_node]
+            new_root.count = old_node.count + new_node.count
             old_node.is_root = False
             old_node.parent = new_root
             new_node.parent = new_root
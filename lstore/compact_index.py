@@ -0,0 +1,242 @@
+"""
+Compact Hashtable Index
+
+Array-backed variant of HashtableIndex for tables whose index does not fit in memory as Python dicts and lists.
+Most entries live in flat arrays of unsigned 64 bit ints, sorted once and then only read:
+    - keys and rids, the (key, RID) pairs sorted by key then RID, used for point and range queries
+    - rid_order and rid_vals, the same pairs sorted by RID, used to find the current value of a RID
+Recent inserts and updates go to a small HashtableIndex (the delta), and RIDs whose array entry is out of date are listed in removed.
+The delta is merged into the arrays once it grows past a fraction of the arrays' size.
+Enabled with INDEX_USE_COMPACT_HASH in config.
+"""
+
+from typing import List, Tuple, Iterator
+from array import array
+from bisect import bisect_left, bisect_right
+from heapq import merge as merge_sorted
+from pathlib import Path
+from lstore.config import INDEX_VERSION_RETENTION, INDEX_COMPACT_MIN_DELTA, INDEX_COMPACT_DELTA_RATIO
+from lstore.config import debug_print as print
+from lstore.hashtable_index import HashtableIndex, RID
+
+class CompactValueMap:
+    """
+    Read-only RID -> current value mapping over a CompactHashtableIndex.
+    Stands in for HashtableIndex.rid_val_map, so code reading rid_val_map works with either index.
+    """
+    def __init__(self, index:"CompactHashtableIndex"):
+        self.index = index
+
+    def __contains__(self, rid:RID) -> bool:
+        return self.index.get_value(rid) is not None
+
+    def __getitem__(self, rid:RID) -> int:
+        value = self.index.get_value(rid)
+        if value is None:
+            raise KeyError(f"RID {rid} is not in the index")
+        return value
+
+    def __len__(self) -> int:
+        return len(self.index.rid_order) - len(self.index.removed) + len(self.index.delta.rid_val_map)
+
+    def __iter__(self) -> Iterator[RID]:
+        for rid in self.index.rid_order:
+            if rid not in self.index.removed:
+                yield RID(rid)
+        yield from self.index.delta.rid_val_map
+
+
+class CompactHashtableIndex(HashtableIndex):
+
+    def __init__(self, retention:int=INDEX_VERSION_RETENTION):
+        # merged entries, sorted by (key, RID)
+        self.keys:array = array('Q')
+        self.rids:array = array('Q')
+        # merged entries, sorted by RID
+        self.rid_order:array = array('Q')
+        self.rid_vals:array = array('Q')
+        # RIDs whose entry in the arrays is no longer current (updated or deleted)
+        self.removed:set[RID] = set()
+        # entries inserted or updated since the last merge, no history is kept in the delta itself
+        self.delta:HashtableIndex = HashtableIndex(retention=0)
+        self.rid_val_map = CompactValueMap(self)
+        # version history is kept the same way as in HashtableIndex
+        self.retention:int = retention
+        self.version_history:dict[RID, List[int]] = {}
+        self.history_table:dict[int, dict[RID, int]] = {}
+
+    # public methods
+
+    def get_value(self, rid: RID) -> int|None:
+        """
+        Return the current value of the RID, or None if it is not in the index
+        """
+        if rid in self.delta.rid_val_map:
+            return self.delta.rid_val_map[rid]
+        if rid in self.removed:
+            return None
+        i = bisect_left(self.rid_order, rid)
+        if i < len(self.rid_order) and self.rid_order[i] == rid:
+            return self.rid_vals[i]
+        return None
+
+    def insert(self, key: int, rid: RID, abs_ver=0, prev_ver_key=None) -> None:
+        self.delta.insert(key, rid)
+        self.__check_merge()
+
+    def insert_many(self, keys: List[int], rids: List[RID]) -> None:
+        self.delta.insert_many(keys, rids)
+        self.__check_merge()
+
+    def update(self, new_val:int, rid:RID) -> None:
+        curr_val = self.get_value(rid)
+        if curr_val is None:
+            raise KeyError(f"RID {rid} is not in the hashtable")
+        if new_val == curr_val:
+            return
+        if rid in self.delta.rid_val_map:
+            self.delta.update(new_val, rid)
+        else:
+            # the array entry is now out of date, the current value lives in the delta
+            self.removed.add(rid)
+            self.delta.insert(new_val, rid)
+        self.__check_merge()
+
+    def delete(self, key: int, rid: RID):
+        """Remove RID with key, return True if RID exists, False otherwise"""
+        if self.get_value(rid) != key:
+            return False
+        if rid in self.delta.rid_val_map:
+            # any array entry of this RID is already in removed
+            self.delta.delete(key, rid)
+        else:
+            self.removed.add(rid)
+        self.drop_history(rid)
+        self.__check_merge()
+        return True
+
+    def point_query(self, key: int) -> List[RID]:
+        #Return list of RIDs associated with key, merged entries first
+        start = bisect_left(self.keys, key)
+        end = bisect_right(self.keys, key, lo=start)
+        return self.__live_rids(start, end) + self.delta.point_query(key)
+
+    def contains(self, key: int) -> bool:
+        #Return True if any RID has the key, without building a result list
+        if self.delta.contains(key):
+            return True
+        start = bisect_left(self.keys, key)
+        end = bisect_right(self.keys, key, lo=start)
+        return any(self.rids[i] not in self.removed for i in range(start, end))
+
+    def range_query(self, key_start: int, key_end: int) -> List[RID]:
+        #Return list of RIDs within range of key values
+        start = bisect_left(self.keys, key_start)
+        end = bisect_right(self.keys, key_end, lo=start)
+        return self.__live_rids(start, end) + self.delta.range_query(key_start, key_end)
+
+    def count_range(self, key_start: int, key_end: int) -> int:
+        """Return the number of RIDs with a key in [key_start, key_end], by binary search on the merged entries"""
+        start = bisect_left(self.keys, key_start)
+        end = bisect_right(self.keys, key_end, lo=start)
+        return end - start - self.__removed_in(key_start, key_end) + self.delta.count_range(key_start, key_end)
+
+    def rank(self, key: int) -> int:
+        """Return the number of RIDs with a key smaller than the given key"""
+        return bisect_left(self.keys, key) - self.__removed_in(None, key, inclusive=False) + self.delta.rank(key)
+
+    def select_kth(self, k: int) -> int:
+        """
+        Return the k-th smallest key over all RIDs, counting from 0, a key held by several RIDs is counted once per RID.
+        The delta is merged first, so this is a lookup in the merged keys.
+        Raises IndexError if there are k or fewer RIDs.
+        """
+        if self.removed or self.delta.rid_val_map:
+            self.merge()
+        if k < 0 or k >= len(self.keys):
+            raise IndexError(f"There is no RID number {k} in the index")
+        return self.keys[k]
+
+    def bulk_load(self, entries: List[Tuple[RID, List[int]]]) -> None:
+        super().bulk_load(entries)
+        self.merge()
+
+    def merge(self) -> None:
+        """
+        Rebuild the arrays from their live entries and the delta, leaving the delta empty.
+        """
+        # both inputs are sorted by RID, so they can be merged without sorting
+        live = ((rid, val) for rid, val in zip(self.rid_order, self.rid_vals) if rid not in self.removed)
+        fresh = sorted(self.delta.rid_val_map.items())
+        rid_order = array('Q')
+        rid_vals = array('Q')
+        for rid, val in merge_sorted(live, fresh):
+            rid_order.append(rid)
+            rid_vals.append(val)
+        # stable sort by value keeps RIDs ascending within a key
+        key_order = sorted(range(len(rid_vals)), key=rid_vals.__getitem__)
+        self.keys = array('Q', (rid_vals[i] for i in key_order))
+        self.rids = array('Q', (rid_order[i] for i in key_order))
+        self.rid_order = rid_order
+        self.rid_vals = rid_vals
+        self.removed = set()
+        self.delta = HashtableIndex(retention=0)
+
+    def save_index(self, path:str, col_num:int) -> None:
+        """Path goes up to table_name"""
+        index_path = Path(path, "index", f"col{col_num}")
+        if not index_path.exists():
+            index_path.mkdir(parents=True)
+        # merge so only the arrays need to be written
+        self.merge()
+        Path(index_path, "compact_rid_order.bin").write_bytes(self.rid_order.tobytes())
+        Path(index_path, "compact_rid_vals.bin").write_bytes(self.rid_vals.tobytes())
+        self.save_history(index_path)
+
+    def load_index(self, path:str, col_num:int) -> None:
+        """Path goes up to table_name"""
+        index_path = Path(path, "index", f"col{col_num}")
+        rid_order_path = Path(index_path, "compact_rid_order.bin")
+        rid_vals_path = Path(index_path, "compact_rid_vals.bin")
+        if not rid_order_path.exists() or not rid_vals_path.exists():
+            raise FileNotFoundError(f"Error: Compact index for column {col_num} not on disk")
+        self.rid_order = array('Q')
+        self.rid_order.frombytes(rid_order_path.read_bytes())
+        self.rid_vals = array('Q')
+        self.rid_vals.frombytes(rid_vals_path.read_bytes())
+        # the key sorted arrays are not saved, rebuild them with an empty merge
+        self.removed = set()
+        self.delta = HashtableIndex(retention=0)
+        self.merge()
+        self.load_history(index_path)
+
+    @staticmethod
+    def is_saved(path:str, col_num:int) -> bool:
+        """Return True if the index saved for the column is a compact index"""
+        return Path(path, "index", f"col{col_num}", "compact_rid_order.bin").exists()
+
+    # private methods
+
+    def __live_rids(self, start: int, end: int) -> List[RID]:
+        #RIDs of the merged entries in [start, end) that are still current
+        if not self.removed:
+            return self.rids[start:end].tolist()
+        return [rid for rid in self.rids[start:end] if rid not in self.removed]
+
+    def __removed_in(self, key_start: int | None, key_end: int, inclusive: bool = True) -> int:
+        #Number of out of date array entries with a key in the range, key_start None meaning no lower bound
+        count = 0
+        for rid in self.removed:
+            i = bisect_left(self.rid_order, rid)
+            if i == len(self.rid_order) or self.rid_order[i] != rid:
+                continue
+            value = self.rid_vals[i]
+            if (key_start is None or key_start <= value) and (value <= key_end if inclusive else value < key_end):
+                count += 1
+        return count
+
+    def __check_merge(self) -> None:
+        #Merge once the delta is large compared to the arrays
+        delta_size = len(self.delta.rid_val_map) + len(self.removed)
+        if delta_size > max(INDEX_COMPACT_MIN_DELTA, INDEX_COMPACT_DELTA_RATIO * len(self.rid_order)):
+            self.merge()
@@ -0,0 +1,74 @@
+"""
+Composite Index
+
+Index over an ordered tuple of columns, the key of a record is the tuple of its values in those columns.
+Keys are kept in a B+ tree, tuples compare column by column, so records sharing a prefix of the key are next to each other
+and a range on the column following a prefix is a single range of the tree.
+Created with New_Index.create_composite_index, and kept up to date by New_Index on insert, update and delete.
+"""
+
+from typing import List, Tuple
+import lstore.config as config
+from lstore.config import debug_print as print
+from lstore.bplus_tree import BPlusTree, RID
+
+# compares greater than any value, pads the end of a key range past every key sharing the prefix
+KEY_MAX = float("inf")
+
+class CompositeIndex:
+
+    def __init__(self, columns: Tuple[int, ...], degree: int = config.INDEX_BPLUS_TREE_MAX_DEGREE):
+        self.columns: Tuple[int, ...] = tuple(columns)
+        self.tree: BPlusTree = BPlusTree(max_degree=degree)
+        # current key of each RID, so updates and deletes do not need to read the record
+        self.rid_key_map: dict[RID, Tuple[int, ...]] = {}
+
+    # public methods
+
+    def key_of(self, values: List[int]) -> Tuple[int, ...]:
+        """Return the key of a record, values holds every data column of the record"""
+        return tuple(values[column] for column in self.columns)
+
+    def insert(self, rid: RID, values: List[int]) -> None:
+        """Add a record, values holds every data column of the record"""
+        key = self.key_of(values)
+        self.tree.insert(key, rid)
+        self.rid_key_map[rid] = key
+
+    def update(self, rid: RID, values: List[int | None]) -> None:
+        """Move a record to its new key, values holds every data column of the record, None for columns not updated"""
+        if all(values[column] is None for column in self.columns):
+            return
+        old_key = self.rid_key_map[rid]
+        new_key = tuple(old if values[column] is None else values[column] for column, old in zip(self.columns, old_key))
+        if new_key == old_key:
+            return
+        # no past keys are kept, only the latest value of a record is searched
+        self.tree.delete(old_key, rid)
+        self.tree.insert(new_key, rid)
+        self.rid_key_map[rid] = new_key
+
+    def delete(self, rid: RID) -> bool:
+        """Remove a record, return True if it was in the index, False otherwise"""
+        key = self.rid_key_map.pop(rid, None)
+        if key is None:
+            return False
+        return self.tree.delete(key, rid)
+
+    def prefix_query(self, prefix: Tuple[int, ...]) -> List[RID]:
+        """
+        Return the RIDs of records whose key starts with prefix, the first len(prefix) columns of the index.
+        With a prefix as long as the key this is a point query.
+        """
+        if len(prefix) > len(self.columns):
+            raise ValueError(f"Prefix {prefix} is longer than the key columns {self.columns}")
+        return self.tree.range_query(tuple(prefix), tuple(prefix) + (KEY_MAX,) * (len(self.columns) - len(prefix)))
+
+    def range_query(self, prefix: Tuple[int, ...], start_val: int, end_val: int) -> List[RID]:
+        """
+        Return the RIDs of records whose key starts with prefix, and whose value in the next column is in [start_val, end_val].
+        """
+        if len(prefix) >= len(self.columns):
+            raise ValueError(f"Prefix {prefix} leaves no key column for the range, key columns are {self.columns}")
+        padding = (KEY_MAX,) * (len(self.columns) - len(prefix) - 1)
+        return self.tree.range_query(tuple(prefix) + (start_val,), tuple(prefix) + (end_val,) + padding)
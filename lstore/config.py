@@ -1,5 +1,6 @@
 from math import log
 from pathlib import Path
+from struct import pack
 """
 Centralized storage for all configuration options and constants.
 Imported by other modules when they need access to a configuration option or a constant.
@@ -59,9 +60,37 @@ CUMULATIVE_TAIL_RECORDS = True
 OVERRIDE_WITH_DUMB_INDEX: bool = False
 INDEX_USE_BPLUS_TREE: bool = False  # if False, use dictionary-based index (bad for range queries)
 INDEX_USE_HASH:bool = True
-INDEX_AUTOCREATE_ALL_COLS: bool = True  # if False, columns must be explicitly indexed before use
+INDEX_USE_COMPACT_HASH: bool = False  # if True, the hash index keeps most entries in flat int arrays instead of dicts and lists
+INDEX_AUTOCREATE_ALL_COLS: bool = False  # if False, only the primary key is indexed up front, other columns are indexed explicitly or by the advisor
+INDEX_USE_ADVISOR: bool = True  # if True, columns are indexed or unindexed automatically based on how often they are searched and written
+INDEX_ADVISOR_INTERVAL: int = 1000  # number of reads + writes between runs of the index advisor
+INDEX_ADVISOR_MIN_READS: int = 3  # searches on a column needed before the advisor indexes it
+INDEX_ADVISOR_CREATE_RATIO: float = 0.01  # advisor indexes a column searched at least this many times per write (unindexed searches scan the table)...
+INDEX_ADVISOR_DROP_RATIO: float = 0.001  # ...and drops the index of a column searched less than this many times per write
 INDEX_USE_DUMB_INDEX: bool = True  # if True, use dumb index to find records on unindexed col; False, throw error
 INDEX_BPLUS_TREE_MAX_DEGREE: int = 4  # max degree of B+ tree nodes
+INDEX_VERSION_RETENTION: int = 8  # past values kept per record by the hash index, older versions are located with a table scan
+INDEX_COMPACT_MIN_DELTA: int = 1024  # compact hash index merges its delta once it has more entries than this...
+INDEX_COMPACT_DELTA_RATIO: float = 0.1  # ...and more than this fraction of the merged entries
+INDEX_SUM_MIN_PENDING: int = 256  # sum index rebuilds its Fenwick trees once it has more out of order or deleted keys than this (or the square root of its keys)
+
+# Record cache options
+RECORD_CACHE_BUDGET: int = 1 << 20  # bytes of values kept in each table's hot record cache (latest versions by base RID), 0 disables it
+
+# Version array options
+VERSION_ARRAY_MIN_DEPTH: int = 8  # reading a version at least this far back builds the record's array of tail RIDs, shallower reads walk the chain
+VERSION_ARRAY_MAX_RECORDS: int = 1 << 16  # records keeping a version array in each table, least recently read dropped first, 0 disables them
+
+# Statistics options
+STATS_SAMPLE_SIZE: int = 1024  # records kept in each table's reservoir sample, histograms are cut from it
+STATS_HISTOGRAM_BUCKETS: int = 16  # buckets of each column's equi-depth histogram
+STATS_HLL_PRECISION: int = 12  # HyperLogLog sketches have 2**precision registers, about 1.6% error on distinct counts
+
+# Planner options
+QUERY_USE_PLANNER: bool = True  # if True, select and sum pick an index lookup, index range or scan by estimated cost; False, always use the index
+PLANNER_RECORD_COST: float = 1.0  # estimated cost of reading one record located by an index, one record at a time (select)...
+PLANNER_BATCH_RECORD_COST: float = 0.25  # ...or grouped by page (sum)...
+PLANNER_SCAN_COST: float = 0.3  # ...and of checking one record during a scan
 
 
 # define RID attribute bit sizes
@@ -78,6 +107,8 @@ PAGE_NUMBER_BITS = FORMAT_BITS - TAIL_BIT - OFFSET_BITS # PAGE_NUMBER_BITS = 54
 RID_BIT_SIZE = TAIL_BIT + PAGE_NUMBER_BITS + OFFSET_BITS
 
 RID_TOMBSTONE_VALUE = coords_to_rid(False, 2**PAGE_NUMBER_BITS-1, 2**OFFSET_BITS-1)
+# every tail RID is at least this, every base RID (and the tombstone) is below it
+MIN_TAIL_RID = coords_to_rid(True, 0, 0)
 
 RID_COLUMN = 0
 INDIRECTION_COLUMN = 1
@@ -108,6 +139,17 @@ def int_to_bytearray(data:int, record_size:int=FIXED_PARTIAL_RECORD_SIZE) -> byt
     """
     return bytearray(data.to_bytes(record_size, 'little'))
 
+def ints_to_bytearray(data:list[int], record_size:int=FIXED_PARTIAL_RECORD_SIZE) -> bytearray:
+    """
+    Stores a list of integers as one bytearray, each int encoded the same way as int_to_bytearray
+    Inputs: data, the integers to store in order
+    Outputs: a bytearray with size equal to len(data) * record_size
+    """
+    if record_size == 8:
+        # encode the whole list at once
+        return bytearray(pack(f"<{len(data)}Q", *data))
+    return bytearray(b"".join(x.to_bytes(record_size, 'little') for x in data))
+
 def bytearray_to_int(array:bytearray) -> int:
     """
     Retrieves an int that was stored in a bytearray
@@ -116,14 +158,21 @@ def bytearray_to_int(array:bytearray) -> int:
     """
     return int.from_bytes(bytes(array), 'little')
 
+def schema_to_int(schema:list[bool]|list[int]) -> int:
+    """
+    Converts a schema encoding to the int it is stored as, the first column is the highest bit
+    Inputs: schema, a list of 1 or 0 values
+    Outputs: an int
+    """
+    return int(''.join(str(int(x)) for x in schema), 2)
+
 def schema_to_bytearray(schema:list[bool]|list[int], record_size:int=FIXED_PARTIAL_RECORD_SIZE) -> bytearray:
     """
     Converts a schema encoding to a bytearray for storage, by first converting the schema to an int, and then a bytearray
     Inputs: schema, a list of 1 or 0 values
     Outputs: a bytearray of length equal to FIXED_PARTIAL_RECORD_SIZE containing the schema
     """
-    num = int(''.join(str(x) for x in schema), 2)
-    return int_to_bytearray(num, record_size)
+    return int_to_bytearray(schema_to_int(schema), record_size)
 
 def bytearray_to_schema(array:bytearray, length:int) -> list[bool]|list[int]:
     """
@@ -0,0 +1,76 @@
+"""
+Covering Index
+
+B+ tree over the primary key whose leaf entries also hold the latest values of chosen include columns.
+Range sums over an include column are answered from the leaves alone, without locating records in the bufferpool.
+Created with New_Index.create_covering_index, and kept up to date by New_Index on insert, update and delete.
+"""
+
+from typing import List, Tuple
+import lstore.config as config
+from lstore.config import debug_print as print
+from lstore.bplus_tree import BPlusTree, RID
+
+class CoveringIndex:
+
+    def __init__(self, key_column: int, include_columns: Tuple[int, ...], degree: int = config.INDEX_BPLUS_TREE_MAX_DEGREE):
+        self.key_column: int = key_column
+        self.include_columns: Tuple[int, ...] = tuple(include_columns)
+        self.tree: BPlusTree = BPlusTree(max_degree=degree)
+        # current primary key of each RID, so updates and deletes do not need to read the record
+        self.rid_key_map: dict[RID, int] = {}
+
+    # public methods
+
+    def covers(self, column: int) -> bool:
+        """Return True if the latest values of the column are kept in the index"""
+        return column in self.include_columns or column == self.key_column
+
+    def insert(self, rid: RID, values: List[int]) -> None:
+        """Add a record, values holds every data column of the record"""
+        self.__insert(rid, values[self.key_column], {column: values[column] for column in self.include_columns})
+
+    def update(self, rid: RID, values: List[int | None]) -> None:
+        """Bring a record's entry up to date, values holds every data column of the record, None for columns not updated"""
+        if all(values[column] is None for column in (self.key_column, *self.include_columns)):
+            return
+        key = self.rid_key_map[rid]
+        entry = self.tree.find_entry(key, rid)
+        assert entry is not None
+        included = dict(entry.included)
+        for column in self.include_columns:
+            if values[column] is not None:
+                included[column] = values[column]
+        new_key = values[self.key_column]
+        if new_key is not None and new_key != key:
+            # the record moves to its new place in key order, no past keys are kept
+            self.tree.delete(key, rid)
+            self.__insert(rid, new_key, included)
+        else:
+            entry.included = included
+
+    def delete(self, rid: RID) -> bool:
+        """Remove a record, return True if it was in the index, False otherwise"""
+        key = self.rid_key_map.pop(rid, None)
+        if key is None:
+            return False
+        return self.tree.delete(key, rid)
+
+    def sum_range(self, start_val: int, end_val: int, column: int) -> Tuple[int, int]:
+        """
+        Return (number of records, sum of the column) over records with a primary key in [start_val, end_val]
+        """
+        count = 0
+        total = 0
+        for entry in self.tree.range_entries(start_val, end_val):
+            count += 1
+            total += entry.included[column] if column != self.key_column else self.rid_key_map[entry.rid]
+        return count, total
+
+    # private methods
+
+    def __insert(self, rid: RID, key: int, included: dict[int, int]) -> None:
+        #Add an entry for the RID under the key, holding the include columns' values
+        self.tree.insert(key, rid)
+        self.tree.find_entry(key, rid).included = included
+        self.rid_key_map[rid] = key
@@ -52,8 +52,11 @@ class Database():
         """
         # save database to disk
         for table in self.tables.values():
+            # a column being indexed is unindexed until its build is done, its index would not be saved
+            table.index.wait_for_builds()
             table.page_directory.save_all()
             table.index.save_index_to_disk(str(Path(DATABASE_DIR, self.database_path, table.name)))
+            table.statistics.save(str(Path(DATABASE_DIR, self.database_path, table.name)))
 
     """
     # Creates a new table
@@ -141,6 +144,9 @@ class Database():
             # if not OVERRIDE_WITH_DUMB_INDEX: self.generate_index_on_loaded_table(path, table)
             # load the index from disk
             table.index.load_index_from_disk(str(path))
+            # load the column statistics, tables saved without them are scanned once
+            if not table.statistics.load(str(path)):
+                table.statistics.rebuild(table)
             # update table dictionary
             self.tables[name] = table
             # return the table
@@ -1,15 +1,69 @@
 from typing import List, Tuple, Union, NewType
-from lstore.config import DATABASE_DIR
+from lstore.config import DATABASE_DIR, INDEX_VERSION_RETENTION
 from lstore.config import debug_print as print
 from pathlib import Path
+from bisect import bisect_left, bisect_right, insort
+from heapq import merge as merge_sorted
 import json
 
 RID = NewType('RID', int)
 
+class PostingList:
+    """
+    The RIDs stored under one key of the hashtable.
+    RIDs are kept in a list, which is handed to point_query callers as is (no copy), along with a map from RID to its position in the list.
+    The position map gives O(1) membership checks, and O(1) removal by swapping the removed RID with the last one.
+    NOTE: removal does not preserve the order of the remaining RIDs.
+    """
+    def __init__(self, rids:List[RID]|None=None):
+        # drop repeated RIDs, keeping the first of each
+        self.rids:List[RID] = list(dict.fromkeys(rids)) if rids is not None else []
+        self.positions:dict[RID, int] = {rid: i for i, rid in enumerate(self.rids)}
+
+    @classmethod
+    def single(cls, rid:RID) -> "PostingList":
+        """Return a posting list holding one RID, without the checks of __init__, new keys usually start with one RID"""
+        postings = cls.__new__(cls)
+        postings.rids = [rid]
+        postings.positions = {rid: 0}
+        return postings
+
+    def __contains__(self, rid:RID) -> bool:
+        return rid in self.positions
+
+    def __len__(self) -> int:
+        return len(self.rids)
+
+    def __iter__(self):
+        return iter(self.rids)
+
+    def add(self, rid:RID) -> None:
+        if rid in self.positions:
+            return
+        self.positions[rid] = len(self.rids)
+        self.rids.append(rid)
+
+    def remove(self, rid:RID) -> None:
+        """Remove the RID, raises KeyError if it is not in the list"""
+        i = self.positions.pop(rid)
+        last = self.rids.pop()
+        if last != rid:
+            # fill the hole with the last RID
+            self.rids[i] = last
+            self.positions[last] = i
+
 class HashtableIndex:
-    def __init__(self):
-        self.hashtable:dict[int,List[RID]] = {}
+    def __init__(self, retention:int=INDEX_VERSION_RETENTION):
+        self.hashtable:dict[int,PostingList] = {}
         self.rid_val_map:dict[RID, int] = {}
+        # sorted copy of the keys in self.hashtable, used to answer range queries without probing every value in the range
+        self.sorted_keys:List[int] = []
+        # number of past values kept per RID, 0 disables version history
+        self.retention:int = retention
+        # past values of each RID, oldest first, holding at most self.retention values
+        self.version_history:dict[RID, List[int]] = {}
+        # reverse of version_history, past value -> {RID: number of times the RID had that value}
+        self.history_table:dict[int, dict[RID, int]] = {}
         
     def __str__(self):
         # print(str(self.hashtable.items()))
@@ -20,12 +74,36 @@ class HashtableIndex:
     def insert(self, key: int, rid: RID, abs_ver=0, prev_ver_key=None) -> None:
         #Create list for key, or append RID to existing list
         if key not in self.hashtable:
-            self.hashtable[key] = [ rid ]
+            self.hashtable[key] = PostingList.single(rid)
+            insort(self.sorted_keys, key)
         else:
-            self.hashtable[key].append(rid)
+            self.hashtable[key].add(rid)
 
         self.rid_val_map[rid] = key
 
+    def insert_many(self, keys: List[int], rids: List[RID]) -> None:
+        """
+        Insert many (key, RID) pairs at once, the same as calling insert on each pair.
+        New keys are sorted together and merged into sorted_keys once, instead of one insort per key.
+        """
+        new_keys = []
+        for key, rid in zip(keys, rids):
+            postings = self.hashtable.get(key)
+            if postings is None:
+                self.hashtable[key] = PostingList.single(rid)
+                new_keys.append(key)
+            else:
+                postings.add(rid)
+        self.rid_val_map.update(zip(rids, keys))
+        if not new_keys:
+            return
+        new_keys.sort()
+        if not self.sorted_keys or new_keys[0] > self.sorted_keys[-1]:
+            # keys inserted in increasing order, like a counting primary key
+            self.sorted_keys.extend(new_keys)
+        else:
+            self.sorted_keys = list(merge_sorted(self.sorted_keys, new_keys))
+
     """
     def update(self, new_val: int, curr_val: int, rid: RID) -> None:
         if new_val==curr_val:
@@ -53,15 +131,17 @@ class HashtableIndex:
         if rid in self.hashtable[self.rid_val_map[rid]]:
             #Make new list for RID if not existing
             if new_val not in self.hashtable:
-                self.hashtable[new_val] =  [ rid ]
+                self.hashtable[new_val] = PostingList.single(rid)
+                insort(self.sorted_keys, new_val)
             #Else add RID to existing list
             else:
-                self.hashtable[new_val].append(rid)
+                self.hashtable[new_val].add(rid)
             self.hashtable[self.rid_val_map[rid]].remove(rid)
 
             #Delete RID list if empty
-            if self.hashtable[self.rid_val_map[rid]]==[]:
+            if len(self.hashtable[self.rid_val_map[rid]])==0:
                 del self.hashtable[self.rid_val_map[rid]]
+                self.__remove_sorted_key(self.rid_val_map[rid])
             #Change reverse index
             self.rid_val_map[rid] = new_val
         else:
@@ -70,37 +150,151 @@ class HashtableIndex:
     def delete(self, key: int, rid: RID):
         """Remove RID with key, return True if RID exists, False otherwise"""
         #If RID in the list
-        if rid in self.hashtable[key]:
+        if key in self.hashtable and rid in self.hashtable[key]:
             #Remove from list, delete list if empty
             self.hashtable[key].remove(rid)
-            if self.hashtable[key]==[]:
+            if len(self.hashtable[key])==0:
                 del self.hashtable[key]
+                self.__remove_sorted_key(key)
             del self.rid_val_map[rid]
+            #Drop the RID's past values as well
+            self.drop_history(rid)
             return True
         return False
 
+    def save_version(self, rid: RID) -> None:
+        """
+        Push the RID's current value onto its version history.
+        Called once for every tail record of the RID, before the index is updated to the tail record's values.
+        Values older than self.retention versions are forgotten.
+        """
+        if self.retention <= 0 or rid not in self.rid_val_map:
+            return
+        self.__push_history(rid, self.rid_val_map[rid])
+
+    def bulk_load(self, entries: List[Tuple[RID, List[int]]]) -> None:
+        """
+        Insert many RIDs along with their past values.
+        entries are (RID, versions) pairs, versions holds the current value followed by past values, newest first (see Table.get_column_versions).
+        """
+        for rid, versions in entries:
+            self.insert(versions[0], rid)
+            if self.retention <= 0:
+                continue
+            # oldest first, at most self.retention values
+            for old_val in reversed(versions[1:self.retention + 1]):
+                self.__push_history(rid, old_val)
+
+    def __push_history(self, rid: RID, old_val: int) -> None:
+        #Append old_val to the RID's history, forgetting the oldest value past the retention
+        history = self.version_history.setdefault(rid, [])
+        history.append(old_val)
+        rids = self.history_table.setdefault(old_val, {})
+        rids[rid] = rids.get(rid, 0) + 1
+        if len(history) > self.retention:
+            self.__remove_history_entry(history.pop(0), rid)
+
+    def value_at_version(self, rid: RID, rel_ver: int) -> int:
+        """
+        Return the RID's value at the relative version (0 or negative).
+        Going back further than the number of updates gives the base record's value, like Table.locate_record does.
+        """
+        assert -rel_ver <= self.retention
+        if rel_ver == 0:
+            return self.rid_val_map[rid]
+        history = self.version_history.get(rid)
+        if not history:
+            # never updated, the base value is the current value
+            return self.rid_val_map[rid]
+        if -rel_ver > len(history):
+            # history is never truncated below self.retention values, so history[0] is the base value
+            return history[0]
+        return history[rel_ver]
+
+    def drop_history(self, rid: RID) -> None:
+        """Forget all past values of the RID, called when the RID is deleted"""
+        for old_val in self.version_history.pop(rid, []):
+            self.__remove_history_entry(old_val, rid)
+
+    def __remove_history_entry(self, old_val: int, rid: RID) -> None:
+        #Decrement the count of old_val for rid in history_table, removing empty entries
+        rids = self.history_table[old_val]
+        rids[rid] -= 1
+        if rids[rid] == 0:
+            del rids[rid]
+            if len(rids) == 0:
+                del self.history_table[old_val]
+
     def point_query(self, key: int) -> List[RID]:
         #Return list of RIDs associated with key
+        #NOTE: this is the index's own list, callers must not modify it
         if key in self.hashtable:
-            return self.hashtable[key]
+            return self.hashtable[key].rids
         return []
 
+    def contains(self, key: int) -> bool:
+        #Return True if any RID has the key, without building a result list
+        return key in self.hashtable
+
     def range_query(self, key_start: int, key_end: int) -> List[RID]:
         #Return list of RIDs within range of key values
+        #Only visit keys present in the index, found by binary search on the sorted keys
         result = []
-        while key_start<=key_end:
-            result += self.point_query(key_start)
-            key_start += 1
+        start = bisect_left(self.sorted_keys, key_start)
+        end = bisect_right(self.sorted_keys, key_end)
+        for i in range(start, end):
+            result += self.hashtable[self.sorted_keys[i]].rids
         return result
 
+    def key_count(self, key: int) -> int:
+        #Return the number of RIDs with the key
+        return len(self.hashtable[key]) if key in self.hashtable else 0
+
+    def count_range(self, key_start: int, key_end: int) -> int:
+        """Return the number of RIDs with a key in [key_start, key_end], only keys present in the index are visited"""
+        start = bisect_left(self.sorted_keys, key_start)
+        end = bisect_right(self.sorted_keys, key_end)
+        return sum(self.key_count(self.sorted_keys[i]) for i in range(start, end))
+
+    def rank(self, key: int) -> int:
+        """Return the number of RIDs with a key smaller than the given key"""
+        return sum(self.key_count(smaller) for smaller in self.sorted_keys[:bisect_left(self.sorted_keys, key)])
+
+    def select_kth(self, k: int) -> int:
+        """
+        Return the k-th smallest key over all RIDs, counting from 0, a key held by several RIDs is counted once per RID.
+        Raises IndexError if there are k or fewer RIDs.
+        """
+        if k >= 0:
+            for key in self.sorted_keys:
+                count = self.key_count(key)
+                if k < count:
+                    return key
+                k -= count
+        raise IndexError(f"There is no RID number {k} in the index")
+
+    def __remove_sorted_key(self, key: int) -> None:
+        #Remove a key from the sorted keys once its RID list is gone
+        i = bisect_left(self.sorted_keys, key)
+        if i < len(self.sorted_keys) and self.sorted_keys[i]==key:
+            del self.sorted_keys[i]
+
     def __get_relative_entry_version(self, base_entry: "TreeEntry") -> int:
         pass
 
     def version_query(self, key: int, rel_ver: int) -> List[RID]:
-        #Only called when rel_ver==0
-        if key in self.hashtable:
-            return self.hashtable[key]
-        return []
+        """
+        Return the RIDs which had the key at the relative version.
+        Only RIDs that hold the key now or held it within the retained history are checked.
+        Relative versions older than the retention raise a ValueError, the caller has to fall back to a scan.
+        """
+        if rel_ver == 0:
+            return self.point_query(key)
+        if -rel_ver > self.retention:
+            raise ValueError(f"Relative version {rel_ver} is older than the retained history of {self.retention} versions")
+        candidates = set(self.point_query(key))
+        candidates.update(self.history_table.get(key, {}).keys())
+        return [rid for rid in candidates if self.value_at_version(rid, rel_ver) == key]
     
     def save_index(self, path:str, col_num:int) -> None:
         """Path goes up to table_name"""
@@ -109,12 +303,19 @@ class HashtableIndex:
             index_path.mkdir(parents=True)
         #Save Hash
         with open(Path(index_path, f"hashmap_index.json"), "w") as file_name:
-            json.dump(self.hashtable, file_name, indent=4)
+            json.dump({key: postings.rids for key, postings in self.hashtable.items()}, file_name, indent=4)
             file_name.close()
         #Save Reverse Hash
         with open(Path(index_path, "hashmap_reverse.json"), "w") as file_name:
             json.dump(self.rid_val_map, file_name)
             file_name.close()
+        self.save_history(index_path)
+
+    def save_history(self, index_path:Path) -> None:
+        """Save the version history, index_path is the column's index directory"""
+        with open(Path(index_path, "hashmap_history.json"), "w") as file_name:
+            json.dump(self.version_history, file_name)
+            file_name.close()
 
     def keystoint(self, x):
         return {int(k): v for k, v in x.items()}
@@ -126,16 +327,42 @@ class HashtableIndex:
         reverse_path = Path(index_path, "hashmap_reverse.json")
         if hash_path.exists():
             with open(hash_path, "r") as file_name:
-                self.hashtable = json.load(file_name, object_hook=self.keystoint)
+                loaded = json.load(file_name, object_hook=self.keystoint)
+                self.hashtable = {key: PostingList(rids) for key, rids in loaded.items()}
                 file_name.close()
         else:
             raise FileNotFoundError(f"Error: Hashmap for column {col_num} not on disk")
+        #Sorted keys are not saved, rebuild them from the loaded hashmap
+        self.sorted_keys = sorted(self.hashtable.keys())
         if reverse_path.exists():
             with open(reverse_path, "r") as file_name:
                 self.rid_val_map = json.load(file_name, object_hook=self.keystoint)
                 file_name.close()
         else:
             raise FileNotFoundError(f"Error: Reverse Hashmap for column {col_num} not on disk")
+        self.load_history(index_path)
+
+    def load_history(self, index_path:Path) -> None:
+        """
+        Load the version history, index_path is the column's index directory.
+        Version history is optional, indices saved without it start with an empty history.
+        """
+        history_path = Path(index_path, "hashmap_history.json")
+        self.version_history = {}
+        self.history_table = {}
+        if history_path.exists():
+            with open(history_path, "r") as file_name:
+                loaded = json.load(file_name, object_hook=self.keystoint)
+                file_name.close()
+            for rid, history in loaded.items():
+                #Keep only the newest values if the retention was lowered
+                history = history[-self.retention:] if self.retention > 0 else []
+                if len(history) == 0:
+                    continue
+                self.version_history[rid] = history
+                for old_val in history:
+                    rids = self.history_table.setdefault(old_val, {})
+                    rids[rid] = rids.get(rid, 0) + 1
 
 """
     incomplete methods for key->list[RID,rel_val]  mapping
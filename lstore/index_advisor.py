@@ -0,0 +1,81 @@
+"""
+Index Advisor
+
+Decides which columns of a table are worth indexing, based on the table's workload.
+New_Index reports every column searched on by select/sum (reads) and every column written by insert/update (writes).
+Every INDEX_ADVISOR_INTERVAL operations, columns searched often compared to how often they are written get an index,
+and indexed columns which are mostly written lose their index, so no index maintenance is paid on write-only columns.
+The primary key column is always indexed, and bitmap indices are never dropped since their type was picked for the column by the user.
+Advice runs in the middle of a read or write (often while the table's write lock is held), so indices are built in the background,
+and the column keeps being scanned until its index is ready.
+"""
+
+from threading import Thread
+import lstore.config as config
+from lstore.config import debug_print as print
+from lstore.bitmap_index import BitmapIndex
+
+class IndexAdvisor:
+
+    def __init__(self, index: "New_Index", interval:int=config.INDEX_ADVISOR_INTERVAL):
+        self.index: "New_Index" = index
+        self.interval: int = interval
+        num_columns = len(index.indices)
+        # per column counts since the last advice, halved after each advice so older operations count less
+        self.reads: list[float] = [0] * num_columns
+        self.writes: list[float] = [0] * num_columns
+        # operations until the next advice
+        self.countdown: int = interval
+        # column -> thread of its last background index build
+        self.builds: dict[int, Thread] = {}
+
+    def record_read(self, column_num: int) -> None:
+        """
+        Count a search on the column
+        """
+        self.reads[column_num] += 1
+        self.__tick()
+
+    def record_write(self, written_columns: list[bool], count: int = 1) -> None:
+        """
+        Count count writes to each column marked True
+        """
+        for i, written in enumerate(written_columns):
+            if written:
+                self.writes[i] += count
+        self.__tick(count)
+
+    def advise(self) -> None:
+        """
+        Create or drop indices based on the read/write ratio of each column.
+        An index is created once a column is read at least INDEX_ADVISOR_CREATE_RATIO times per write (and at least INDEX_ADVISOR_MIN_READS times).
+        An index is dropped once a column is read less than INDEX_ADVISOR_DROP_RATIO times per write.
+        """
+        for column_num in range(len(self.reads)):
+            if column_num == self.index.table.key:
+                # the primary key is needed by insert, update and delete
+                continue
+            reads = self.reads[column_num]
+            writes = self.writes[column_num]
+            if self.index.indices[column_num] is None:
+                if reads >= config.INDEX_ADVISOR_MIN_READS and reads >= config.INDEX_ADVISOR_CREATE_RATIO * writes:
+                    print(f"IndexAdvisor: creating index on column {column_num} ({reads} reads, {writes} writes)")
+                    thread = self.index.create_index(column_num, background=True)
+                    if thread is not None:
+                        self.builds[column_num] = thread
+            elif isinstance(self.index.indices[column_num], BitmapIndex):
+                # created explicitly for a low cardinality column, kept as is
+                continue
+            elif writes > 0 and reads < config.INDEX_ADVISOR_DROP_RATIO * writes:
+                print(f"IndexAdvisor: dropping index on column {column_num} ({reads} reads, {writes} writes)")
+                self.index.drop_index(column_num)
+        # decay the counts so the advice follows changes in the workload
+        self.reads = [reads / 2 for reads in self.reads]
+        self.writes = [writes / 2 for writes in self.writes]
+
+    def __tick(self, count: int = 1) -> None:
+        #Advise once every self.interval operations
+        self.countdown -= count
+        if self.countdown <= 0:
+            self.countdown = self.interval
+            self.advise()
@@ -0,0 +1,102 @@
+"""
+Join
+
+Equi-join of two tables on one column of each, streaming the joined rows.
+    - if one side's join column is indexed, the other side is scanned and each page row's values are looked up in the index
+      (index nested loop), the matching records are read a page at a time
+    - otherwise a hash table of the smaller side (by number of base pages) is built with a scan, and the larger side is
+      scanned and probed against it (hash join)
+Only the latest version of each record is joined, and only the join columns and projected columns are read.
+"""
+
+from typing import Iterator
+from lstore.table import Table
+from lstore.config import debug_print as print
+
+def join(left_table: Table, right_table: Table, left_col: int, right_col: int, projection: tuple[list[int], list[int]]) -> Iterator[list[int]]:
+    """
+    Joins records of left_table and right_table whose value in left_col equals the value in right_col.
+
+    Inputs:
+        - left_table, right_table, the tables to join
+        - left_col, right_col, the join column of each table
+        - projection, (left column mask, right column mask), which columns of each table to output
+    Outputs:
+        - a generator of joined rows, each the projected left columns followed by the projected right columns
+    """
+    left_mask, right_mask = projection
+    if len(left_mask) != left_table.num_columns or len(right_mask) != right_table.num_columns:
+        raise ValueError("Malformed query: Incorrect number of columns specified for projection")
+    right_indexed = right_table.index.is_indexed(right_col)
+    left_indexed = left_table.index.is_indexed(left_col)
+    if right_indexed or left_indexed:
+        # scan the side without an index, or the smaller side if both have one
+        if right_indexed and (not left_indexed or _size(left_table) <= _size(right_table)):
+            yield from _index_nested_loop(left_table, right_table, left_col, right_col, left_mask, right_mask, outer_is_left=True)
+        else:
+            yield from _index_nested_loop(right_table, left_table, right_col, left_col, right_mask, left_mask, outer_is_left=False)
+    elif _size(left_table) <= _size(right_table):
+        yield from _hash_join(left_table, right_table, left_col, right_col, left_mask, right_mask, build_is_left=True)
+    else:
+        yield from _hash_join(right_table, left_table, right_col, left_col, right_mask, left_mask, build_is_left=False)
+
+def _size(table: Table) -> int:
+    #Number of base pages, an estimate of the number of records
+    return table.current_base_page_number + 1
+
+def _projected(columns: list[list[int] | None], mask: list[int], n: int) -> list[int]:
+    #Projected values of the n-th record of a scanned page row
+    return [columns[i][n] for i, value in enumerate(mask) if value]
+
+def _read_mask(mask: list[int], join_col: int) -> list[int]:
+    #Column mask of the projected columns and the join column
+    read_mask = list(mask)
+    read_mask[join_col] = 1
+    return read_mask
+
+def _hash_join(build_table: Table, probe_table: Table, build_col: int, probe_col: int,
+               build_mask: list[int], probe_mask: list[int], build_is_left: bool) -> Iterator[list[int]]:
+    #Build a hash table of build_table's join values, then stream probe_table's records through it
+    built: dict[int, list[list[int]]] = {}
+    for _, columns in build_table.scan(_read_mask(build_mask, build_col), batch=True):
+        for n, value in enumerate(columns[build_col]):
+            if value in built:
+                built[value].append(_projected(columns, build_mask, n))
+            else:
+                built[value] = [_projected(columns, build_mask, n)]
+    if not built:
+        return
+    for _, columns in probe_table.scan(_read_mask(probe_mask, probe_col), batch=True):
+        for n, value in enumerate(columns[probe_col]):
+            matches = built.get(value)
+            if matches is None:
+                continue
+            probe_row = _projected(columns, probe_mask, n)
+            for build_row in matches:
+                yield build_row + probe_row if build_is_left else probe_row + build_row
+
+def _index_nested_loop(outer_table: Table, inner_table: Table, outer_col: int, inner_col: int,
+                       outer_mask: list[int], inner_mask: list[int], outer_is_left: bool) -> Iterator[list[int]]:
+    #Scan outer_table, looking up each page row's join values in inner_table's index on inner_col
+    inner_columns = [i for i, value in enumerate(inner_mask) if value]
+    for _, columns in outer_table.scan(_read_mask(outer_mask, outer_col), batch=True):
+        matches = inner_table.index.locate_many(inner_col, columns[outer_col])
+        rids = sorted(set(rid for found in matches.values() for rid in found))
+        if not rids:
+            continue
+        # the matching inner records of the whole page row are read together
+        inner_rows = {}
+        if inner_columns:
+            for rid, found in zip(rids, inner_table.locate_records(rids, inner_mask)):
+                if found is not None:
+                    inner_rows[rid] = [found[i] for i in inner_columns]
+        else:
+            inner_rows = {rid: [] for rid in rids}
+        for n, value in enumerate(columns[outer_col]):
+            outer_row = None
+            for rid in matches.get(value, []):
+                if rid not in inner_rows:
+                    continue
+                if outer_row is None:
+                    outer_row = _projected(columns, outer_mask, n)
+                yield outer_row + inner_rows[rid] if outer_is_left else inner_rows[rid] + outer_row
@@ -10,9 +10,19 @@ However, might use B-Tree later for potential performance benefits on range quer
 #NOTE: select_version is handled by the table and not the index, for past versions (MAJOR CHANGE!!!)
 """
 
-from typing import NewType, List, Union
+from typing import NewType, List, Union, Tuple
+import json
+from threading import Thread, Condition
+from pathlib import Path
+from shutil import rmtree
 from lstore.bplus_tree import BPlusTree
 from lstore.hashtable_index import HashtableIndex
+from lstore.compact_index import CompactHashtableIndex
+from lstore.bitmap_index import BitmapIndex, Bitmap
+from lstore.composite_index import CompositeIndex
+from lstore.covering_index import CoveringIndex
+from lstore.sum_index import SumIndex
+from lstore.index_advisor import IndexAdvisor
 import lstore.config as config
 from lstore.config import debug_print as print
 from lstore.bplus_tree import RID
@@ -27,18 +37,35 @@ class New_Index:
         self.hash_index: bool = use_hash
         self.degree: int = degree
         self.indices = [None] * table.num_columns
+        # column -> base RIDs written while that column's index is being built
+        self.change_buffers: dict[int, set[RID]] = {}
+        # notified under the table's write lock when a build is over
+        self.build_done = Condition(table.write_lock)
+        # indices over several columns, by their ordered tuple of columns
+        self.composites: dict[Tuple[int, ...], CompositeIndex] = {}
+        # primary key ordered index holding the latest values of some columns, answers range sums without reading records
+        self.covering: CoveringIndex | None = None
+        # Fenwick trees over the primary key order of some columns, answers range sums in O(log n)
+        self.sums: SumIndex | None = None
         if config.INDEX_AUTOCREATE_ALL_COLS:
-            # create an index for all columns
+            # create an empty index for all columns, the table is empty or its indices are loaded from disk afterwards
             for i in range(table.num_columns):
-                self.create_index(i)
+                self.indices[i] = self.__new_index()
+        else:
+            # the primary key is always indexed, it is needed by insert, update and delete
+            self.indices[table.key] = self.__new_index()
+        # picks the other indexed columns from the workload
+        self.advisor: IndexAdvisor | None = IndexAdvisor(self) if config.INDEX_USE_ADVISOR else None
 
     def locate(self, column_num: int, value: int) -> List[RID]:
         """
         Returns the RIDs of all records with the given value in the specified column
         """
+        self.record_read(column_num)
         if self.indices[column_num] is None:
             if config.INDEX_USE_DUMB_INDEX:
-                raise NotImplementedError("The desired column is not indexed and using dumb index to locate is not yet implemented.")
+                # scan the latest value of every record, skipping pages by their zone maps
+                return self.table.dumb_index.locate(column_num, value)
             else:
                 raise ValueError("The desired column is not indexed and the configuration does not allow using dumb index to locate records.")
         if self.tree_index:
@@ -49,14 +76,65 @@ class New_Index:
         # run a point query on the dictionary
         return self.indices[column_num][value]
 
+    def locate_many(self, column_num: int, values: List[int]) -> dict[int, List[RID]]:
+        """
+        Returns the RIDs of all records with each of the given values in the specified column, as a value -> RIDs dict.
+        An unindexed column is scanned once for all values.
+        """
+        self.record_read(column_num)
+        wanted = set(values)
+        if self.indices[column_num] is None:
+            if config.INDEX_USE_DUMB_INDEX:
+                # scan the latest value of every record, skipping pages by their zone maps
+                return self.table.dumb_index.locate_many(column_num, list(wanted))
+            else:
+                raise ValueError("The desired column is not indexed and the configuration does not allow using dumb index to locate records.")
+        if self.tree_index or self.hash_index:
+            return {value: self.indices[column_num].point_query(value) for value in wanted}
+        return {value: self.indices[column_num].get(value, []) for value in wanted}
+
+    def is_indexed(self, column_num: int) -> bool:
+        """
+        Returns True if the column has an index, so locate does not scan the table
+        """
+        return self.indices[column_num] is not None
+
+    def key_exists(self, key: int) -> bool:
+        """
+        Returns True if a record has the given primary key.
+        Only checks the primary key index, no records are read.
+        """
+        index = self.indices[self.table.key]
+        if index is None:
+            # the primary key index is being rebuilt
+            return len(self.locate(self.table.key, key)) > 0
+        if self.tree_index:
+            return len(index.point_query(key)) > 0
+        elif self.hash_index:
+            return index.contains(key)
+        return len(index.get(key, [])) > 0
+
+    def existing_keys(self, keys: List[int]) -> set[int]:
+        """
+        Returns the given primary keys that a record already has, the same as calling key_exists on each key.
+        Looked up in one pass over the keys, no records are read.
+        """
+        index = self.indices[self.table.key]
+        if index is None or not self.hash_index:
+            return {key for key in keys if self.key_exists(key)}
+        contains = index.contains
+        return {key for key in keys if contains(key)}
+
     def locate_range(self, start_val: int, end_val: int, col_num: int) -> List[RID]:
         """
         Returns the RIDs of all records with values within specified range in specified column
         """
+        self.record_read(col_num)
         if self.indices[col_num] is None:
             # this column is not indexed
             if config.INDEX_USE_DUMB_INDEX:
-                raise NotImplementedError("The desired column is not indexed and using dumb index to locate is not yet implemented.")
+                # scan the latest value of every record, skipping pages by their zone maps
+                return self.table.dumb_index.locate_range(start_val, end_val, col_num)
             else:
                 raise ValueError("The desired column is not indexed and the configuration does not allow using dumb index to locate records.")
         result = []
@@ -71,13 +149,132 @@ class New_Index:
             result.extend(extension if extension is not None else [])
         return result
 
+    def locate_where(self, conditions: dict[int, int | tuple[int, int]], match_all: bool = True) -> List[RID]:
+        """
+        Returns the RIDs of records matching all (or with match_all=False, any) of the conditions, in increasing order.
+        conditions maps a column to a value, or to an inclusive (low, high) range of values.
+        If every column is bitmap indexed the bitmaps are combined directly. Otherwise, if the conditions are values for
+        the first columns of a composite index, except maybe a range on the last of them, the composite index answers them.
+        Otherwise each condition is located on its own.
+        """
+        bitmap = self.__bitmap_where(conditions, match_all)
+        if bitmap is not None:
+            return bitmap.rids()
+        if match_all:
+            found = self.__composite_where(conditions)
+            if found is not None:
+                return sorted(found)
+        found = [set(self.__locate_condition(column_num, condition)) for column_num, condition in conditions.items()]
+        return sorted(set.intersection(*found) if match_all else set.union(*found))
+
+    def count_where(self, conditions: dict[int, int | tuple[int, int]], match_all: bool = True) -> int:
+        """
+        Returns the number of records matching all (or with match_all=False, any) of the conditions, as in locate_where.
+        If every column is bitmap indexed no RIDs are listed and no page is read.
+        """
+        bitmap = self.__bitmap_where(conditions, match_all)
+        if bitmap is not None:
+            return len(bitmap)
+        return len(self.locate_where(conditions, match_all))
+
+    def count_range(self, start_val: int, end_val: int, col_num: int) -> int:
+        """
+        Returns the number of records with values within specified range in specified column, without listing their RIDs.
+        With the B+ tree this reads the subtree counts along two root to leaf paths, in O(log n).
+        """
+        self.record_read(col_num)
+        if self.indices[col_num] is None:
+            if config.INDEX_USE_DUMB_INDEX:
+                return self.table.dumb_index.count_range(start_val, end_val, col_num)
+            else:
+                raise ValueError("The desired column is not indexed and the configuration does not allow using dumb index to locate records.")
+        if self.tree_index or self.hash_index:
+            return self.indices[col_num].count_range(start_val, end_val)
+        return sum(len(rids) for val, rids in self.indices[col_num].items() if start_val <= val <= end_val)
+
+    def rank(self, value: int, col_num: int) -> int:
+        """
+        Returns the number of records with a value smaller than the given value in specified column
+        """
+        self.record_read(col_num)
+        if self.indices[col_num] is None:
+            if config.INDEX_USE_DUMB_INDEX:
+                return self.table.dumb_index.rank(value, col_num)
+            else:
+                raise ValueError("The desired column is not indexed and the configuration does not allow using dumb index to locate records.")
+        if self.tree_index or self.hash_index:
+            return self.indices[col_num].rank(value)
+        return sum(len(rids) for val, rids in self.indices[col_num].items() if val < value)
+
+    def select_kth(self, k: int, col_num: int) -> int:
+        """
+        Returns the k-th smallest value of specified column over all records, counting from 0 (k = 0 is the minimum).
+        Raises IndexError if the table has k or fewer records.
+        """
+        self.record_read(col_num)
+        if self.indices[col_num] is None:
+            if config.INDEX_USE_DUMB_INDEX:
+                return self.table.dumb_index.select_kth(k, col_num)
+            else:
+                raise ValueError("The desired column is not indexed and the configuration does not allow using dumb index to locate records.")
+        if self.tree_index or self.hash_index:
+            return self.indices[col_num].select_kth(k)
+        if k >= 0:
+            for val in sorted(self.indices[col_num]):
+                if k < len(self.indices[col_num][val]):
+                    return val
+                k -= len(self.indices[col_num][val])
+        raise IndexError(f"There is no record number {k} in column {col_num}")
+
+    def __bitmap_where(self, conditions: dict[int, int | tuple[int, int]], match_all: bool) -> Bitmap | None:
+        #Combine the bitmaps of the conditions, or return None if a column is not bitmap indexed
+        if len(conditions) == 0:
+            raise ValueError("At least one condition is needed")
+        if not all(isinstance(self.indices[column_num], BitmapIndex) for column_num in conditions):
+            return None
+        result = None
+        for column_num, condition in conditions.items():
+            self.record_read(column_num)
+            index = self.indices[column_num]
+            bitmap = index.range_bitmap(*condition) if isinstance(condition, tuple) else index.bitmap(condition)
+            if result is None:
+                result = bitmap
+            else:
+                result = result & bitmap if match_all else result | bitmap
+        return result
+
+    def __composite_where(self, conditions: dict[int, int | tuple[int, int]]) -> List[RID] | None:
+        #Locate the conditions with a composite index covering them, or return None if there is none
+        for columns, index in self.composites.items():
+            prefix = columns[:len(conditions)]
+            if len(conditions) > len(columns) or set(prefix) != set(conditions):
+                continue
+            values = [conditions[column_num] for column_num in prefix]
+            if any(isinstance(value, tuple) for value in values[:-1]):
+                # only the last column of the prefix can be a range
+                continue
+            for column_num in prefix:
+                self.record_read(column_num)
+            if isinstance(values[-1], tuple):
+                return index.range_query(tuple(values[:-1]), values[-1][0], values[-1][1])
+            return index.prefix_query(tuple(values))
+        return None
+
+    def __locate_condition(self, column_num: int, condition: int | tuple[int, int]) -> List[RID]:
+        #Locate the RIDs matching one condition of locate_where
+        if isinstance(condition, tuple):
+            return self.locate_range(condition[0], condition[1], column_num)
+        return self.locate(column_num, condition)
+
     def locate_version(self, col_num: int, value: int, rel_ver: int):
         """
         Returns the RIDs of all records with the given value in the specified column and version
         """
+        self.record_read(col_num)
         if self.indices[col_num] is None:
             if config.INDEX_USE_DUMB_INDEX:
-                raise NotImplementedError("The desired column is not indexed and using dumb index to locate is not yet implemented.")
+                # scan the value of every record at the version, records with fewer versions use their base value
+                return [rid for rid, versions in self.table.get_column_versions(col_num, -rel_ver) if versions[min(-rel_ver, len(versions) - 1)] == value]
             else:
                 raise ValueError("The desired column is not indexed and the configuration does not allow using dumb index to locate records.")
         result = []
@@ -85,7 +282,8 @@ class New_Index:
             # run a point query on the tree
             return self.indices[col_num].version_query(value, rel_ver)
         elif self.hash_index:
-            if rel_ver==0:
+            if -rel_ver <= self.indices[col_num].retention:
+                # the hash index keeps the history needed for this version
                 return self.indices[col_num].version_query(value, rel_ver)
             else:
                 return self.table.dumb_index.locate_version(col_num, value, rel_ver)
@@ -115,13 +313,72 @@ class New_Index:
             # other records also have this value, add to the list
             self.indices[col_num][val].append(rid)
 
+    def add_records_to_index(self, col_num: int, vals: List[int], rids: List[RID]) -> None:
+        """
+        Add many RIDs to the index for the specified column, vals[i] being the value of rids[i].
+        Same as calling add_record_to_index for each pair, used by bulk inserts.
+        Calls to this function on unindexed columns will be ignored.
+        """
+        if self.indices[col_num] is None:
+            return
+        if self.hash_index and not self.tree_index:
+            self.indices[col_num].insert_many(vals, rids)
+            return
+        for val, rid in zip(vals, rids):
+            self.add_record_to_index(col_num, val, rid)
+
+    def add_record_to_record_indices(self, rid: RID, columns: List[int]) -> None:
+        """
+        Add a new record to every index over whole records (composite, covering and sum indices), columns holds all data columns of the record.
+        This should be called once on record insertion.
+        """
+        for index in self.__record_indices():
+            index.insert(rid, columns)
+
+    def add_records_to_record_indices(self, rids: List[RID], rows: List[List[int]]) -> None:
+        """
+        Add many new records to every index over whole records, rows[i] holding all data columns of rids[i].
+        Same as calling add_record_to_record_indices for each pair, used by bulk inserts.
+        """
+        for index in self.__record_indices():
+            for rid, columns in zip(rids, rows):
+                index.insert(rid, columns)
+
+    def update_record_in_record_indices(self, rid: RID, columns: List[int | None]) -> None:
+        """
+        Bring the record up to date in every index over whole records, None marks columns not updated.
+        This should be called once for every tail record.
+        """
+        for index in self.__record_indices():
+            index.update(rid, columns)
+
+    def remove_record_from_record_indices(self, rid: RID) -> None:
+        """
+        Remove the record from every index over whole records.
+        This should be called once on record deletion.
+        """
+        for index in self.__record_indices():
+            index.delete(rid)
+
+    def __record_indices(self) -> list[CompositeIndex | CoveringIndex | SumIndex]:
+        #Indices kept up to date from whole records, rather than one column at a time
+        indices: list[CompositeIndex | CoveringIndex | SumIndex] = list(self.composites.values())
+        if self.covering is not None:
+            indices.append(self.covering)
+        if self.sums is not None:
+            indices.append(self.sums)
+        return indices
+
     def update_record_in_index(self, col_num: int, curr_val: int, rid: RID, new_val: int):
         """
         Add a new entry to the index which references the previous value of the record.
+        Calls to this function on unindexed columns will be ignored.
         """
+        if self.indices[col_num] is None:
+            return
         if self.tree_index:
             assert isinstance(self.indices[col_num], BPlusTree)
-            self.indices[col_num].update(new_val, rid)
+            self.indices[col_num].update(new_val, curr_val, rid)
             return
         elif self.hash_index:
             assert isinstance(self.indices[col_num], HashtableIndex)
@@ -129,6 +386,18 @@ class New_Index:
             return
         raise NotImplementedError("Tried to update dict index, not compatible with versioning at this time.")
 
+    def save_version(self, rid: RID) -> None:
+        """
+        Save the current values of the record as a past version in every index that keeps version history.
+        This should be called once for every tail record, before the index is updated with the tail record's values.
+        """
+        if not self.hash_index or self.tree_index:
+            # the B+ tree tracks versions through its own entries
+            return
+        for index in self.indices:
+            if index is not None:
+                index.save_version(rid)
+
     def remove_record_from_index(self, col_num: int, val: int, rid: RID) -> None:
         """
         Remove an entry from an index at a particular column.
@@ -152,29 +421,272 @@ class New_Index:
         self.indices[col_num][val].remove(rid)
 
 
-    def create_index(self, column_num: int) -> None:
+    def create_index(self, column_num: int, background: bool = False, bitmap: bool = False) -> Thread | None:
         """
-        Create an empty index for the specified column.
-        Warning: Run only on an empty table. Otherwise, the index will be incomplete.
+        Create an index for the specified column, filled with the records already in the table.
+        The latest values (and past values kept by hash indices) are read from the pages by Table.get_column_versions.
+        With background=True the index is built in a new thread while writes continue, and the thread is returned so it can be joined.
+        Records written during the build are noted in a change buffer and read again before the index is put in use.
+        The column stays unindexed until the build is done.
+        With bitmap=True a BitmapIndex is built, meant for columns with few distinct values, only available with hash indices.
         """
-        if self.indices[column_num] is not None:
+        if bitmap and (self.tree_index or not self.hash_index):
+            raise ValueError("Bitmap indices can only be created when hash indices are used.")
+        if self.indices[column_num] is not None or column_num in self.change_buffers:
+            # already indexed, or being indexed
             return None
+        index = BitmapIndex(retention=config.INDEX_VERSION_RETENTION) if bitmap else self.__new_index()
+        with self.table.write_lock:
+            # from now on every write to the table is noted for this column
+            self.change_buffers[column_num] = set()
+        if background:
+            thread = Thread(target=self.__build_index, args=(column_num, index), daemon=True)
+            thread.start()
+            return thread
+        self.__build_index(column_num, index)
+        return None
+
+    def create_composite_index(self, columns: Tuple[int, ...]) -> None:
+        """
+        Create an index over the ordered tuple of columns, filled with the records already in the table.
+        Records can be located by values of the first columns (a prefix of the key), and a range on the next column,
+        with locate_composite, locate_composite_range, or locate_where.
+        The table is read in one scan, and writes wait until the index is built.
+        """
+        columns = tuple(columns)
+        if len(columns) < 2 or len(set(columns)) != len(columns):
+            raise ValueError("A composite index needs at least two different columns.")
+        if columns in self.composites:
+            return
+        index = CompositeIndex(columns, self.degree)
+        column_mask = [int(i in columns) for i in range(self.table.num_columns)]
+        with self.table.write_lock:
+            for rids, values in self.table.scan(column_mask, batch=True):
+                for n, rid in enumerate(rids):
+                    index.insert(rid, [column[n] if column is not None else None for column in values])
+            self.composites[columns] = index
+
+    def drop_composite_index(self, columns: Tuple[int, ...]) -> None:
+        """
+        Drop the composite index over the ordered tuple of columns.
+        """
+        self.composites.pop(tuple(columns), None)
+
+    def create_covering_index(self, include_columns: Tuple[int, ...]) -> None:
+        """
+        Create a primary key ordered B+ tree holding the latest values of the include columns, filled with the records already in the table.
+        Range sums over the primary key of an include column are then answered by sum_covered without reading any record.
+        Replaces the previous covering index, if any. The table is read in one scan, and writes wait until the index is built.
+        """
+        include_columns = tuple(include_columns)
+        index = CoveringIndex(self.table.key, include_columns, self.degree)
+        column_mask = [int(i in include_columns or i == self.table.key) for i in range(self.table.num_columns)]
+        with self.table.write_lock:
+            for rids, values in self.table.scan(column_mask, batch=True):
+                for n, rid in enumerate(rids):
+                    index.insert(rid, [column[n] if column is not None else None for column in values])
+            self.covering = index
+
+    def drop_covering_index(self) -> None:
+        """
+        Drop the covering index, range sums read the records again.
+        """
+        self.covering = None
+
+    def create_sum_index(self, column_num: int) -> None:
+        """
+        Keep range sums of the column over the primary key in the sum index, filled with the records already in the table.
+        Range sums of the column are then answered by sum_covered in O(log n).
+        The sum index is rebuilt with the column added, the table is read in one scan, and writes wait until it is built.
+        """
+        if self.sums is not None and self.sums.covers(column_num):
+            return
+        columns = (*self.sums.columns, column_num) if self.sums is not None else (column_num,)
+        self.__build_sum_index(columns)
+
+    def drop_sum_index(self, column_num: int) -> None:
+        """
+        Stop keeping range sums of the column, range sums of it read the records again.
+        """
+        if self.sums is None or not self.sums.covers(column_num):
+            return
+        columns = tuple(column for column in self.sums.columns if column != column_num)
+        if columns:
+            self.__build_sum_index(columns)
+        else:
+            self.sums = None
+
+    def __build_sum_index(self, columns: Tuple[int, ...]) -> None:
+        #Build a sum index over the columns from the table's pages and put it in use
+        index = SumIndex(self.table.key, columns)
+        column_mask = [int(i in columns or i == self.table.key) for i in range(self.table.num_columns)]
+        with self.table.write_lock:
+            for rids, values in self.table.scan(column_mask, batch=True):
+                for n, rid in enumerate(rids):
+                    index.insert(rid, [column[n] if column is not None else None for column in values])
+            index.rebuild()
+            self.sums = index
+
+    def sum_covered(self, start_val: int, end_val: int, column_num: int) -> int | None:
+        """
+        Returns the sum of the latest values of the column over records with a primary key in [start_val, end_val],
+        read from the sum index or the covering index alone, or None if neither has the column.
+        """
+        if self.sums is not None and self.sums.covers(column_num):
+            self.record_read(self.table.key)
+            return self.sums.sum_range(start_val, end_val, column_num)
+        if self.covering is None or not self.covering.covers(column_num):
+            return None
+        self.record_read(self.table.key)
+        _, total = self.covering.sum_range(start_val, end_val, column_num)
+        return total
+
+    def locate_composite(self, columns: Tuple[int, ...], prefix: Tuple[int, ...]) -> List[RID]:
+        """
+        Returns the RIDs of all records with the values of prefix in the first columns of the composite index over columns
+        """
+        for column_num in columns[:len(prefix)]:
+            self.record_read(column_num)
+        return self.composites[tuple(columns)].prefix_query(tuple(prefix))
+
+    def locate_composite_range(self, columns: Tuple[int, ...], prefix: Tuple[int, ...], start_val: int, end_val: int) -> List[RID]:
+        """
+        Returns the RIDs of all records with the values of prefix in the first columns of the composite index over columns,
+        and a value within [start_val, end_val] in the next column
+        """
+        for column_num in columns[:len(prefix) + 1]:
+            self.record_read(column_num)
+        return self.composites[tuple(columns)].range_query(tuple(prefix), start_val, end_val)
+
+    def record_write(self, written_columns: list[bool], count: int = 1) -> None:
+        """
+        Report the columns written by an insert or update to the index advisor.
+        Called by the table at the end of every insert and update, bulk writes report all their records at once with count.
+        """
+        if self.advisor is not None:
+            self.advisor.record_write(written_columns, count)
+
+    def record_read(self, column_num: int) -> None:
+        """
+        Report a search on the column to the index advisor.
+        Called by every locate method, and by queries that find their records with a scan instead.
+        """
+        if self.advisor is not None:
+            self.advisor.record_read(column_num)
+
+    def record_changed(self, *rids: RID) -> None:
+        """
+        Note written base records for the indices being built.
+        Called by the table at the end of every insert, update and delete, while holding table.write_lock.
+        """
+        for changed in self.change_buffers.values():
+            changed.update(rids)
+
+    def __new_index(self) -> Union[BPlusTree, HashtableIndex, dict[int, List[RID]]]:
+        """
+        Create an empty index of the configured type.
+        """
         if self.tree_index:
             # create BPlusTree index
-            self.indices[column_num] = BPlusTree(max_degree=self.degree)
+            return BPlusTree(max_degree=self.degree)
+        elif self.hash_index and config.INDEX_USE_COMPACT_HASH:
+            return CompactHashtableIndex(retention=config.INDEX_VERSION_RETENTION)
         elif self.hash_index:
-            self.indices[column_num] = HashtableIndex()
+            return HashtableIndex(retention=config.INDEX_VERSION_RETENTION)
+        # create dict index
+        return {}
+
+    def __build_index(self, column_num: int, index) -> None:
+        """
+        Fill the new index from the table's pages, catch up on records written in the meantime, then put it in use.
+        """
+        depth = index.retention if isinstance(index, HashtableIndex) else 0
+        try:
+            entries = self.table.get_column_versions(column_num, depth)
+            self.__bulk_load(index, entries)
+            # latest value of every loaded record, needed to remove records that changed during the build
+            loaded = {rid: versions[0] for rid, versions in entries}
+            with self.table.write_lock:
+                changed = self.change_buffers.pop(column_num)
+                for rid in changed:
+                    if rid not in loaded:
+                        continue
+                    if isinstance(index, dict):
+                        index[loaded[rid]].remove(rid)
+                    else:
+                        index.delete(loaded[rid], rid)
+                self.__bulk_load(index, self.table.get_column_versions(column_num, depth, sorted(changed)))
+                self.indices[column_num] = index
+        finally:
+            with self.table.write_lock:
+                # a failed build leaves the column unindexed
+                self.change_buffers.pop(column_num, None)
+                self.build_done.notify_all()
+
+    def wait_for_builds(self) -> None:
+        """
+        Wait until no index is being built, called by Database.close before the indices are saved.
+        A column stays unindexed until its build is done, so saving during a build would remove the column's saved index.
+        """
+        if self.advisor is not None:
+            for thread in list(self.advisor.builds.values()):
+                thread.join()
+        # builds started with create_index(background=True) outside the advisor
+        with self.table.write_lock:
+            self.build_done.wait_for(lambda: not self.change_buffers)
+
+    def __bulk_load(self, index, entries: list[tuple[RID, list[int]]]) -> None:
+        """
+        Insert (RID, versions) entries from Table.get_column_versions into an index.
+        """
+        if isinstance(index, HashtableIndex):
+            index.bulk_load(entries)
+        elif isinstance(index, BPlusTree):
+            for rid, versions in entries:
+                index.insert(versions[0], rid)
         else:
-            # create dict index
-            self.indices[column_num] = {}
+            for rid, versions in entries:
+                index.setdefault(versions[0], []).append(rid)
 
     def load_index_from_disk(self, path:str):
-        """Path is the file path up to the table name"""
+        """
+        Path is the file path up to the table name
+        Columns with a saved index are indexed, columns without one are left unindexed, except the primary key which is rebuilt from the pages.
+        The type of each hash index is read from its saved files, it may differ from INDEX_USE_COMPACT_HASH.
+        """
         if self.hash_index:
             col_num = 1
-            for index in self.indices:
-                index.load_index(path, col_num)
+            for i in range(len(self.indices)):
+                if BitmapIndex.is_saved(path, col_num):
+                    self.indices[i] = BitmapIndex(retention=config.INDEX_VERSION_RETENTION)
+                    self.indices[i].load_index(path, col_num)
+                elif CompactHashtableIndex.is_saved(path, col_num):
+                    self.indices[i] = CompactHashtableIndex(retention=config.INDEX_VERSION_RETENTION)
+                    self.indices[i].load_index(path, col_num)
+                elif Path(path, "index", f"col{col_num}").exists():
+                    self.indices[i] = HashtableIndex(retention=config.INDEX_VERSION_RETENTION)
+                    self.indices[i].load_index(path, col_num)
+                else:
+                    self.indices[i] = None
+                    if i == self.table.key:
+                        self.create_index(i)
                 col_num += 1
+            # composite indices are saved as their columns only, and rebuilt from the pages
+            composites_path = Path(path, "index", "composites.json")
+            if composites_path.exists():
+                with open(composites_path, "r") as file_name:
+                    for columns in json.load(file_name):
+                        self.create_composite_index(tuple(columns))
+            # the covering index is saved as its include columns only, and rebuilt from the pages
+            covering_path = Path(path, "index", "covering.json")
+            if covering_path.exists():
+                with open(covering_path, "r") as file_name:
+                    self.create_covering_index(tuple(json.load(file_name)))
+            # the sum index is saved as its columns only, and rebuilt from the pages
+            sums_path = Path(path, "index", "sums.json")
+            if sums_path.exists():
+                with open(sums_path, "r") as file_name:
+                    self.__build_sum_index(tuple(json.load(file_name)))
         else:
             raise NotImplementedError("This function is called only for hastable indices")
 
@@ -183,14 +695,39 @@ class New_Index:
         if self.hash_index:
             col_num = 1
             for index in self.indices:
-                index.save_index(path, col_num)
+                if Path(path, "index", f"col{col_num}").exists():
+                    # remove the previously saved index, it may be of another type or the column may have been dropped
+                    rmtree(Path(path, "index", f"col{col_num}"))
+                if index is not None:
+                    index.save_index(path, col_num)
                 col_num += 1
+            composites_path = Path(path, "index", "composites.json")
+            if self.composites:
+                composites_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(composites_path, "w") as file_name:
+                    json.dump([list(columns) for columns in self.composites], file_name)
+            elif composites_path.exists():
+                composites_path.unlink()
+            covering_path = Path(path, "index", "covering.json")
+            if self.covering is not None:
+                covering_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(covering_path, "w") as file_name:
+                    json.dump(list(self.covering.include_columns), file_name)
+            elif covering_path.exists():
+                covering_path.unlink()
+            sums_path = Path(path, "index", "sums.json")
+            if self.sums is not None:
+                sums_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(sums_path, "w") as file_name:
+                    json.dump(list(self.sums.columns), file_name)
+            elif sums_path.exists():
+                sums_path.unlink()
         else:
             raise NotImplementedError("This function is called only for hashtable indices")
 
     def drop_index(self, column_num: int) -> None:
         """
         Drop the index of the specified column.
-        Warning: It will not be possible to recover the index, even by calling create_index.
+        It can be rebuilt from the table's pages by calling create_index.
         """
         self.indices[column_num] = None
@@ -3,6 +3,7 @@ Module Interfaces:
     Config for page size
 """
 from lstore.config import PAGE_SIZE, FIXED_PARTIAL_RECORD_SIZE
+from lstore.config import bytearray_to_int
 from lstore.config import debug_print as print
 
 
@@ -12,6 +13,7 @@ class Page:
     The Page class can:
         - Check if a new record can be added
         - Write a new record
+        - Keep the smallest and largest value written (its zone map)
     """
     def __init__(self, page_size=PAGE_SIZE, record_size=FIXED_PARTIAL_RECORD_SIZE) -> None:
         # num_records is a count of how many records are contained in this page (column)
@@ -20,6 +22,10 @@ class Page:
         self.record_size: int = record_size
         self.num_records:int = 0
         self.data:bytearray = bytearray(self.page_size)
+        # zone map, the smallest and largest value written to the page, None while the page is empty
+        # overwritten values are not removed, so the range may be wider than the current values but never narrower
+        self.min_value:int|None = None
+        self.max_value:int|None = None
 
     def has_capacity(self) -> bool:
         """
@@ -30,10 +36,10 @@ class Page:
         """
         return self.record_size * self.num_records < self.page_size
 
-    def write_direct(self, value:bytearray) -> None:
+    def write_direct(self, value:bytearray, int_value:int|None=None) -> None:
         """
         Writes a new bytearray to the page, and increments num_records by one.
-        Inputs: value that will be written to the page
+        Inputs: value that will be written to the page, int_value the same value as an int if the caller has it (saves decoding it for the zone map)
         Outputs: None
         """
         # this is the location of the start of this page entry
@@ -43,16 +49,64 @@ class Page:
         # we have +1 records in this column
         self.num_records += 1
         self.is_dirty = True
+        if int_value is None:
+            int_value = bytearray_to_int(value)
+        self.__widen_zone(int_value, int_value)
 
-    def overwrite_direct(self, value:bytearray, offset:int) -> None:
+    def remaining_capacity(self) -> int:
         """
-        Overwrites the data at the given offset with the new value.
+        Number of records (1 column of a record each) that can still be added to this page.
+        """
+        return self.page_size // self.record_size - self.num_records
+
+    def write_many(self, values:bytearray, zone:tuple[int, int]|None=None) -> None:
+        """
+        Writes several records to the page at once, the same as calling write_direct on each record in order.
+        Inputs: values, the records' bytearrays joined together, must fit in the remaining capacity of the page,
+                zone, the smallest and largest of the values if the caller has them (saves decoding every value for the zone map)
+        Outputs: None
+        """
+        count = len(values) // self.record_size
+        assert count <= self.remaining_capacity()
+        offset = self.record_size * self.num_records
+        self.data[offset:offset + len(values)] = values
+        self.num_records += count
+        self.is_dirty = True
+        if zone is None and count > 0:
+            int_values = [bytearray_to_int(values[i:i + self.record_size]) for i in range(0, count * self.record_size, self.record_size)]
+            zone = (min(int_values), max(int_values))
+        if zone is not None:
+            self.__widen_zone(*zone)
+
+    def overwrite_direct(self, value:bytearray, offset:int, int_value:int|None=None) -> None:
+        """
+        Overwrites the data at the given offset with the new value, int_value is the same value as an int if the caller has it.
         Called only to overwrite indirection col of a base record with the new current tail record.
         """
         overwrite_offset = self.record_size * offset
         # set the data at the calculated offset
         self.data[overwrite_offset:overwrite_offset + self.record_size] = value
         self.is_dirty = True
+        if int_value is None:
+            int_value = bytearray_to_int(value)
+        self.__widen_zone(int_value, int_value)
+
+    def rebuild_zone(self) -> None:
+        """
+        Recomputes the zone map from the records in the page, used for pages saved without one
+        """
+        self.min_value = None
+        self.max_value = None
+        if self.num_records > 0:
+            values = [bytearray_to_int(self.retrieve_direct(i)) for i in range(self.num_records)]
+            self.__widen_zone(min(values), max(values))
+
+    def __widen_zone(self, low:int, high:int) -> None:
+        #Grow the zone map to include [low, high]
+        if self.min_value is None or low < self.min_value:
+            self.min_value = low
+        if self.max_value is None or high > self.max_value:
+            self.max_value = high
 
 
     def retrieve_direct(self, offset:int) -> bytearray:
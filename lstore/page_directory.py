@@ -1,10 +1,11 @@
 from lstore.page import Page
-from lstore.config import BUFFERPOOL_SIZE, DATABASE_DIR, FIXED_PARTIAL_RECORD_SIZE
+from lstore.config import BUFFERPOOL_SIZE, DATABASE_DIR, FIXED_PARTIAL_RECORD_SIZE, PAGE_SIZE
 from lstore.config import int_to_bytearray, bytearray_to_int
 from lstore.config import debug_print as print
 from pathlib import Path
 from time import time_ns
 from shutil import rmtree
+from threading import RLock
 """
 Abstraction of the Page Directory and contained Bufferpool
 """
@@ -31,6 +32,12 @@ class PageWrapper:
         self.accessed = time_ns()
         return self.__page
 
+    def peek_page(self) -> Page:
+        """
+        Returns the internal page object of the wrapper without updating the last accessed time
+        """
+        return self.__page
+
 
 class PageDirectory:
     """
@@ -46,20 +53,28 @@ class PageDirectory:
         # print(table_name, database_name)
         self.file_manager = FileManager(table_name, database_name)
         self.num_pages:int = 0
+        # zone maps (smallest, largest value) of pages that are not in the bufferpool, None for empty pages
+        # filled as pages are saved, or read from the page file on first use, so a page can be skipped without loading it
+        self.zone_maps:dict[tuple[int, bool, int], tuple[int, int]|None] = {}
+        # guards the bufferpool, pages can be retrieved from a background thread (e.g. an online index build)
+        self.lock = RLock()
 
     def save_all(self) -> None:
         """
         Saves all pages in bufferpool to disc. Used when table is closed.
         """
-        for page in self.bufferpool:
-            if page.is_dirty():
-                self.__save_page(page)
+        with self.lock:
+            for page in self.bufferpool:
+                if page.is_dirty():
+                    self.__save_page(page)
 
     def __save_page(self, page:PageWrapper) -> None:
         """
         Saves the input page to disc
         """
         self.file_manager.page_to_file(page)
+        saved_page = page.peek_page()
+        self.zone_maps[(page.column, page.is_tail, page.page_number)] = (saved_page.min_value, saved_page.max_value) if saved_page.min_value is not None else None
 
     def __load_page(self, column:int, is_tail:bool, page_number:int) -> PageWrapper|None:
         """
@@ -87,17 +102,25 @@ class PageDirectory:
         # code for substituting page
         # code for checking if the page is in the bufferpool, because that would also need to be updated
         # NOTE: The bufferpool will be static, as the page_dir is blocked during this process
-        is_buffered = any(buffered_page.column==column and buffered_page.is_tail==is_tail and buffered_page.page_number==page_number for buffered_page in self.bufferpool)
-        #If in bufferpool
-        if is_buffered==True:
-            self.bufferpool = list(map(lambda x: page if x.column==column and x.is_tail==is_tail and x.page_number==page_number else x, self.bufferpool))
-        self.__save_page(PageWrapper(page, column, is_tail, page_number))
+        with self.lock:
+            is_buffered = any(buffered_page.column==column and buffered_page.is_tail==is_tail and buffered_page.page_number==page_number for buffered_page in self.bufferpool)
+            #If in bufferpool
+            if is_buffered==True:
+                self.bufferpool = list(map(lambda x: page if x.column==column and x.is_tail==is_tail and x.page_number==page_number else x, self.bufferpool))
+            self.__save_page(PageWrapper(page, column, is_tail, page_number))
 
 
     def retrieve_page(self, column:int, is_tail:bool, page_number:int, update_bufferpool:bool=True) -> Page | None:
         """
         Returns the desired page, if it is in the bufferpool it will be returned directly, otherwise it will be loaded into the bufferpool, then it will be returned.
         """
+        with self.lock:
+            return self.__retrieve_page(column, is_tail, page_number, update_bufferpool)
+
+    def __retrieve_page(self, column:int, is_tail:bool, page_number:int, update_bufferpool:bool) -> Page | None:
+        """
+        Implementation of retrieve_page, the caller must hold self.lock
+        """
         if not update_bufferpool:
             # return the page from disk
             pagewrapper = self.__load_page(column, is_tail, page_number)
@@ -107,24 +130,18 @@ class PageDirectory:
                 return None
             
         # check all items in bufferpool for target page
-        for page in self.bufferpool:
+        for i, page in enumerate(self.bufferpool):
             if page.is_tail == is_tail and page.column == column and page.page_number == page_number:
+                # move to the front so the bufferpool stays ordered by access time,
+                # otherwise a page just handed out could be evicted by the next load while the caller still writes to it
+                if i > 0:
+                    self.bufferpool.insert(0, self.bufferpool.pop(i))
                 return page.get_page()
         # page was not in bufferpool, load it
         # load page from disc
         pagewrapper = self.__load_page(column, is_tail, page_number)
         if pagewrapper is not None:
-            # evict least recently used page, if bufferpool is full
-            if len(self.bufferpool) >= self.max_pages and self.bufferpool[-1].is_dirty():
-                # only save the page if it is dirty (it has been written to)
-                self.__save_page(self.bufferpool[-1])
-            # replace evicted page with loaded page
-            if len(self.bufferpool) < self.max_pages:
-                # add loaded page to bufferpool, since it is not full
-                self.bufferpool.append(pagewrapper)
-            else:
-                # replace evicted page with loaded page, since bufferpool is full
-                self.bufferpool[-1] = pagewrapper
+            self.__add_to_bufferpool(pagewrapper)
             # access page object in wrapper
             page = pagewrapper.get_page()
             # sort bufferpool, pagewrapper should be at index 0 after
@@ -135,12 +152,49 @@ class PageDirectory:
             # page was not found
             return None
 
+    def __add_to_bufferpool(self, pagewrapper:PageWrapper) -> None:
+        """
+        Puts a page in the bufferpool, in place of the least recently used page if the bufferpool is full, the caller must hold self.lock
+        """
+        # evict least recently used page, if bufferpool is full
+        if len(self.bufferpool) >= self.max_pages and self.bufferpool[-1].is_dirty():
+            # only save the page if it is dirty (it has been written to)
+            self.__save_page(self.bufferpool[-1])
+        # replace evicted page with loaded page
+        if len(self.bufferpool) < self.max_pages:
+            # add loaded page to bufferpool, since it is not full
+            self.bufferpool.append(pagewrapper)
+        else:
+            # replace evicted page with loaded page, since bufferpool is full
+            self.bufferpool[-1] = pagewrapper
+
+    def get_zone_map(self, column:int, is_tail:bool, page_number:int) -> tuple[int, int]|None:
+        """
+        Returns the (smallest, largest) value written to the desired page, or None if the page is empty or does not exist.
+        The page is not loaded into the bufferpool.
+        """
+        with self.lock:
+            for buffered_page in self.bufferpool:
+                if buffered_page.is_tail == is_tail and buffered_page.column == column and buffered_page.page_number == page_number:
+                    page = buffered_page.peek_page()
+                    return (page.min_value, page.max_value) if page.min_value is not None else None
+            key = (column, is_tail, page_number)
+            if key not in self.zone_maps:
+                self.zone_maps[key] = self.file_manager.file_to_zone_map(column, is_tail, page_number)
+            return self.zone_maps[key]
+
     def insert_page(self, page:Page, column:int, is_tail:bool, page_number:int):
         """
-        Adds a page to the PageDirectory, it may be sent directly to disc
+        Adds a page to the PageDirectory, it is put in the bufferpool and saved to disc once evicted
         """
-        # save new page directly to disc
-        self.__save_page(PageWrapper(page, column, is_tail, page_number))
+        # new pages are about to be written, so they go in the bufferpool instead of being saved empty and loaded again
+        with self.lock:
+            # dirty, so the page is saved even if it is evicted before its first write
+            page.is_dirty = True
+            pagewrapper = PageWrapper(page, column, is_tail, page_number)
+            self.__add_to_bufferpool(pagewrapper)
+            pagewrapper.get_page()
+            self.__sort_bufferpool()
 
 
 class FileManager:
@@ -159,12 +213,10 @@ class FileManager:
         # check from the table's directory within the database
         file_name = Path(DATABASE_DIR, f"{self.database_name}", f"{self.table_name}")
         # sort RID column, every record has an RID so this column is guarantied to be >= the size of any other column
-        all_pages = sorted(file_name.glob(f"{istail_str}_col0_*.bin"))
+        all_pages = list(file_name.glob(f"{istail_str}_col0_*.bin"))
         if len(all_pages) > 0:
-            # the largest page number is at the last element
-            _, _, i = str(all_pages[-1].stem).split('_')
-            # return the page number
-            return int(i)
+            # compare page numbers as numbers, by file name page 9 would come after page 39
+            return max(int(str(page.stem).split('_')[2]) for page in all_pages)
         elif is_tail:
             # default tail page number
             return -1
@@ -189,8 +241,15 @@ class FileManager:
             saved_data = bytearray(file_name.read_bytes())
             # cut out saved num_records, it is same length as FIXED_PARTIAL_RECORD_SIZE
             page.num_records = bytearray_to_int(saved_data[:FIXED_PARTIAL_RECORD_SIZE])
-            # the rest of the data is the record data
-            page.data = saved_data[FIXED_PARTIAL_RECORD_SIZE:]
+            # then the record data
+            page.data = saved_data[FIXED_PARTIAL_RECORD_SIZE:FIXED_PARTIAL_RECORD_SIZE + page.page_size]
+            # then the zone map, pages saved without one get it computed from their records
+            zone_data = saved_data[FIXED_PARTIAL_RECORD_SIZE + page.page_size:]
+            if len(zone_data) == 2 * FIXED_PARTIAL_RECORD_SIZE and page.num_records > 0:
+                page.min_value = bytearray_to_int(zone_data[:FIXED_PARTIAL_RECORD_SIZE])
+                page.max_value = bytearray_to_int(zone_data[FIXED_PARTIAL_RECORD_SIZE:])
+            else:
+                page.rebuild_zone()
             page_wrapper = PageWrapper(page, column, is_tail, page_number)
             return page_wrapper
         else:
@@ -210,10 +269,39 @@ class FileManager:
         if not file_name.parent.exists():
             # make the file path if it doesn't exist
             file_name.parent.mkdir(parents=True)
+        saved_page = page.peek_page()
         # save the current number of records in the page as well
-        extra_data = int_to_bytearray(page.get_page().num_records)
+        extra_data = int_to_bytearray(saved_page.num_records)
+        # followed by the data, then the zone map (smallest and largest value, 0 for an empty page)
+        zone_data = int_to_bytearray(saved_page.min_value or 0) + int_to_bytearray(saved_page.max_value or 0)
         # write the binary file
-        file_name.write_bytes(extra_data + page.get_page().data)
+        file_name.write_bytes(extra_data + saved_page.data + zone_data)
+
+    def file_to_zone_map(self, column:int, is_tail:bool, page_number:int) -> tuple[int, int]|None:
+        """
+        Reads the zone map (smallest, largest value) of a previously saved page from disk, without reading its records if it has one saved.
+        Returns None if the page is empty or could not be found.
+        """
+        if is_tail:
+            istail_str = "t"
+        else:
+            istail_str = "b"
+        file_name = Path(DATABASE_DIR, f"{self.database_name}", f"{self.table_name}", f"{istail_str}_col{column}_{page_number}.bin")
+        if not file_name.exists():
+            return None
+        with open(file_name, "rb") as file:
+            num_records = bytearray_to_int(bytearray(file.read(FIXED_PARTIAL_RECORD_SIZE)))
+            if num_records == 0:
+                return None
+            file.seek(FIXED_PARTIAL_RECORD_SIZE + PAGE_SIZE)
+            zone_data = bytearray(file.read(2 * FIXED_PARTIAL_RECORD_SIZE))
+        if len(zone_data) == 2 * FIXED_PARTIAL_RECORD_SIZE:
+            return (bytearray_to_int(zone_data[:FIXED_PARTIAL_RECORD_SIZE]), bytearray_to_int(zone_data[FIXED_PARTIAL_RECORD_SIZE:]))
+        # saved without a zone map, compute it from the records
+        page_wrapper = self.file_to_page(column, is_tail, page_number)
+        assert page_wrapper is not None
+        page = page_wrapper.peek_page()
+        return (page.min_value, page.max_value)
 
     def delete_file(self, column: int, is_tail:bool, page_number:int):
         """Removes file specified by column, is_tail, and page_number"""
@@ -1,4 +1,4 @@
-from lstore.config import RID_COLUMN, NUM_METADATA_COLUMNS, INDIRECTION_COLUMN, RID_TOMBSTONE_VALUE
+from lstore.config import RID_COLUMN, NUM_METADATA_COLUMNS
 from lstore.config import bytearray_to_int
 from lstore.config import debug_print as print
 
@@ -21,18 +21,61 @@ class DumbIndex:
         Return RIDs of records with the given value at the specified column
         """
         rids:list[int] = []
-        # print(f"-> locate::{value}, in::{column_num}, for page range 0,{self.table.current_base_page_number}")
-        # check all pages
-        for n in range(self.table.current_base_page_number + 1):
-            page = self.table.page_directory.retrieve_page(column_num + NUM_METADATA_COLUMNS, False, n)
-            if page is not None:
-                # check all offsets
-                for i in range(page.num_records):
-                    if bytearray_to_int(page.retrieve_direct(i)) == value:
-                        # add rid of the base record to locate list
-                        rids.append(self.get_rid(n, i))
+        # scan the current value of the column, one page row at a time, pages without the value are skipped by their zone maps
+        for page_rids, _ in self.table.scan([0]*self.table.num_columns, {column_num: (value, value)}, batch=True):
+            rids.extend(page_rids)
         return rids
 
+    def is_indexed(self, column_num:int) -> bool:
+        """
+        Return False, every lookup scans the table
+        """
+        return False
+
+    def key_exists(self, key:int) -> bool:
+        """
+        Return True if a record has the given primary key
+        """
+        return len(self.locate(self.table.key, key)) > 0
+
+    def locate_many(self, column_num:int, values:list[int]) -> dict[int, list[int]]:
+        """
+        Return a value -> RIDs dict of records with each of the given values at the specified column, in one pass over the pages
+        """
+        rids:dict[int, list[int]] = {value: [] for value in values}
+        if not rids:
+            return rids
+        column_mask = [0]*self.table.num_columns
+        column_mask[column_num] = 1
+        # pages outside the range of the values are skipped by their zone maps
+        for page_rids, columns in self.table.scan(column_mask, {column_num: (min(rids), max(rids))}, batch=True):
+            for rid, value in zip(page_rids, columns[column_num]):
+                if value in rids:
+                    rids[value].append(rid)
+        return rids
+
+    def locate_where(self, conditions:dict[int, int|tuple[int, int]], match_all:bool=True) -> list[int]:
+        """
+        Return RIDs of records matching all (or with match_all=False, any) of the conditions, in increasing order.
+        conditions maps a column to a value, or to an inclusive (low, high) range of values.
+        """
+        if len(conditions) == 0:
+            raise ValueError("At least one condition is needed")
+        ranges = {col: condition if isinstance(condition, tuple) else (condition, condition) for col, condition in conditions.items()}
+        if match_all:
+            # one scan testing every condition
+            rids:list[int] = []
+            for page_rids, _ in self.table.scan([0]*self.table.num_columns, ranges, batch=True):
+                rids.extend(page_rids)
+            return sorted(rids)
+        return sorted(set().union(*(self.locate_range(low, high, col) for col, (low, high) in ranges.items())))
+
+    def count_where(self, conditions:dict[int, int|tuple[int, int]], match_all:bool=True) -> int:
+        """
+        Return the number of records matching all (or with match_all=False, any) of the conditions, as in locate_where
+        """
+        return len(self.locate_where(conditions, match_all))
+
     def locate_version(self, col_num:int, value:int, rel_ver:int):
         """
         Return base RIDs of records with the given value at the specified column and relative version.
@@ -40,58 +83,93 @@ class DumbIndex:
         """
         assert rel_ver <= 0
         result_rids = []
+        # read only the searched column, the table hops back through the tail records and follows their schema encoding
+        column_mask = [0] * self.table.num_columns
+        column_mask[col_num] = 1
         for page_num in range(self.table.current_base_page_number + 1):
             page = self.table.page_directory.retrieve_page(col_num + NUM_METADATA_COLUMNS, False, page_num)
             if page is None:
                 raise ValueError(f"Page {page_num} is None")
             for offset in range(page.num_records):
                 cur_base_rid = self.get_rid(page_num, offset)
-                # start at the latest tail record (newest version)
-                indir_col = self.table.get_partial_record(cur_base_rid, INDIRECTION_COLUMN)
-                # skip this record if tombstoned
-                if indir_col == RID_TOMBSTONE_VALUE:
-                    continue
-                cur_rid = indir_col
-                while cur_rid != cur_base_rid and rel_ver > 0:
-                    # make backwards hops to reach desired relative version
-                    cur_rid = self.table.get_partial_record(cur_rid, INDIRECTION_COLUMN)
-                    rel_ver -= 1
-                # check if the value at the hopped-to record is the desired value
-                if self.table.get_partial_record(cur_rid, col_num + NUM_METADATA_COLUMNS) == value:
+                # locate_record skips tombstoned records
+                record = self.table.locate_record(cur_base_rid, self.table.key, column_mask, rel_ver)
+                # check if the value at the desired version is the desired value
+                if record is not False and record.columns[col_num] == value:
                     result_rids.append(cur_base_rid)
         return result_rids
 
 
     def locate_range(self, start_key:int, end_key:int, col_num: int) -> list[int]:
         """
-        Finds the range of RIDs for the given start and end primary key
+        Finds the range of RIDs for the given start and end values of the column
 
         Inputs:
-            - start_key, the start primary key value of the desired range
-            - end_key, the end primary key value of the desired range
+            - start_key, the start value of the desired range
+            - end_key, the end value of the desired range
         Outputs:
             - a list of rids for the range
         """
         rids:list[int] = []
-        # check all pages for start_val, values may not be sorted
-        for n in range(self.table.current_base_page_number + 1):
-            page = self.table.page_directory.retrieve_page(0 + NUM_METADATA_COLUMNS, False, n)
-            if page is not None:
-                # check all offsets
-                for i in range(page.num_records):
-                    # if the value is in range add it
-                    if bytearray_to_int(page.retrieve_direct(i)) >= start_key and bytearray_to_int(page.retrieve_direct(i)) <= end_key:
-                        # assuming inclusive range
-                        rids.append(self.get_rid(n, i))
-        # return values only if both start and end were found
+        # values may not be sorted, scan every page row that may have values in the inclusive range, according to its zone maps
+        for page_rids, _ in self.table.scan([0]*self.table.num_columns, {col_num: (start_key, end_key)}, batch=True):
+            rids.extend(page_rids)
         return sorted(rids)
 
+    def count_range(self, start_key:int, end_key:int, col_num:int) -> int:
+        """
+        Return the number of records with a value of the column in the inclusive range
+        """
+        return len(self.locate_range(start_key, end_key, col_num))
+
+    def rank(self, value:int, col_num:int) -> int:
+        """
+        Return the number of records with a value of the column smaller than the given value
+        """
+        count = 0
+        for page_rids, _ in self.table.scan([0]*self.table.num_columns, {col_num: lambda v: v < value}, batch=True):
+            count += len(page_rids)
+        return count
+
+    def select_kth(self, k:int, col_num:int) -> int:
+        """
+        Return the k-th smallest value of the column over all records, counting from 0.
+        Raises IndexError if there are k or fewer records.
+        """
+        column_mask = [0]*self.table.num_columns
+        column_mask[col_num] = 1
+        values:list[int] = []
+        for _, columns in self.table.scan(column_mask, batch=True):
+            values.extend(columns[col_num])
+        if k < 0 or k >= len(values):
+            raise IndexError(f"There is no record number {k} in column {col_num}")
+        return sorted(values)[k]
+
+    def sum_covered(self, *args) -> None:
+        # no covering index, the records are read
+        return None
+
     def add_record_to_index(self, *args) -> None:
         pass
 
+    def add_records_to_index(self, *args) -> None:
+        pass
+
     def remove_record_from_index(self, *args) -> None:
         pass
 
+    def add_record_to_record_indices(self, *args) -> None:
+        pass
+
+    def add_records_to_record_indices(self, *args) -> None:
+        pass
+
+    def update_record_in_record_indices(self, *args) -> None:
+        pass
+
+    def remove_record_from_record_indices(self, *args) -> None:
+        pass
+
     def create_index(self, *args) -> None:
         pass
 
@@ -101,6 +179,21 @@ class DumbIndex:
     def update_record_in_index(self, *args) -> None:
         pass
 
+    def save_version(self, *args) -> None:
+        pass
+
+    def record_changed(self, *args) -> None:
+        pass
+
+    def record_write(self, *args) -> None:
+        pass
+
+    def record_read(self, *args) -> None:
+        pass
+
+    def wait_for_builds(self, *args) -> None:
+        pass
+
     def load_index_from_disk(self, *args) -> None:
         pass
 
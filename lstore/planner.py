@@ -0,0 +1,76 @@
+"""
+Query Planner
+
+Chooses how select and sum find their records, from an estimate of how many records match and what reading them costs.
+    - index lookup, a point query on the column's index, then each matching record is read
+    - index range, a range query on the column's index, then each matching record is read
+    - scan, every base page row is read, skipping page rows outside the range by their zone maps
+Records found by an index may be on any page, so an index plan costs PLANNER_RECORD_COST per matching record
+(PLANNER_BATCH_RECORD_COST if the records are read grouped by page, as sum does), while a scan costs PLANNER_SCAN_COST
+per record of the table. An unindexed column is always scanned.
+Matches are estimated from the table's statistics (see lstore.statistics), as records / distinct values for a value,
+and from the column's equi-depth histogram for a range.
+"""
+
+import lstore.config as config
+from lstore.config import debug_print as print
+from lstore.statistics import ColumnStatistics
+
+INDEX_LOOKUP = "index lookup"
+INDEX_RANGE = "index range"
+SCAN = "scan"
+
+class Plan:
+
+    def __init__(self, method: str, column: int, start_val: int, end_val: int, estimated_rows: float, cost: float):
+        self.method: str = method
+        self.column: int = column
+        self.start_val: int = start_val
+        self.end_val: int = end_val
+        self.estimated_rows: float = estimated_rows
+        self.cost: float = cost
+
+    def __str__(self) -> str:
+        condition = f"= {self.start_val}" if self.start_val == self.end_val else f"in [{self.start_val}, {self.end_val}]"
+        return f"{self.method} on column {self.column} {condition}, ~{self.estimated_rows:.0f} records, cost {self.cost:.1f}"
+
+
+class Planner:
+
+    def __init__(self, table: "Table"):
+        self.table: "Table" = table
+
+    # public methods
+
+    def get_statistics(self, column_num: int) -> ColumnStatistics:
+        """
+        Return the statistics of a column, kept up to date by the table without any scan
+        """
+        return self.table.statistics.column(column_num)
+
+    def plan(self, column_num: int, start_val: int, end_val: int, batched: bool = False) -> Plan:
+        """
+        Return the cheapest plan to find the records with a value of the column in [start_val, end_val].
+        batched is True if the records found by an index are read grouped by page.
+        An unindexed column is always scanned, and a value of the primary key is always looked up in its index.
+        """
+        record_cost = config.PLANNER_BATCH_RECORD_COST if batched else config.PLANNER_RECORD_COST
+        index_method = INDEX_LOOKUP if start_val == end_val else INDEX_RANGE
+        if column_num == self.table.key and start_val == end_val and self.table.index.is_indexed(column_num):
+            # primary keys are unique
+            return Plan(INDEX_LOOKUP, column_num, start_val, end_val, 1, record_cost)
+        stats = self.get_statistics(column_num)
+        rows = stats.estimate_rows(start_val, end_val)
+        index_cost = rows * record_cost
+        scan_cost = stats.row_count * config.PLANNER_SCAN_COST
+        if not self.table.index.is_indexed(column_num):
+            return Plan(SCAN, column_num, start_val, end_val, rows, scan_cost)
+        if not config.QUERY_USE_PLANNER or index_cost <= scan_cost:
+            return Plan(index_method, column_num, start_val, end_val, rows, index_cost)
+        return Plan(SCAN, column_num, start_val, end_val, rows, scan_cost)
+
+    def explain(self, column_num: int, start_val: int, end_val: int, batched: bool = False) -> str:
+        """
+        Return the plan for a value (start_val == end_val) or range of a column as text, with its estimated records and cost
+        """
+        return str(self.plan(column_num, start_val, end_val, batched))
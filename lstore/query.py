@@ -1,8 +1,16 @@
 from lstore.table import Table, Record
+from lstore.join import join
+from lstore.planner import SCAN
+from lstore.statistics import ColumnStatistics
 from lstore.config import debug_print as print
-from typing import Literal
+from typing import Literal, Iterator
+import numpy as np
 import traceback
 
+# aggregate functions of Query.aggregate applied to a column -> function combining a list of values (or of per page results) into one,
+# count and avg are not applied to a column, they are found from the size of each group and the sum of the column
+AGGREGATE_FUNCTIONS = {"sum": sum, "min": min, "max": max}
+
 
 class Query:
     """
@@ -37,7 +45,6 @@ class Query:
         if len(columns) != self.table.num_columns:
             raise ValueError("Malformed query: Incorrect number of columns")
         primary_key_col = self.table.key
-        column_mask = [x==primary_key_col for x in range(len(columns))]
         new_primary_key = columns[primary_key_col]
 
         # check new_primary_key is not None
@@ -52,8 +59,8 @@ class Query:
             # all values in columns are None
             return False
 
-        existing_primary_key = self.select(new_primary_key, primary_key_col, column_mask)
-        if len(existing_primary_key) == 0:
+        # check the primary key index directly, no record has to be read
+        if not self.table.index.key_exists(new_primary_key):
             # primary key does not exist
             value = self.table.insert_record_into_pages(columns)
             # print(f"value of insert :: {value}")
@@ -63,6 +70,42 @@ class Query:
             # don't add existing primary keys
             return False
 
+    """
+    # Insert many records at once, each row holding the columns of one record
+    # Rows are checked like insert, then all accepted rows are written to the table together
+    # Returns a list with True for each inserted row, and False for each skipped row (primary key already in the table or earlier in rows)
+    # Returns False if the insert fails for whatever reason
+    """
+    def insert_many(self, rows:list[list[int]]) -> list[bool]|Literal[False]:
+        primary_key_col = self.table.key
+        if any(len(columns) != self.table.num_columns for columns in rows):
+            raise ValueError("Malformed query: Incorrect number of columns")
+        keys = [columns[primary_key_col] for columns in rows]
+        if None in keys:
+            # can't insert without a primary key
+            raise ValueError("Malformed query: Primary key cannot be None")
+        # the keys of the whole batch are checked against the index at once
+        existing = self.table.index.existing_keys(keys)
+        if not existing and len(set(keys)) == len(keys):
+            # every row is new, the usual case for a bulk load
+            accepted = rows
+            results = [True] * len(rows)
+        else:
+            results = []
+            accepted = []
+            batch_keys = set()
+            for new_primary_key, columns in zip(keys, rows):
+                if new_primary_key in batch_keys or new_primary_key in existing:
+                    # don't add existing primary keys
+                    results.append(False)
+                    continue
+                batch_keys.add(new_primary_key)
+                accepted.append(columns)
+                results.append(True)
+        if accepted and not self.table.insert_records_into_pages(accepted):
+            return False
+        return results
+
 
     """
     # Finds all matching records with specified search key
@@ -91,6 +134,11 @@ class Query:
     def select_version(self, search_key, search_key_index, projected_columns_index, relative_version) -> list[Record]:
         if len(projected_columns_index) != self.table.num_columns:
             raise ValueError("Malformed query: Incorrect number of columns specified for projection")
+        if relative_version == 0 and self.table.planner.plan(search_key_index, search_key, search_key).method == SCAN:
+            # reading every page row is cheaper than reading the matching records one by one
+            self.table.index.record_read(search_key_index)
+            return [Record(record.rid, search_key, record.columns)
+                    for record in self.table.scan(projected_columns_index, {search_key_index: (search_key, search_key)})]
         # find the Record IDs
         rids = self.table.index.locate_version(search_key_index, search_key, relative_version)
         if rids is False or len(rids) == 0:
@@ -99,6 +147,43 @@ class Query:
         records = [self.table.locate_record(rid, search_key, projected_columns_index, relative_version) for rid in rids]
         return records
 
+    """
+    # Finds all matching records for each of many search keys, the same as calling select once per key
+    # :param search_keys: the values you want to search based on
+    # :param search_key_index: the column index you want to search based on
+    # :param projected_columns_index: what columns to return. array of 1 or 0 values (i.e. [0, 0, 1, 1]).
+    # :param columnar: if True, return one NumPy array of values per column instead of Record objects, None for columns not projected
+    # Returns a list of Record objects upon success, grouped by search key in the order of search_keys
+    # With columnar, the arrays hold the values of the same records, in the same order
+    """
+    def select_many(self, search_keys:list[int], search_key_index:int, projected_columns_index:list[bool], columnar:bool=False) -> list[Record]|list[np.ndarray|None]:
+        if len(projected_columns_index) != self.table.num_columns:
+            raise ValueError("Malformed query: Incorrect number of columns specified for projection")
+        # find the Record IDs of all keys at once
+        located = self.table.index.locate_many(search_key_index, search_keys)
+        keys_and_rids = [(search_key, rid) for search_key in search_keys for rid in located[search_key]]
+        # read the records, each page is retrieved once
+        found = self.table.locate_records([rid for _, rid in keys_and_rids], projected_columns_index)
+        if columnar:
+            rows = [columns for columns in found if columns is not None]
+            return [np.fromiter((columns[i] for columns in rows), dtype=np.uint64, count=len(rows)) if projected else None for i, projected in enumerate(projected_columns_index)]
+        return [Record(rid, search_key, columns) for (search_key, rid), columns in zip(keys_and_rids, found) if columns is not None]
+
+    """
+    # Finds all records matching several conditions at once
+    # :param conditions: column index -> the value you want to search for, or an inclusive (low, high) range of values
+    # :param projected_columns_index: what columns to return. array of 1 or 0 values (i.e. [0, 0, 1, 1]).
+    # :param match_all: if True records must match every condition, if False any of them
+    # Returns a list of Record objects upon success, in RID order
+    # Bitmap indexed columns are combined without reading any record
+    """
+    def select_where(self, conditions:dict[int, int|tuple[int, int]], projected_columns_index:list[bool], match_all:bool=True) -> list[Record]:
+        if len(projected_columns_index) != self.table.num_columns:
+            raise ValueError("Malformed query: Incorrect number of columns specified for projection")
+        rids = self.table.index.locate_where(conditions, match_all)
+        found = self.table.locate_records(rids, projected_columns_index)
+        return [Record(rid, self.table.key, columns) for rid, columns in zip(rids, found) if columns is not None]
+
     """
     # Update a record with specified key and columns
     # Returns True if update is successful
@@ -126,11 +211,7 @@ class Query:
         # print(f"rids :: {rid}, new_primary_key :: {new_primary_key}")
         if new_primary_key is not None:
             # check this new primary key is not in the table
-            primary_key_col = self.table.key
-            column_mask = [x==primary_key_col for x in range(len(columns))]
-
-            existing_primary_key = self.select(new_primary_key, primary_key_col, column_mask)
-            if len(existing_primary_key) == 0:
+            if not self.table.index.key_exists(new_primary_key):
                 pass
             else:
                 # update failed because primary key already exists
@@ -143,6 +224,47 @@ class Query:
         else:
             return False
 
+    """
+    # Update many records at once, each update being a (primary key, columns) pair as in update
+    # Updates are checked like update, as if they were run one after the other, then all accepted updates are written to the table together
+    # Returns a list with True for each successful update, and False for each failed update
+    """
+    def update_many(self, updates:list[tuple[int, list[int]]]) -> list[bool]:
+        results = [False] * len(updates)
+        # primary keys changed by earlier updates in the batch -> base RID now holding the key, None if no record holds it anymore
+        moved_keys:dict[int, int|None] = {}
+        accepted = []
+        accepted_numbers = []
+        for n, (primary_key, columns) in enumerate(updates):
+            if len(columns) != self.table.num_columns:
+                # don't allow updates without correct number of columns
+                raise ValueError("Malformed query: Incorrect number of columns")
+            if all(x is None for x in columns):
+                continue
+            # find the base record with primary_key
+            if primary_key in moved_keys:
+                rid = moved_keys[primary_key]
+            else:
+                rids = self.table.index.locate(self.table.key, primary_key)
+                rid = rids[0] if rids else None
+            if rid is None:
+                continue
+            new_primary_key = columns[self.table.key]
+            if new_primary_key is not None:
+                # check this new primary key is not in the table
+                if new_primary_key in moved_keys:
+                    if moved_keys[new_primary_key] is not None:
+                        continue
+                elif self.table.index.key_exists(new_primary_key):
+                    continue
+                moved_keys[primary_key] = None
+                moved_keys[new_primary_key] = rid
+            accepted.append((rid, columns))
+            accepted_numbers.append(n)
+        for n, result in zip(accepted_numbers, self.table.append_tail_records(accepted)):
+            results[n] = result
+        return results
+
 
     """
     :param start_range: int         # Start of the key range to aggregate
@@ -166,31 +288,201 @@ class Query:
     # Returns False if no record exists in the given range
     """
     def sum_version(self, start_range:int, end_range:int, aggregate_column_index:int, relative_version:int) -> int:
+        return self.sum_many_version(start_range, end_range, [aggregate_column_index], relative_version)[0]
+
+
+    """
+    :param start_range: int         # Start of the key range to aggregate
+    :param end_range: int           # End of the key range to aggregate
+    :param aggregate_columns: list  # Indices of the columns to aggregate
+    # Returns the summation of each column over the given range, in the order of aggregate_columns
+    """
+    def sum_many(self, start_range:int, end_range:int, aggregate_columns:list[int]) -> list[int]:
+        return self.sum_many_version(start_range, end_range, aggregate_columns, 0)
+
+
+    """
+    :param start_range: int         # Start of the key range to aggregate
+    :param end_range: int           # End of the key range to aggregate
+    :param aggregate_columns: list  # Indices of the columns to aggregate
+    :param relative_version: the relative version of the records you need to retrieve.
+    # Returns the summation of each column over the given range, in the order of aggregate_columns
+    # Each record is located once, reading every aggregated column, so its tail chain is walked once whatever the number of columns
+    """
+    def sum_many_version(self, start_range:int, end_range:int, aggregate_columns:list[int], relative_version:int) -> list[int]:
         if end_range < start_range:
             tmp = end_range
             end_range = start_range
             start_range = tmp
-        # ask index to find the relevant RIDs
-        # print("searching for rids", start_range, end_range, aggregate_column_index)
-        # using col_num 0 becasue that is the primary key's index
-        rid_set = self.table.index.locate_range(start_range, end_range, 0)
-        if len(rid_set) == 0:
-            return 0
-        # get the attribute values and return the sum
-        # build a all 0 column mask except for the aggregate column
+        sums:dict[int, int] = {}
+        if relative_version == 0:
+            # a sum or covering index holds the latest values, no record has to be read for the columns it covers
+            for column in aggregate_columns:
+                covered_sum = self.table.index.sum_covered(start_range, end_range, column)
+                if covered_sum is not None:
+                    sums[column] = covered_sum
+        # build a all 0 column mask except for the aggregate columns not covered
         column_mask = [0]*self.table.num_columns
-        column_mask[aggregate_column_index] = 1
-        # print("sum", column_mask, aggregate_column_index)
-        sum_value = 0
-        # sum records after applying tails
-        for rid in rid_set:
-            record = self.table.locate_record(rid, 0, column_mask, relative_version)
-            sum_value += record.columns[aggregate_column_index]
-            # print("sum value", sum_value)
-        if type(sum_value) == int:
-            return sum_value
-        else:
-            return 0
+        for column in aggregate_columns:
+            if column not in sums:
+                column_mask[column] = 1
+                sums[column] = 0
+        if any(column_mask) and relative_version == 0 and self.table.planner.plan(self.table.key, start_range, end_range, batched=True).method == SCAN:
+            # most records are in the range, reading every page row is cheaper than reading them one by one
+            self.table.index.record_read(self.table.key)
+            read_columns = [i for i, value in enumerate(column_mask) if value]
+            for _, columns in self.table.scan(column_mask, {self.table.key: (start_range, end_range)}, batch=True):
+                for column in read_columns:
+                    sums[column] += sum(columns[column])
+        elif any(column_mask):
+            # ask index to find the relevant RIDs, col_num 0 is the primary key's index
+            rid_set = self.table.index.locate_range(start_range, end_range, 0)
+            read_columns = [i for i, value in enumerate(column_mask) if value]
+            if relative_version == 0:
+                # the latest versions are read a page at a time
+                found = self.table.locate_records(rid_set, column_mask)
+            else:
+                # sum records after applying tails
+                found = []
+                for rid in rid_set:
+                    record = self.table.locate_record(rid, 0, column_mask, relative_version)
+                    found.append(record.columns if record is not False else None)
+            for columns in found:
+                if columns is None:
+                    continue
+                for column in read_columns:
+                    sums[column] += columns[column]
+        return [sums[column] for column in aggregate_columns]
+
+
+    """
+    :param search_key_index: int    # Column searched on
+    :param start_range: int         # Value searched for, or start of the range of values
+    :param end_range: int           # End of the range of values, None to search for start_range only
+    # Returns how select (a value) or sum (a range, read grouped by page) would find their records, without running the query
+    # The plan is an index lookup, an index range or a scan, with its estimated number of records and cost
+    """
+    def explain(self, search_key_index:int, start_range:int, end_range:int|None=None) -> str:
+        if end_range is None:
+            end_range = start_range
+        if end_range < start_range:
+            start_range, end_range = end_range, start_range
+        return self.table.planner.explain(search_key_index, start_range, end_range, batched=start_range != end_range)
+
+
+    """
+    :param column_index: int        # Column to describe
+    # Returns the column's statistics: live and deleted record counts, min/max, estimated distinct values and equi-depth histogram
+    # The statistics are kept up to date on every write, no record is read
+    """
+    def statistics(self, column_index:int) -> ColumnStatistics:
+        return self.table.statistics.column(column_index)
+
+
+    """
+    :param group_by_col: int        # Column whose values form the groups
+    :param agg_specs: list          # (function, column) pairs, function one of "sum", "count", "min", "max" or "avg",
+                                    # the column is ignored for "count" and may be None
+    :param key_range: tuple         # Optional inclusive (start, end) range of primary keys to aggregate over
+    # Aggregates the latest version of every record in one pass over the base and tail pages
+    # Returns a dict of group value -> list with one result per spec, in the order of agg_specs
+    # Pages are processed a page row at a time, each page's records are split by group before applying the functions
+    """
+    def aggregate(self, group_by_col:int, agg_specs:list[tuple[str, int|None]], key_range:tuple[int, int]|None=None) -> dict[int, list[int|float]]:
+        if not 0 <= group_by_col < self.table.num_columns:
+            raise ValueError(f"Malformed query: Invalid group by column {group_by_col}")
+        for function, column in agg_specs:
+            if function not in AGGREGATE_FUNCTIONS and function not in ("count", "avg"):
+                raise ValueError(f"Malformed query: Unknown aggregate function {function}")
+            if function != "count" and (column is None or not 0 <= column < self.table.num_columns):
+                raise ValueError(f"Malformed query: Invalid column {column} for {function}")
+        # column -> functions needed on it, avg needs the sum
+        needed:dict[int, set[str]] = {}
+        for function, column in agg_specs:
+            if function != "count":
+                needed.setdefault(column, set()).add("sum" if function == "avg" else function)
+        column_mask = [0]*self.table.num_columns
+        column_mask[group_by_col] = 1
+        for column in needed:
+            column_mask[column] = 1
+        predicate = None
+        if key_range is not None:
+            predicate = {self.table.key: (min(key_range), max(key_range))}
+        # group value -> [number of records, {column: {function: value so far}}]
+        groups:dict[int, list] = {}
+        for _, columns in self.table.scan(column_mask, predicate, batch=True):
+            # positions of each group's records in the page row
+            positions:dict[int, list[int]] = {}
+            for i, value in enumerate(columns[group_by_col]):
+                if value in positions:
+                    positions[value].append(i)
+                else:
+                    positions[value] = [i]
+            for group, rows in positions.items():
+                state = groups.get(group)
+                if state is None:
+                    state = groups[group] = [0, {column: {} for column in needed}]
+                state[0] += len(rows)
+                for column, functions in needed.items():
+                    values = [columns[column][i] for i in rows]
+                    totals = state[1][column]
+                    for function in functions:
+                        page_value = AGGREGATE_FUNCTIONS[function](values)
+                        totals[function] = page_value if function not in totals else AGGREGATE_FUNCTIONS[function]((totals[function], page_value))
+        results:dict[int, list[int|float]] = {}
+        for group, (count, totals) in groups.items():
+            results[group] = [count if function == "count"
+                              else totals[column]["sum"] / count if function == "avg"
+                              else totals[column][function]
+                              for function, column in agg_specs]
+        return results
+
+
+    """
+    :param other_table: Table       # Table to join this query's table with
+    :param left_col: int            # Join column of this query's table
+    :param right_col: int           # Join column of other_table
+    :param projection: tuple        # (column mask of this query's table, column mask of other_table) of the columns to output
+    # Returns a generator of joined rows, the projected columns of this table followed by those of other_table
+    # See lstore.join for how the join is planned
+    """
+    def join(self, other_table:Table, left_col:int, right_col:int, projection:tuple[list[int], list[int]]) -> Iterator[list[int]]:
+        return join(self.table, other_table, left_col, right_col, projection)
+
+
+    """
+    :param start_range: int         # Start of the value range to count
+    :param end_range: int           # End of the value range to count
+    :param search_key_index: int    # Column the range is on
+    # Returns the number of records with a latest value of the column in the inclusive range
+    # With the B+ tree index this takes O(log n), whatever the number of records in the range
+    """
+    def count_range(self, start_range:int, end_range:int, search_key_index:int) -> int:
+        if end_range < start_range:
+            start_range, end_range = end_range, start_range
+        return self.table.index.count_range(start_range, end_range, search_key_index)
+
+
+    """
+    :param value: int               # Value to rank
+    :param search_key_index: int    # Column the value is in
+    # Returns the number of records whose latest value of the column is smaller than value
+    """
+    def rank(self, value:int, search_key_index:int) -> int:
+        return self.table.index.rank(value, search_key_index)
+
+
+    """
+    :param k: int                   # Position of the wanted value in sorted order, counting from 0
+    :param search_key_index: int    # Column to select from
+    # Returns the k-th smallest latest value of the column, k = 0 being the minimum and count - 1 the maximum
+    # Returns False if the table has k or fewer records
+    """
+    def select_kth(self, k:int, search_key_index:int) -> int|Literal[False]:
+        try:
+            return self.table.index.select_kth(k, search_key_index)
+        except IndexError:
+            return False
 
 
     """
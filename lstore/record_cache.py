@@ -0,0 +1,99 @@
+"""
+Record Cache
+
+Hot record cache of a table, the latest value of every column of recently read records, keyed by base RID.
+Reading the latest version of a record costs an indirection lookup, then a read of each column from its latest tail record
+(or a walk of the tail chain without cumulative tail records), a cache hit skips all of it.
+    - entries are kept in least recently used order, and the least recently used entry is evicted once the cache is full
+    - the cache holds at most RECORD_CACHE_BUDGET bytes of values, each value counted as FIXED_PARTIAL_RECORD_SIZE bytes
+    - an update of a cached record is applied to its entry in place, a delete evicts it
+    - only Table.locate_record adds entries, batch reads use the entries without adding any so a large read does not flush the cache
+"""
+
+from collections import OrderedDict
+from threading import Lock
+import lstore.config as config
+from lstore.config import FIXED_PARTIAL_RECORD_SIZE
+from lstore.config import debug_print as print
+
+class RecordCache:
+
+    def __init__(self, num_columns: int, budget: int = config.RECORD_CACHE_BUDGET):
+        # number of records that fit in the budget, 0 disables the cache
+        self.capacity: int = budget // (num_columns * FIXED_PARTIAL_RECORD_SIZE)
+        # base RID -> latest value of every column, least recently used first
+        self.rows: OrderedDict[int, list[int]] = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        # readers and writers run on different threads
+        self.lock: Lock = Lock()
+
+    # public methods
+
+    def get(self, rid: int) -> list[int] | None:
+        """
+        Return the cached values of a record and mark it as recently used, or None if it is not cached.
+        NOTE: this is the cache's own list, callers must not modify it
+        """
+        with self.lock:
+            row = self.rows.get(rid)
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.rows.move_to_end(rid)
+            return row
+
+    def peek(self, rid: int) -> list[int] | None:
+        """
+        Return the cached values of a record, or None if it is not cached, without counting a hit or miss or changing its place
+        """
+        return self.rows.get(rid)
+
+    def put(self, rid: int, row: list[int]) -> None:
+        """
+        Cache the latest values of every column of a record, evicting the least recently used records once full
+        """
+        if self.capacity == 0:
+            return
+        with self.lock:
+            self.rows[rid] = list(row)
+            self.rows.move_to_end(rid)
+            while len(self.rows) > self.capacity:
+                self.rows.popitem(last=False)
+
+    def update(self, rid: int, columns: list[int | None]) -> None:
+        """
+        Apply an update to a cached record, columns holds None for the columns not updated
+        """
+        with self.lock:
+            row = self.rows.get(rid)
+            if row is None:
+                return
+            for i, value in enumerate(columns):
+                if value is not None:
+                    row[i] = value
+
+    def evict(self, rid: int) -> None:
+        """
+        Drop a record from the cache, if it is cached
+        """
+        with self.lock:
+            self.rows.pop(rid, None)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.rows.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        """
+        Return the hit and miss counts, the number of cached records and the capacity
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "size": len(self.rows),
+            "capacity": self.capacity,
+        }
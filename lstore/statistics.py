@@ -0,0 +1,354 @@
+"""
+Table Statistics
+
+Statistics of a table's columns, kept up to date by the table on every insert, update and delete, so none needs a scan:
+    - number of live records and of deleted (tombstoned) records
+    - min and max of each column, widened on write but never narrowed, so they bound every value the column ever held
+    - distinct values of each column, estimated with a HyperLogLog sketch of every value written (the primary key's is the row count)
+    - an equi-depth histogram of each column, cut from a reservoir sample of the live records
+The sample holds STATS_SAMPLE_SIZE base records with their latest values, keyed by base RID, so updates and deletes
+of sampled records are applied without reading the old values. Deleted records leave the sample, which new inserts refill.
+Once the sample is full, the number of inserts skipped before the next one enters it is drawn directly (Vitter's algorithm X),
+so a bulk insert draws random numbers only for the records entering the sample.
+Saved as __table_stats__.json next to the table's __table_info__.bin, and rebuilt with one scan if the file is missing.
+"""
+
+import json
+from bisect import bisect_right
+from itertools import islice
+from math import log
+from pathlib import Path
+from random import Random
+import lstore.config as config
+from lstore.config import RID_COLUMN
+from lstore.config import debug_print as print
+
+MASK_64 = (1 << 64) - 1
+# values each sketch remembers having added, so repeats of a low cardinality column's values are not hashed again
+SEEN_LIMIT = 4096
+
+def mix_64(value: int) -> int:
+    """Return a well mixed 64 bit hash of an int (splitmix64 finalizer), ints are their own hash in Python"""
+    z = (value + 0x9E3779B97F4A7C15) & MASK_64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK_64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK_64
+    return z ^ (z >> 31)
+
+
+class HyperLogLog:
+    """
+    Distinct count sketch, 2**precision one byte registers each keeping the longest run of leading zero bits
+    seen in the hashes sent to it. The standard error is about 1.04 / sqrt(2**precision).
+    """
+    def __init__(self, precision: int = config.STATS_HLL_PRECISION, registers: bytearray | None = None):
+        self.precision: int = precision
+        self.registers: bytearray = registers if registers is not None else bytearray(1 << precision)
+        # last estimate, None once a register changed since
+        self.cached: int | None = None
+        # values already added, up to SEEN_LIMIT of them, adding one again cannot change a register
+        self.seen: set[int] = set()
+
+    def add(self, value: int) -> None:
+        h = mix_64(value)
+        bits = 64 - self.precision
+        j = h >> bits
+        # position of the first 1 bit in the rest of the hash
+        rank = bits - (h & ((1 << bits) - 1)).bit_length() + 1
+        if rank > self.registers[j]:
+            self.registers[j] = rank
+            self.cached = None
+
+    def add_many(self, values: list[int]) -> None:
+        """Add many values, the same as calling add on each"""
+        registers = self.registers
+        bits = 64 - self.precision
+        low_mask = (1 << bits) - 1
+        changed = False
+        # repeated values cannot change a register again
+        fresh = set(values)
+        if self.seen:
+            fresh -= self.seen
+        room = SEEN_LIMIT - len(self.seen)
+        if room >= len(fresh):
+            self.seen |= fresh
+        elif room > 0:
+            # remember only as many as fit, seen never holds more than SEEN_LIMIT values
+            self.seen.update(islice(fresh, room))
+        for value in fresh:
+            # mix_64, inlined
+            z = (value + 0x9E3779B97F4A7C15) & MASK_64
+            z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK_64
+            z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK_64
+            h = z ^ (z >> 31)
+            j = h >> bits
+            rank = bits - (h & low_mask).bit_length() + 1
+            if rank > registers[j]:
+                registers[j] = rank
+                changed = True
+        if changed:
+            self.cached = None
+
+    def estimate(self) -> int:
+        if self.cached is None:
+            self.cached = self.__estimate()
+        return self.cached
+
+    def __estimate(self) -> int:
+        #Bias corrected harmonic mean of the registers
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            # few values, linear counting is more accurate
+            return round(m * log(m / zeros))
+        return round(raw)
+
+
+class ColumnStatistics:
+    """
+    Snapshot of the statistics of one column
+    """
+    def __init__(self, row_count: int, tombstones: int, distinct: int, min_value: int | None, max_value: int | None,
+                 histogram: list[tuple[int, int, float]]):
+        self.row_count: int = row_count
+        self.tombstones: int = tombstones
+        self.distinct: int = distinct
+        # None while no record was written
+        self.min_value: int | None = min_value
+        self.max_value: int | None = max_value
+        # (low, high, number of records) buckets holding about the same number of records, in increasing order
+        self.histogram: list[tuple[int, int, float]] = histogram
+
+    def estimate_rows(self, start_val: int, end_val: int) -> float:
+        """Return the estimated number of records with a value in [start_val, end_val]"""
+        if self.row_count == 0 or self.min_value is None or end_val < self.min_value or self.max_value < start_val:
+            return 0
+        if start_val == end_val:
+            return self.row_count / max(1, min(self.distinct, self.row_count))
+        if not self.histogram:
+            covered = min(end_val, self.max_value) - max(start_val, self.min_value) + 1
+            return self.row_count * covered / (self.max_value - self.min_value + 1)
+        # values are taken as spread evenly within each bucket
+        rows = 0.0
+        for low, high, count in self.histogram:
+            if high < start_val or end_val < low:
+                continue
+            rows += count * (min(end_val, high) - max(start_val, low) + 1) / (high - low + 1)
+        return rows
+
+
+class TableStatistics:
+
+    def __init__(self, num_columns: int, key: int | None = None, sample_size: int = config.STATS_SAMPLE_SIZE, buckets: int = config.STATS_HISTOGRAM_BUCKETS):
+        self.num_columns: int = num_columns
+        # primary key values of live records are unique, so the key column needs no sketch, its distinct count is the row count
+        self.key: int | None = key
+        self.sample_size: int = sample_size
+        self.buckets: int = buckets
+        self.__reset()
+
+    # public methods
+
+    def insert(self, rid: int, columns: list[int]) -> None:
+        """
+        Count a new base record
+        """
+        self.insert_many([rid], [columns])
+
+    def insert_many(self, rids: list[int], rows: list[list[int]]) -> None:
+        """
+        Count many new base records, each column's min/max and sketch are updated once for the whole batch
+        """
+        if not rows:
+            return
+        for i, values in enumerate(zip(*rows)):
+            self.__widen_column(i, values)
+        n = 0
+        # fill the sample
+        while n < len(rows) and len(self.sample_rids) < self.sample_size:
+            self.row_count += 1
+            self.__sample_add(rids[n], rows[n])
+            n += 1
+        # then jump from one record entering the sample to the next
+        first = self.row_count - n
+        while n < len(rows) and self.sample_size > 0:
+            if self.next_sample is None:
+                self.next_sample = self.__next_sample(first + n)
+            position = self.next_sample - first - 1
+            if position >= len(rows):
+                break
+            # keep each live record in the sample with the same probability, replacing a random sampled record
+            j = self.random.randrange(self.sample_size)
+            del self.sample_positions[self.sample_rids[j]]
+            self.sample_rids[j] = rids[position]
+            self.sample_rows[j] = list(rows[position])
+            self.sample_positions[rids[position]] = j
+            self.histograms = {}
+            n = position + 1
+            self.next_sample = None
+        self.row_count = first + len(rows)
+
+    def update(self, rid: int, columns: list[int | None]) -> None:
+        """
+        Count an update of a base record, columns holds None for the columns not updated
+        """
+        self.__widen(columns)
+        position = self.sample_positions.get(rid)
+        if position is not None:
+            row = self.sample_rows[position]
+            for i, value in enumerate(columns):
+                if value is not None:
+                    row[i] = value
+            self.histograms = {}
+
+    def delete(self, rid: int) -> None:
+        """
+        Count the deletion of a base record
+        """
+        self.row_count -= 1
+        self.tombstones += 1
+        self.next_sample = None
+        position = self.sample_positions.pop(rid, None)
+        if position is not None:
+            # move the last sampled record into the freed position
+            last_rid = self.sample_rids.pop()
+            last_row = self.sample_rows.pop()
+            if last_rid != rid:
+                self.sample_rids[position] = last_rid
+                self.sample_rows[position] = last_row
+                self.sample_positions[last_rid] = position
+            self.histograms = {}
+
+    def column(self, column_num: int) -> ColumnStatistics:
+        """
+        Return the statistics of a column
+        """
+        distinct = self.row_count if column_num == self.key else self.sketches[column_num].estimate()
+        return ColumnStatistics(self.row_count, self.tombstones, distinct,
+                                self.min_values[column_num], self.max_values[column_num], self.histogram(column_num))
+
+    def histogram(self, column_num: int) -> list[tuple[int, int, float]]:
+        """
+        Return the equi-depth histogram of a column, (low, high, estimated number of records) buckets in increasing order.
+        Bucket boundaries are quantiles of the sample, each bucket's count scales its share of the sample to the row count.
+        """
+        if column_num not in self.histograms:
+            values = sorted(row[column_num] for row in self.sample_rows)
+            histogram = []
+            if values:
+                scale = self.row_count / len(values)
+                start = 0
+                for b in range(1, self.buckets + 1):
+                    end = len(values) * b // self.buckets
+                    if end <= start:
+                        continue
+                    # keep equal values in one bucket
+                    end = bisect_right(values, values[end - 1], lo=end - 1)
+                    histogram.append((values[start], values[end - 1], (end - start) * scale))
+                    start = end
+                    if start == len(values):
+                        break
+            self.histograms[column_num] = histogram
+        return self.histograms[column_num]
+
+    def rebuild(self, table: "Table") -> None:
+        """
+        Gather the statistics again with one scan of the table's latest values
+        """
+        self.__reset()
+        for rids, columns in table.scan([1] * self.num_columns, batch=True):
+            self.insert_many(rids, [list(row) for row in zip(*columns)])
+        # every base record not live is deleted
+        base_records = 0
+        for page_num in range(table.current_base_page_number + 1):
+            rid_page = table.page_directory.retrieve_page(RID_COLUMN, False, page_num)
+            base_records += rid_page.num_records if rid_page is not None else 0
+        self.tombstones = base_records - self.row_count
+
+    def save(self, path: str) -> None:
+        """
+        Path goes up to table_name
+        """
+        stats = {
+            "row_count": self.row_count,
+            "tombstones": self.tombstones,
+            "min_values": self.min_values,
+            "max_values": self.max_values,
+            "sketches": [sketch.registers.hex() for sketch in self.sketches],
+            "sample_rids": self.sample_rids,
+            "sample_rows": self.sample_rows,
+        }
+        Path(path, "__table_stats__.json").write_text(json.dumps(stats))
+
+    def load(self, path: str) -> bool:
+        """
+        Path goes up to table_name, returns False if no statistics were saved for the table
+        """
+        stats_path = Path(path, "__table_stats__.json")
+        if not stats_path.exists():
+            return False
+        stats = json.loads(stats_path.read_text())
+        self.row_count = stats["row_count"]
+        self.tombstones = stats["tombstones"]
+        self.min_values = stats["min_values"]
+        self.max_values = stats["max_values"]
+        self.sketches = [HyperLogLog(registers=bytearray.fromhex(registers)) for registers in stats["sketches"]]
+        self.sample_rids = stats["sample_rids"]
+        self.sample_rows = stats["sample_rows"]
+        self.sample_positions = {rid: i for i, rid in enumerate(self.sample_rids)}
+        self.histograms = {}
+        return True
+
+    # private methods
+
+    def __reset(self) -> None:
+        #Statistics of an empty table
+        self.row_count: int = 0
+        self.tombstones: int = 0
+        self.min_values: list[int | None] = [None] * self.num_columns
+        self.max_values: list[int | None] = [None] * self.num_columns
+        self.sketches: list[HyperLogLog] = [HyperLogLog() for _ in range(self.num_columns)]
+        # reservoir sample of live base records: RIDs, their latest values, and each RID's position in the lists
+        self.sample_rids: list[int] = []
+        self.sample_rows: list[list[int]] = []
+        self.sample_positions: dict[int, int] = {}
+        self.random: Random = Random(self.num_columns)
+        # column -> histogram cut from the sample, dropped whenever the sample changes
+        self.histograms: dict[int, list[tuple[int, int, float]]] = {}
+        # once the sample is full, the row count at which the next insert enters it, None until drawn
+        self.next_sample: int | None = None
+
+    def __widen(self, columns: list[int | None]) -> None:
+        #Add written values to the sketches and min/max, None values were not written
+        for i, value in enumerate(columns):
+            if value is not None:
+                self.__widen_column(i, (value,))
+
+    def __widen_column(self, column_num: int, values: tuple[int, ...]) -> None:
+        #Add values written to a column to its sketch and min/max
+        if column_num != self.key:
+            self.sketches[column_num].add_many(values)
+        low, high = min(values), max(values)
+        if self.min_values[column_num] is None or low < self.min_values[column_num]:
+            self.min_values[column_num] = low
+        if self.max_values[column_num] is None or high > self.max_values[column_num]:
+            self.max_values[column_num] = high
+
+    def __next_sample(self, seen: int) -> int:
+        #Draw the row count at which the next insert enters the full sample, after seen records (algorithm X)
+        #record t + 1 is left out with probability (t + 1 - sample_size) / (t + 1)
+        v = self.random.random()
+        t = seen
+        left_out = (t + 1 - self.sample_size) / (t + 1)
+        while left_out > v:
+            t += 1
+            left_out *= (t + 1 - self.sample_size) / (t + 1)
+        return t + 1
+
+    def __sample_add(self, rid: int, columns: list[int]) -> None:
+        #Add a record at the end of the sample
+        self.sample_positions[rid] = len(self.sample_rids)
+        self.sample_rids.append(rid)
+        self.sample_rows.append(list(columns))
+        self.histograms = {}
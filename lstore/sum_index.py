@@ -0,0 +1,170 @@
+"""
+Sum Index
+
+Range sums of chosen columns over the primary key, kept in Fenwick trees (binary indexed trees) so Query.sum takes O(log n).
+Each primary key in the trees has a slot, slots are in key order, and each summed column has a Fenwick tree over the slots.
+    - keys larger than every key with a slot get a new slot at the end, in O(log n), like a counting primary key
+    - other keys wait in a small sorted pending list, summed on their own by range queries
+    - deleted keys leave a dead slot holding 0, which is reused if the key is inserted again
+The trees are rebuilt in O(n), taking in the pending keys and dropping the dead slots, once there are more of either
+than INDEX_SUM_MIN_PENDING or the square root of the number of slots.
+Created with New_Index.create_sum_index, and kept up to date by New_Index on insert, update and delete.
+"""
+
+from typing import List, Tuple
+from bisect import bisect_left, bisect_right, insort
+from math import isqrt
+from lstore.config import INDEX_SUM_MIN_PENDING
+from lstore.config import debug_print as print
+from lstore.bplus_tree import RID
+
+class SumIndex:
+
+    def __init__(self, key_column: int, columns: Tuple[int, ...]):
+        self.key_column: int = key_column
+        self.columns: Tuple[int, ...] = tuple(columns)
+        # primary key of each slot, sorted
+        self.keys: List[int] = []
+        # column -> value in each slot, and column -> Fenwick tree over the slots (1-based, tree[0] is unused)
+        self.values: dict[int, List[int]] = {column: [] for column in self.columns}
+        self.trees: dict[int, List[int]] = {column: [0] for column in self.columns}
+        # slots of deleted keys
+        self.dead: set[int] = set()
+        # keys not in the trees yet, sorted, and their values by column
+        self.pending_keys: List[int] = []
+        self.pending: dict[int, dict[int, int]] = {}
+        # current primary key of each RID, so updates and deletes do not need to read the record
+        self.rid_key_map: dict[RID, int] = {}
+
+    # public methods
+
+    def covers(self, column: int) -> bool:
+        """Return True if range sums of the column are kept in the index"""
+        return column in self.columns
+
+    def insert(self, rid: RID, values: List[int]) -> None:
+        """Add a record, values holds every data column of the record"""
+        self.__add(values[self.key_column], {column: values[column] for column in self.columns})
+        self.rid_key_map[rid] = values[self.key_column]
+
+    def update(self, rid: RID, values: List[int | None]) -> None:
+        """Bring a record's sums up to date, values holds every data column of the record, None for columns not updated"""
+        key = self.rid_key_map[rid]
+        new_key = values[self.key_column]
+        if new_key is not None and new_key != key:
+            # the record moves to its new place in key order
+            current = self.__remove(key)
+            self.__add(new_key, {column: current[column] if values[column] is None else values[column] for column in self.columns})
+            self.rid_key_map[rid] = new_key
+            return
+        for column in self.columns:
+            if values[column] is not None:
+                self.__set(key, column, values[column])
+
+    def delete(self, rid: RID) -> bool:
+        """Remove a record, return True if it was in the index, False otherwise"""
+        key = self.rid_key_map.pop(rid, None)
+        if key is None:
+            return False
+        self.__remove(key)
+        return True
+
+    def sum_range(self, start_val: int, end_val: int, column: int) -> int:
+        """Return the sum of the column over records with a primary key in [start_val, end_val]"""
+        total = self.__prefix_sum(column, bisect_right(self.keys, end_val)) - self.__prefix_sum(column, bisect_left(self.keys, start_val))
+        start = bisect_left(self.pending_keys, start_val)
+        end = bisect_right(self.pending_keys, end_val)
+        for key in self.pending_keys[start:end]:
+            total += self.pending[key][column]
+        return total
+
+    def rebuild(self) -> None:
+        """
+        Rebuild the trees from the live slots and the pending keys, leaving no dead slot and no pending key.
+        """
+        live = [(key, {column: self.values[column][i] for column in self.columns}) for i, key in enumerate(self.keys) if i not in self.dead]
+        merged = sorted(live + list(self.pending.items()), key=lambda item: item[0])
+        self.keys = [key for key, _ in merged]
+        for column in self.columns:
+            self.values[column] = [values[column] for _, values in merged]
+            # linear time Fenwick tree construction, every node passes its sum on to its parent
+            tree = [0] + self.values[column]
+            for i in range(1, len(tree)):
+                parent = i + (i & -i)
+                if parent < len(tree):
+                    tree[parent] += tree[i]
+            self.trees[column] = tree
+        self.dead = set()
+        self.pending_keys = []
+        self.pending = {}
+
+    # private methods
+
+    def __add(self, key: int, values: dict[int, int]) -> None:
+        #Add a key with its values, to a new slot at the end, its dead slot, or the pending keys
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            # the key was deleted before, reuse its slot
+            self.dead.discard(i)
+            for column in self.columns:
+                self.__add_at(column, i, values[column] - self.values[column][i])
+            return
+        if i == len(self.keys):
+            self.keys.append(key)
+            for column in self.columns:
+                self.__append(column, values[column])
+            return
+        insort(self.pending_keys, key)
+        self.pending[key] = values
+        self.__check_rebuild()
+
+    def __remove(self, key: int) -> dict[int, int]:
+        #Remove a key, returning its values
+        if key in self.pending:
+            del self.pending_keys[bisect_left(self.pending_keys, key)]
+            return self.pending.pop(key)
+        i = bisect_left(self.keys, key)
+        values = {column: self.values[column][i] for column in self.columns}
+        for column in self.columns:
+            self.__add_at(column, i, -values[column])
+        self.dead.add(i)
+        self.__check_rebuild()
+        return values
+
+    def __set(self, key: int, column: int, value: int) -> None:
+        #Set the value of a column for a key
+        if key in self.pending:
+            self.pending[key][column] = value
+            return
+        i = bisect_left(self.keys, key)
+        self.__add_at(column, i, value - self.values[column][i])
+
+    def __add_at(self, column: int, i: int, delta: int) -> None:
+        #Add delta to the value in slot i
+        self.values[column][i] += delta
+        tree = self.trees[column]
+        i += 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def __append(self, column: int, value: int) -> None:
+        #Add a slot at the end, its tree node sums the values of the slots it covers
+        self.values[column].append(value)
+        tree = self.trees[column]
+        i = len(tree)
+        tree.append(value + self.__prefix_sum(column, i - 1) - self.__prefix_sum(column, i - (i & -i)))
+
+    def __prefix_sum(self, column: int, count: int) -> int:
+        #Sum of the values in the first count slots
+        tree = self.trees[column]
+        total = 0
+        while count > 0:
+            total += tree[count]
+            count -= count & -count
+        return total
+
+    def __check_rebuild(self) -> None:
+        #Rebuild once the pending keys or dead slots are many compared to the slots
+        if len(self.pending) + len(self.dead) > max(INDEX_SUM_MIN_PENDING, isqrt(len(self.keys))):
+            self.rebuild()
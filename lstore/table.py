@@ -1,14 +1,19 @@
 from lstore.index import Index
 from lstore.new_index import New_Index
 from lstore.placeholder_index import DumbIndex
+from lstore.planner import Planner
+from lstore.statistics import TableStatistics
+from lstore.record_cache import RecordCache
+from lstore.version_arrays import VersionArrays
 from lstore.page_directory import PageDirectory
 from time import time_ns
 from lstore.page import Page
-from typing import List, Literal, Tuple
+from typing import List, Literal, Tuple, Callable, Iterator
 from pathlib import Path
 from lstore.config import *
 from lstore.config import debug_print as print
 import copy
+from threading import RLock
 from lstore.lock_manager import LockManager
 
 # graphing
@@ -83,11 +88,21 @@ class Table:
                                                 False,
                                                 self.current_base_page_number)
 
+        # held for every write to the table's pages, lets an online index build read consistent records while writes continue
+        self.write_lock = RLock()
         if not self.use_dumbindex:
             self.index = New_Index(self, use_bplus=self.use_bplus, use_hash=self.use_hash, degree=self.bplus_degree)
         else:
             self.index = DumbIndex(self)
         self.dumb_index = DumbIndex(self)
+        # kept up to date on every write, read by the planner
+        self.statistics = TableStatistics(num_columns, key)
+        # latest values of recently read records
+        self.record_cache = RecordCache(num_columns)
+        # tail RIDs of records read far back in their history
+        self.version_arrays = VersionArrays()
+        # chooses between the index and a scan for select and sum
+        self.planner = Planner(self)
 
         # attributes for merge algorithm
         self.merge_set: set = set()
@@ -105,20 +120,72 @@ class Table:
         Outputs:
             - returns True on a successful insert, False otherwise
         """
-        # TODO return False on a failed insert
-        # make new Base RID
-        # get writable base page
-        page = self.get_writable_page(RID_COLUMN, False)
-        # get info for new rid
-        offset = page.num_records
-        page_num = self.current_base_page_number
-        # create the new rid
-        new_rid = coords_to_rid(False, page_num, offset)
-        # print(f"    insert_record_into_pages: base RID{new_rid} page#{page_num} offset{offset} cols{columns} page object{page}")
-        # write metadata, put RID in both RID_COLUMN and INDIRECTION_COLUMN
-        # write metadata and data columns
-        success_state = self.write_new_record(new_rid, new_rid, [0]*self.num_columns, columns, page, False)
-        return success_state
+        with self.write_lock:
+            # TODO return False on a failed insert
+            # make new Base RID
+            # get writable base page
+            page = self.get_writable_page(RID_COLUMN, False)
+            # get info for new rid
+            offset = page.num_records
+            page_num = self.current_base_page_number
+            # create the new rid
+            new_rid = coords_to_rid(False, page_num, offset)
+            # print(f"    insert_record_into_pages: base RID{new_rid} page#{page_num} offset{offset} cols{columns} page object{page}")
+            # write metadata, put RID in both RID_COLUMN and INDIRECTION_COLUMN
+            # write metadata and data columns
+            success_state = self.write_new_record(new_rid, new_rid, [0]*self.num_columns, columns, page, False)
+            self.index.record_changed(new_rid)
+            self.index.record_write([True] * self.num_columns)
+            self.statistics.insert(new_rid, columns)
+            return success_state
+
+    def insert_records_into_pages(self, rows:list[list[int]]) -> bool:
+        """
+        Inserts many new base records at once, the same as calling insert_record_into_pages on each row in order.
+        Each page row is filled with one write per column, all records get the same created timestamp,
+        and each index is updated once per page row.
+
+        Inputs:
+            - rows, the data of each new record, each must be the same length as the table's data columns
+        Outputs:
+            - returns True on a successful insert, False otherwise
+        """
+        with self.write_lock:
+            # one timestamp for the whole batch
+            created = time_ns() - self.ref_time
+            timestamp = int_to_bytearray(created, self.record_size)
+            # base records have an all 0 schema encoding
+            schema = schema_to_bytearray([0]*self.num_columns, self.record_size)
+            start = 0
+            while start < len(rows):
+                # get writable base page, this moves to a new page row if the current one is full
+                rid_page = self.get_writable_page(RID_COLUMN, False)
+                page_num = self.current_base_page_number
+                offset = rid_page.num_records
+                # fill the rest of the page row
+                batch = rows[start:start + rid_page.remaining_capacity()]
+                # the offset is the low part of the RID, so RIDs in a page row are consecutive
+                first_rid = coords_to_rid(False, page_num, offset)
+                new_rids = list(range(first_rid, first_rid + len(batch)))
+                encoded_rids = ints_to_bytearray(new_rids, self.record_size)
+                # write metadata, put RID in both RID_COLUMN and INDIRECTION_COLUMN, same columns as write_new_record
+                # the zone map of each page is widened by the values' range, known without decoding them again
+                rid_zone = (new_rids[0], new_rids[-1])
+                rid_page.write_many(encoded_rids, rid_zone)
+                self.get_writable_page(INDIRECTION_COLUMN, False).write_many(encoded_rids, rid_zone)
+                self.get_writable_page(SCHEMA_ENCODING_COLUMN, False).write_many(schema * len(batch), (0, 0))
+                self.get_writable_page(CREATED_TIME_COLUMN, False).write_many(timestamp * len(batch), (created, created))
+                # write data columns
+                for i in range(self.num_columns):
+                    values = [columns[i] for columns in batch]
+                    self.get_writable_page(i + NUM_METADATA_COLUMNS, False).write_many(ints_to_bytearray(values, self.record_size), (min(values), max(values)))
+                    self.index.add_records_to_index(i, values, new_rids)
+                self.index.add_records_to_record_indices(new_rids, batch)
+                self.index.record_changed(*new_rids)
+                self.statistics.insert_many(new_rids, batch)
+                start += len(batch)
+            self.index.record_write([True] * self.num_columns, len(rows))
+            return True
 
     def append_tail_record(self, base_RID:int, columns:list[int]) -> bool:
         """
@@ -131,55 +198,186 @@ class Table:
         Outputs:
             - True on a successful update, False otherwise
         """
-        # append new tail record with *columns, and indirection to other tail record's RID
-        # find the most recent tail record from base record's indirection
-        # check tail != base, or that Base Records default to their RIDs in the INDIRECTION_COLUMN instead of a null value
-        old_tail_rid = self.get_partial_record(base_RID, INDIRECTION_COLUMN)
-        # check if this record is deleted
-        if old_tail_rid == RID_TOMBSTONE_VALUE:
-            return False
+        with self.write_lock:
+            # append new tail record with *columns, and indirection to other tail record's RID
+            # find the most recent tail record from base record's indirection
+            # check tail != base, or that Base Records default to their RIDs in the INDIRECTION_COLUMN instead of a null value
+            old_tail_rid = self.get_partial_record(base_RID, INDIRECTION_COLUMN)
+            # check if this record is deleted
+            if old_tail_rid == RID_TOMBSTONE_VALUE:
+                return False
+            # columns given a new value, before cumulative tail records fill in the rest
+            written_columns = [value is not None for value in columns]
+            new_values = columns
+            # the B+ tree links each new value to the previous one, read the record before it changes
+            old_values = self.locate_record(base_RID, self.key, [1]*self.num_columns).columns if self.use_bplus else None
+
+            if self.cumulative_tails:
+                # cumulative tail records store the current version of the record and no lookback is needed
+                schema_encoding = [1]*len(columns)
+                # set None values in columns to last record's values
+                new_columns = [0]*len(columns)
+                for i, value in enumerate(columns):
+                    if value is None:
+                        # this part is unique to the cumulative records
+                        new_columns[i] = self.get_partial_record(old_tail_rid, i + NUM_METADATA_COLUMNS)
+                    else:
+                        new_columns[i] = columns[i]
+                columns = new_columns
+            else:
+                schema_encoding = [1 if x is not None else 0 for x in columns]
+            # get the page to append the new tail record rid
+            page = self.get_writable_page(RID_COLUMN, True)
+            # get info for new rid
+            offset = page.num_records
+            page_num = self.current_tail_page_number
+            # create the new rid
+            new_tail_rid = coords_to_rid(True, page_num, offset)
+            # print(f"    append_tail_record: tail RID{new_tail_rid} page#{page_num} offset{offset} cols{columns} page object{page}")
+            # write metadata and data columns
+            success_state = self.write_new_record(new_tail_rid, old_tail_rid, schema_encoding, columns, page, True)
+
+            # set base record's indirection to new tail's RID
+            _, page_num, offset = rid_to_coords(base_RID)
+            base_page = self.page_directory.retrieve_page(INDIRECTION_COLUMN, False, page_num)
+
+            # mark page info (its page num and col num) for merging since we've just updated it
+            # sidenote: the column numbers here are relative to data columns, i.e. 0 is the first data column
+            # for col_num in (num for num, col_val in enumerate(columns) if col_val is not None):
+            #     self.__add_to_merge_set((page_num, col_num))
+
+            assert base_page is not None
+            base_page.overwrite_direct(int_to_bytearray(new_tail_rid, self.record_size), offset, new_tail_rid)
+            # only the indexed columns given a new value are updated, the values are already known
+            self.__update_indices(base_RID, new_values, old_values)
+            self.index.record_changed(base_RID)
+            self.index.record_write(written_columns)
+            self.statistics.update(base_RID, new_values)
+            self.record_cache.update(base_RID, new_values)
+            self.version_arrays.append(base_RID, new_tail_rid)
+            return success_state
+
+    def append_tail_records(self, updates:list[tuple[int, list[int]]]) -> list[bool]:
+        """
+        Appends a tail record for each (base RID, columns) update, the same as calling append_tail_record on each update in order.
+        Updates are grouped by base page so each base indirection page is read and written once, tail records are written
+        one page row at a time with one write per column, and all tail records get the same created timestamp.
+        Values of a record updated earlier in the batch are kept in memory instead of being read back from the pages.
 
-        if self.cumulative_tails:
-            # cumulative tail records store the current version of the record and no lookback is needed
-            schema_encoding = [1]*len(columns)
-            # set None values in columns to last record's values
-            new_columns = [0]*len(columns)
-            for i, value in enumerate(columns):
-                if value is None:
-                    # this part is unique to the cumulative records
-                    new_columns[i] = self.get_partial_record(old_tail_rid, i + NUM_METADATA_COLUMNS)
+        Inputs:
+            - updates, (base RID, columns) pairs, None values should be placed in columns without an update
+        Outputs:
+            - a list with True for each successful update, and False for each update of a deleted record
+        """
+        with self.write_lock:
+            results = [False] * len(updates)
+            created = time_ns() - self.ref_time
+            # sorting is stable, so updates of the same record stay in order
+            order = sorted(range(len(updates)), key=lambda n: rid_to_coords(updates[n][0])[1])
+            # latest tail RID and latest values of the records updated so far in this batch
+            latest_rids:dict[int, int] = {}
+            latest_values:dict[int, list[int]] = {}
+            # written columns of each update -> number of updates, reported once the batch is applied
+            written:dict[tuple[bool, ...], int] = {}
+            # tail records waiting to be written to the current tail page row: (indirection, schema, columns)
+            pending:list[tuple[int, list[int], list[int]]] = []
+            capacity = 0
+            first_tail_rid = 0
+            indir_page = None
+            indir_page_num = -1
+            for n in order:
+                base_RID, columns = updates[n]
+                _, page_num, offset = rid_to_coords(base_RID)
+                if base_RID in latest_rids:
+                    old_tail_rid = latest_rids[base_RID]
                 else:
-                    new_columns[i] = columns[i]
-            columns = new_columns
-        else:
-            schema_encoding = [1 if x is not None else 0 for x in columns]
-        # get the page to append the new tail record rid
-        page = self.get_writable_page(RID_COLUMN, True)
-        # get info for new rid
-        offset = page.num_records
-        page_num = self.current_tail_page_number
-        # create the new rid
-        new_tail_rid = coords_to_rid(True, page_num, offset)
-        # print(f"    append_tail_record: tail RID{new_tail_rid} page#{page_num} offset{offset} cols{columns} page object{page}")
-        # write metadata and data columns
-        success_state = self.write_new_record(new_tail_rid, old_tail_rid, schema_encoding, columns, page, True, base_RID)
-
-        # set base record's indirection to new tail's RID
-        _, page_num, offset = rid_to_coords(base_RID)
-        base_page = self.page_directory.retrieve_page(INDIRECTION_COLUMN, False, page_num)
-
-        # mark page info (its page num and col num) for merging since we've just updated it
-        # sidenote: the column numbers here are relative to data columns, i.e. 0 is the first data column
-        # for col_num in (num for num, col_val in enumerate(columns) if col_val is not None):
-        #     self.__add_to_merge_set((page_num, col_num))
-
-        assert base_page is not None
-        base_page.overwrite_direct(int_to_bytearray(new_tail_rid, self.record_size), offset)
-        for i in range(len(columns)):
-            self.index.indices[i].update(self.get_partial_record(new_tail_rid, i + NUM_METADATA_COLUMNS), base_RID)
-        return success_state
-
-    def write_new_record(self, RID:int, indirection:int, schema:list[int], columns:list[int], rid_page:Page, is_tail:bool, base_rid:int=0) -> bool:
+                    if page_num != indir_page_num:
+                        indir_page = self.page_directory.retrieve_page(INDIRECTION_COLUMN, False, page_num)
+                        indir_page_num = page_num
+                    old_tail_rid = bytearray_to_int(indir_page.retrieve_direct(offset))
+                # check if this record is deleted
+                if old_tail_rid == RID_TOMBSTONE_VALUE:
+                    continue
+                old_values = latest_values.get(base_RID)
+                if old_values is None and (self.cumulative_tails or self.use_bplus):
+                    # the record's values before this batch, read from its latest tail record (or base record)
+                    old_values = self.locate_record(base_RID, self.key, [1]*self.num_columns).columns
+                if self.cumulative_tails:
+                    schema_encoding = [1]*self.num_columns
+                    new_columns = [old_values[i] if value is None else value for i, value in enumerate(columns)]
+                else:
+                    schema_encoding = [0 if value is None else 1 for value in columns]
+                    new_columns = [0 if value is None else value for value in columns]
+                if old_values is not None:
+                    latest_values[base_RID] = [old_values[i] if value is None else value for i, value in enumerate(columns)]
+                if capacity == 0:
+                    # write the full page row and start the next one
+                    self.__write_tail_records(pending, first_tail_rid, created)
+                    pending = []
+                    rid_page = self.get_writable_page(RID_COLUMN, True)
+                    capacity = rid_page.remaining_capacity()
+                    first_tail_rid = coords_to_rid(True, self.current_tail_page_number, rid_page.num_records)
+                new_tail_rid = first_tail_rid + len(pending)
+                pending.append((old_tail_rid, schema_encoding, new_columns))
+                capacity -= 1
+                latest_rids[base_RID] = new_tail_rid
+                self.__update_indices(base_RID, columns, old_values)
+                written_columns = tuple(value is not None for value in columns)
+                written[written_columns] = written.get(written_columns, 0) + 1
+                self.statistics.update(base_RID, columns)
+                self.record_cache.update(base_RID, columns)
+                self.version_arrays.append(base_RID, new_tail_rid)
+                results[n] = True
+            self.__write_tail_records(pending, first_tail_rid, created)
+            # set each base record's indirection to its last new tail's RID, one base page at a time
+            by_base_page:dict[int, list[tuple[int, int]]] = {}
+            for base_RID, new_tail_rid in latest_rids.items():
+                _, page_num, offset = rid_to_coords(base_RID)
+                by_base_page.setdefault(page_num, []).append((offset, new_tail_rid))
+            for page_num, entries in by_base_page.items():
+                base_page = self.page_directory.retrieve_page(INDIRECTION_COLUMN, False, page_num)
+                assert base_page is not None
+                for offset, new_tail_rid in entries:
+                    base_page.overwrite_direct(int_to_bytearray(new_tail_rid, self.record_size), offset, new_tail_rid)
+            self.index.record_changed(*latest_rids)
+            # the index advisor may build an index, so only once every tail record and indirection is written
+            for written_columns, count in written.items():
+                self.index.record_write(list(written_columns), count)
+            return results
+
+    def __write_tail_records(self, records:list[tuple[int, list[int], list[int]]], first_tail_rid:int, created:int) -> None:
+        """
+        Writes (indirection, schema, columns) tail records to the current tail page row, which must have room for all of them.
+        The records get consecutive RIDs starting at first_tail_rid and the created time created. Columns not in a record's schema are written as 0.
+        """
+        if not records:
+            return
+        def write(column:int, values:list[int]) -> None:
+            # the zone map is widened by the values' range, known without decoding them again
+            self.get_writable_page(column, True).write_many(ints_to_bytearray(values, self.record_size), (min(values), max(values)))
+        write(RID_COLUMN, list(range(first_tail_rid, first_tail_rid + len(records))))
+        write(INDIRECTION_COLUMN, [record[0] for record in records])
+        write(SCHEMA_ENCODING_COLUMN, [schema_to_int(record[1]) for record in records])
+        write(CREATED_TIME_COLUMN, [created] * len(records))
+        for i in range(self.num_columns):
+            write(i + NUM_METADATA_COLUMNS, [record[2][i] for record in records])
+
+    def __update_indices(self, base_RID:int, columns:list[int], old_values:list[int]|None) -> None:
+        """
+        Updates the indices for one tail record of the base record, only indexed columns given a new value (and indices over whole records) are touched.
+        old_values are the record's values before the tail record, they are only needed by B+ tree indices.
+        """
+        if self.use_dumbindex:
+            return
+        # keep the record's current values as its previous version in the index, before the index is updated
+        self.index.save_version(base_RID)
+        for i, value in enumerate(columns):
+            if value is None or self.index.indices[i] is None:
+                continue
+            self.index.update_record_in_index(i, old_values[i] if old_values is not None else None, base_RID, value)
+        self.index.update_record_in_record_indices(base_RID, columns)
+
+    def write_new_record(self, RID:int, indirection:int, schema:list[int], columns:list[int], rid_page:Page, is_tail:bool) -> bool:
         """
         Helper function for writing a new record
 
@@ -199,13 +397,13 @@ class Table:
         # print(f"## WRITE:: RID{RID}, col{columns}")
         # write the metadata columns
         write_cols:list[int] = self.metadata_cols[1:]
-        write_vals:list[bytearray] = [int_to_bytearray(indirection, self.record_size), schema_to_bytearray(schema, self.record_size), int_to_bytearray(timestamp, self.record_size)]
+        write_vals:list[int] = [indirection, schema_to_int(schema), timestamp]
         # write RID
-        rid_page.write_direct(int_to_bytearray(RID, self.record_size))
+        rid_page.write_direct(int_to_bytearray(RID, self.record_size), RID)
         # the rid page number is needed for RID generation, so it is redundant to include writing the rid in the for loop
         for col_num, val_at_col in zip(write_cols, write_vals):
             page = self.get_writable_page(col_num, is_tail)
-            page.write_direct(val_at_col)
+            page.write_direct(int_to_bytearray(val_at_col, self.record_size), val_at_col)
 
         # write data columns
         for i, col in enumerate(columns):
@@ -214,16 +412,13 @@ class Table:
                 if not is_tail:
                     # update index with RID, i, and col
                     self.index.add_record_to_index(i, col, RID)
-                elif not self.use_dumbindex:
-                    # get old data
-                    old_value = self.get_partial_record(indirection, i + NUM_METADATA_COLUMNS)
-                    # update index entry with updated values
-                    self.index.update_record_in_index(i, old_value, base_rid, col)
                 # write data to page
-                page.write_direct(int_to_bytearray(col, self.record_size))
+                page.write_direct(int_to_bytearray(col, self.record_size), col)
             else:
                 # write a None value, it should be skipped by the schema encoding when read
-                page.write_direct(int_to_bytearray(0, self.record_size))
+                page.write_direct(int_to_bytearray(0, self.record_size), 0)
+        if not is_tail:
+            self.index.add_record_to_record_indices(RID, columns)
         # update was successful
         return True
 
@@ -325,6 +520,8 @@ class Table:
     def locate_record(self, RID: int, key:int, column_mask:list[int], version:int=0) -> Record|Literal[False]:
         """
         Given the RID, provides the record with that RID via indexing.
+        The latest version of a record is served from the record cache, a miss reads every column of the record and caches it.
+        A miss is read without the write lock, the values are only cached if the record was not updated or deleted meanwhile.
 
         INPUTS:
             RID: int, the record id
@@ -334,6 +531,26 @@ class Table:
         OUTPUT:
             Record object
         """
+        if version != 0 or self.record_cache.capacity == 0:
+            return self.__locate_record(RID, key, column_mask, version)
+        row = self.record_cache.get(RID)
+        if row is None:
+            # every update and delete changes the indirection column, tail RIDs are never reused
+            indirection = self.get_partial_record(RID, INDIRECTION_COLUMN)
+            record = self.__locate_record(RID, key, [1]*self.num_columns, version)
+            if record is False:
+                return False
+            row = record.columns
+            with self.write_lock:
+                # the values may be stale if an update landed while they were read, and the update was not applied to them
+                if self.get_partial_record(RID, INDIRECTION_COLUMN) == indirection:
+                    self.record_cache.put(RID, row)
+        return Record(RID, key, [value if projected else None for value, projected in zip(row, column_mask)])
+
+    def __locate_record(self, RID: int, key:int, column_mask:list[int], version:int=0) -> Record|Literal[False]:
+        """
+        Helper for locate_record, reads the record from the pages
+        """
         # get the base record's indirection column (the first tail record's RID)
         tail_RID = self.get_partial_record(RID, INDIRECTION_COLUMN)
         # check if this record is deleted
@@ -347,13 +564,11 @@ class Table:
             elif version < 0:
                 # we are interested in a past version of the record
                 # locate the correct version
-                for _ in range(version, 0):
-                    # get the next tail record
-                    tail_RID = self.get_partial_record(tail_RID, INDIRECTION_COLUMN)
-                    if tail_RID == RID:
-                        # if history stack is smaller then disiered result, give the base rid
-                        record = Record(RID, key, [self.get_partial_record(RID, i + NUM_METADATA_COLUMNS) for i in range(len(column_mask))])
-                        return record
+                tail_RID = self.__locate_version_rid(RID, tail_RID, version)
+                if tail_RID == RID:
+                    # if history stack is smaller then disiered result, give the base rid
+                    record = Record(RID, key, [self.get_partial_record(RID, i + NUM_METADATA_COLUMNS) for i in range(len(column_mask))])
+                    return record
                 # tail_RID is now the RID of the -version tail record
             else: # version > 0:
                 #NOTE this will be treated the same as version == 0
@@ -368,6 +583,203 @@ class Table:
         # print("Found Base record rid{}, key{}, columns{}".format(RID, key, record.columns))
         return record
 
+    def __locate_version_rid(self, RID:int, tail_RID:int, version:int) -> int:
+        """
+        Returns the RID of the tail record holding a past version (version < 0) of the record, or the base RID if the record has fewer versions.
+        tail_RID is the record's latest tail record. Versions at least VERSION_ARRAY_MIN_DEPTH back are found in the record's
+        version array, built by walking the whole chain once, shallower versions are found by walking the chain.
+        """
+        with self.write_lock:
+            versions = self.version_arrays.get(RID)
+            if versions is None and -version >= self.version_arrays.min_depth:
+                # re-read the latest tail record, an update may have landed since
+                tail_RID = self.get_partial_record(RID, INDIRECTION_COLUMN)
+                if tail_RID == RID_TOMBSTONE_VALUE:
+                    return RID
+                newest_first = []
+                # the oldest tail record points back to the base record, stop at any RID that is not a tail RID
+                # so a damaged chain (e.g. a tail record never written to disk reads as 0) cannot loop forever
+                while rid_to_coords(tail_RID)[0]:
+                    newest_first.append(tail_RID)
+                    tail_RID = self.get_partial_record(tail_RID, INDIRECTION_COLUMN)
+                versions = self.version_arrays.build(RID, newest_first)
+            if versions is not None:
+                return VersionArrays.version_rid(versions, RID, version)
+        for _ in range(version, 0):
+            # get the next tail record
+            tail_RID = self.get_partial_record(tail_RID, INDIRECTION_COLUMN)
+            if not rid_to_coords(tail_RID)[0]:
+                return RID
+        return tail_RID
+
+    def locate_records(self, RIDs:list[int], column_mask:list[int]) -> list[list[int|None]|None]:
+        """
+        Reads the current version of many records at once, the same as calling locate_record on each RID.
+        Records are grouped by page, so each base page and (for cumulative tail records) each tail page is retrieved once per column.
+
+        INPUTS:
+            RIDs: list[int], the base record ids
+            column_mask: list[bool], which columns to read
+        OUTPUT:
+            the columns of each record in the order of RIDs, unread columns are None, deleted records are None
+        """
+        read_columns = [i for i, value in enumerate(column_mask) if value]
+        found:dict[int, list[int|None]] = {}
+        # base RID and offset of each record, grouped by base page
+        by_base_page:dict[int, list[tuple[int, int]]] = {}
+        for rid in RIDs:
+            row = self.record_cache.peek(rid)
+            if row is not None:
+                # cached records are not read again, and records read here are not cached
+                found[rid] = [value if projected else None for value, projected in zip(row, column_mask)]
+                continue
+            _, page_num, offset = rid_to_coords(rid)
+            by_base_page.setdefault(page_num, []).append((rid, offset))
+        # base RID and latest tail RID of each record with cumulative tail records, grouped by tail page
+        by_tail_page:dict[int, list[tuple[int, int]]] = {}
+        for page_num, entries in sorted(by_base_page.items()):
+            indir_page = self.page_directory.retrieve_page(INDIRECTION_COLUMN, False, page_num)
+            # records without tail records are read from this base page
+            base_entries = []
+            for rid, offset in entries:
+                tail_rid = bytearray_to_int(indir_page.retrieve_direct(offset))
+                if tail_rid == RID_TOMBSTONE_VALUE or rid in found:
+                    continue
+                if tail_rid == rid:
+                    base_entries.append((rid, offset))
+                    found[rid] = [None]*self.num_columns
+                elif self.cumulative_tails:
+                    # the latest tail record holds every column
+                    _, tail_page_num, _ = rid_to_coords(tail_rid)
+                    by_tail_page.setdefault(tail_page_num, []).append((rid, tail_rid))
+                    found[rid] = [None]*self.num_columns
+                else:
+                    # the columns may be spread over several tail records
+                    found[rid] = self.apply_tails_to_base(tail_rid, rid, self.key, column_mask).columns
+            for i in read_columns:
+                page = self.page_directory.retrieve_page(i + NUM_METADATA_COLUMNS, False, page_num)
+                for rid, offset in base_entries:
+                    found[rid][i] = bytearray_to_int(page.retrieve_direct(offset))
+        for tail_page_num, entries in sorted(by_tail_page.items()):
+            for i in read_columns:
+                page = self.page_directory.retrieve_page(i + NUM_METADATA_COLUMNS, True, tail_page_num)
+                for rid, tail_rid in entries:
+                    _, _, offset = rid_to_coords(tail_rid)
+                    found[rid][i] = bytearray_to_int(page.retrieve_direct(offset))
+        return [found.get(rid) for rid in RIDs]
+
+    def scan(self, column_mask:list[int], predicate:dict[int, Callable[[int], bool]|tuple[int, int]]|None=None, batch:bool=False) -> Iterator[Record]|Iterator[tuple[list[int], list[list[int]|None]]]:
+        """
+        Streams the current version of every live record, one base page row at a time, so memory use is bounded by the page size.
+        Only the columns in column_mask and predicate are read. Predicate columns are read first, and each next column is only
+        read for the records that still match. Tail records are only followed for the columns being read.
+        Holds self.write_lock while a page row is read, but not while its records are yielded.
+        Range tests are checked against the pages' zone maps first, a page row is skipped without being read if no record
+        in it can match, and a base or tail page of a range column is not read if none of its values can match.
+
+        Inputs:
+            - column_mask, which columns to return
+            - predicate, column -> test on the column's value, a record is returned only if every test returns True,
+              a test is either a function or an inclusive (low, high) range
+            - batch, if True yield one (base RIDs, columns) pair per page row instead of Records,
+              columns holds a list of values per column (None for columns not in column_mask) in the order of the RIDs
+        Outputs:
+            - a generator of Record objects, or of (base RIDs, columns) pairs with batch
+        """
+        predicate = predicate if predicate is not None else {}
+        ranges = {col: test for col, test in predicate.items() if isinstance(test, tuple)}
+        tests = {col: (lambda x, low=test[0], high=test[1]: low <= x <= high) if isinstance(test, tuple) else test
+                 for col, test in predicate.items()}
+        for page_num in range(self.current_base_page_number + 1):
+            with self.write_lock:
+                if ranges and not self.__page_row_may_match(page_num, ranges):
+                    continue
+                rid_page = self.page_directory.retrieve_page(RID_COLUMN, False, page_num)
+                indir_page = self.page_directory.retrieve_page(INDIRECTION_COLUMN, False, page_num)
+                if rid_page is None or indir_page is None:
+                    continue
+                # (base RID, offset, latest tail RID or the base RID) of each live record in the page row
+                entries = []
+                for offset in range(rid_page.num_records):
+                    latest_rid = bytearray_to_int(indir_page.retrieve_direct(offset))
+                    if latest_rid != RID_TOMBSTONE_VALUE:
+                        entries.append((bytearray_to_int(rid_page.retrieve_direct(offset)), offset, latest_rid))
+                # values of the columns read so far, for the entries still matching
+                values:dict[int, list[int]] = {}
+                for col, test in tests.items():
+                    if not entries:
+                        break
+                    col_values = self.__read_column(page_num, entries, col, ranges.get(col))
+                    keep = [n for n, value in enumerate(col_values) if value is not None and test(value)]
+                    entries = [entries[n] for n in keep]
+                    values = {c: [vals[n] for n in keep] for c, vals in values.items()}
+                    values[col] = [col_values[n] for n in keep]
+                if not entries:
+                    continue
+                columns = [(values[i] if i in values else self.__read_column(page_num, entries, i)) if projected else None
+                           for i, projected in enumerate(column_mask)]
+            rids = [entry[0] for entry in entries]
+            if batch:
+                yield rids, columns
+                continue
+            for n, rid in enumerate(rids):
+                yield Record(rid, self.key, [col[n] if col is not None else None for col in columns])
+
+    def __page_row_may_match(self, page_num:int, ranges:dict[int, tuple[int, int]]) -> bool:
+        """
+        Helper for scan, checks the zone maps of a base page row without loading its pages.
+        Returns False if the page row is empty, or if none of its records have tail records and a range column's base page has no value in the range.
+        """
+        indir_zone = self.page_directory.get_zone_map(INDIRECTION_COLUMN, False, page_num)
+        if indir_zone is None:
+            return False
+        if indir_zone[1] >= MIN_TAIL_RID:
+            # some current values are in tail pages, those are checked as the page row is read
+            return True
+        for col, (low, high) in ranges.items():
+            zone = self.page_directory.get_zone_map(col + NUM_METADATA_COLUMNS, False, page_num)
+            if zone is None or zone[1] < low or high < zone[0]:
+                return False
+        return True
+
+    def __read_column(self, page_num:int, entries:list[tuple[int, int, int]], column:int, value_range:tuple[int, int]|None=None) -> list[int|None]:
+        """
+        Helper for scan, reads the current value of one data column for (base RID, offset, latest RID) entries of a base page row.
+        Base values are read from the base page, cumulative tail records grouped by tail page so each tail page is retrieved once.
+        With value_range, a page whose zone map is outside the range is not read, and its records get None.
+        """
+        values:list[int|None] = [0]*len(entries)
+        base_page = None
+        if value_range is None or self.__page_may_contain(column, False, page_num, value_range):
+            base_page = self.page_directory.retrieve_page(column + NUM_METADATA_COLUMNS, False, page_num)
+        column_mask = [0]*self.num_columns
+        column_mask[column] = 1
+        by_tail_page:dict[int, list[tuple[int, int]]] = {}
+        for n, (rid, offset, latest_rid) in enumerate(entries):
+            if latest_rid == rid:
+                values[n] = bytearray_to_int(base_page.retrieve_direct(offset)) if base_page is not None else None
+            elif self.cumulative_tails:
+                _, tail_page_num, tail_offset = rid_to_coords(latest_rid)
+                by_tail_page.setdefault(tail_page_num, []).append((n, tail_offset))
+            else:
+                values[n] = self.apply_tails_to_base(latest_rid, rid, self.key, column_mask).columns[column]
+        for tail_page_num, items in by_tail_page.items():
+            if value_range is not None and not self.__page_may_contain(column, True, tail_page_num, value_range):
+                for n, _ in items:
+                    values[n] = None
+                continue
+            tail_page = self.page_directory.retrieve_page(column + NUM_METADATA_COLUMNS, True, tail_page_num)
+            for n, tail_offset in items:
+                values[n] = bytearray_to_int(tail_page.retrieve_direct(tail_offset))
+        return values
+
+    def __page_may_contain(self, column:int, is_tail:bool, page_num:int, value_range:tuple[int, int]) -> bool:
+        """
+        Helper for scan, True unless the zone map of a data column's page shows none of its values are in the inclusive range
+        """
+        zone = self.page_directory.get_zone_map(column + NUM_METADATA_COLUMNS, is_tail, page_num)
+        return zone is not None and zone[0] <= value_range[1] and value_range[0] <= zone[1]
+
     def apply_tails_to_base(self, Tail_RID:int, Base_RID:int, key:int, column_mask:list[int]) -> Record:
         """
         Calculates the record represented by the given tail record. Works for both cumulative and non-cumulative tail records as well as any past version.
@@ -445,6 +857,93 @@ class Table:
             data = bytearray_to_int(data)
         return data
 
+    def get_column_versions(self, column:int, depth:int=0, base_rids:list[int]|None=None) -> list[tuple[int, list[int]]]:
+        """
+        Reads the latest value, and up to depth past values, of one data column for live base records.
+        Base records are read one page at a time. Tail records are read in rounds, one hop back per round,
+        with each round's reads grouped by tail page so a tail page is retrieved once per round.
+        Holds self.write_lock while a base page and its tail records are read, so writes can continue between pages.
+
+        Inputs:
+            - column, the data column to read
+            - depth, the number of past versions to read
+            - base_rids, the base records to read, all records are read if None
+        Outputs:
+            - a list of (base RID, versions), versions holds the latest value first followed by up to depth past values,
+              it is shorter if the record has fewer updates, then its last value is the base record's value
+        """
+        data_column = column + NUM_METADATA_COLUMNS
+        # group the requested records by base page, None means every record in the page
+        requested:dict[int, list[int]|None] = {}
+        if base_rids is None:
+            requested = {page_num: None for page_num in range(self.current_base_page_number + 1)}
+        else:
+            for rid in base_rids:
+                _, page_num, offset = rid_to_coords(rid)
+                requested.setdefault(page_num, []).append(offset)
+        result = []
+        for page_num, offsets in sorted(requested.items()):
+            with self.write_lock:
+                rid_page = self.page_directory.retrieve_page(RID_COLUMN, False, page_num)
+                indir_page = self.page_directory.retrieve_page(INDIRECTION_COLUMN, False, page_num)
+                data_page = self.page_directory.retrieve_page(data_column, False, page_num)
+                if rid_page is None or indir_page is None or data_page is None:
+                    continue
+                if offsets is None:
+                    offsets = range(rid_page.num_records)
+                # each pending record is [base RID, next tail RID, (schema bit, value) per tail record read, base value]
+                pending = []
+                for offset in offsets:
+                    base_rid = bytearray_to_int(rid_page.retrieve_direct(offset))
+                    indirection = bytearray_to_int(indir_page.retrieve_direct(offset))
+                    if indirection == RID_TOMBSTONE_VALUE:
+                        continue
+                    base_value = bytearray_to_int(data_page.retrieve_direct(offset))
+                    if indirection == base_rid:
+                        result.append((base_rid, [base_value]))
+                    else:
+                        pending.append([base_rid, indirection, [], base_value])
+                while pending:
+                    # one hop back for every pending record, grouped by tail page
+                    by_tail_page:dict[int, list] = {}
+                    for entry in pending:
+                        _, tail_page_num, _ = rid_to_coords(entry[1])
+                        by_tail_page.setdefault(tail_page_num, []).append(entry)
+                    pending = []
+                    for tail_page_num, entries in by_tail_page.items():
+                        tail_data = self.page_directory.retrieve_page(data_column, True, tail_page_num)
+                        tail_schema = self.page_directory.retrieve_page(SCHEMA_ENCODING_COLUMN, True, tail_page_num)
+                        tail_indir = self.page_directory.retrieve_page(INDIRECTION_COLUMN, True, tail_page_num)
+                        for entry in entries:
+                            _, _, offset = rid_to_coords(entry[1])
+                            in_schema = bytearray_to_schema(tail_schema.retrieve_direct(offset), self.num_columns)[column]
+                            entry[2].append((in_schema, bytearray_to_int(tail_data.retrieve_direct(offset))))
+                            entry[1] = bytearray_to_int(tail_indir.retrieve_direct(offset))
+                            # any RID that is not a tail RID ends the chain, normally this is the base record's RID,
+                            # but a tail record that was never saved to disk reads as 0
+                            reached_base = not rid_to_coords(entry[1])[0]
+                            # stop at the base record, or once a value for every version up to depth is known
+                            if reached_base or (len(entry[2]) > depth and any(bit for bit, _ in entry[2][depth:])):
+                                result.append((entry[0], self.__tails_to_versions(entry[2], entry[3], reached_base, depth)))
+                            else:
+                                pending.append(entry)
+        return result
+
+    def __tails_to_versions(self, tails:list[tuple[int, int]], base_value:int, reached_base:bool, depth:int) -> list[int]:
+        """
+        Helper for get_column_versions, turns the (schema bit, value) pairs read from newest to oldest tail record into the value at each version.
+        A tail record without the column in its schema has the value of the next older version.
+        """
+        versions = []
+        for i in range(min(depth + 1, len(tails))):
+            # the newest tail record at or before this version that has the column
+            value = next((value for bit, value in tails[i:] if bit), base_value)
+            versions.append(value)
+        if reached_base and len(versions) <= depth:
+            # past the oldest tail record is the base record
+            versions.append(base_value)
+        return versions
+
     def add_page(self, col_number:int, is_tail:bool) -> None:
         """
         Adds a page when number of records exceeds page size
@@ -468,23 +967,33 @@ class Table:
         Outputs:
             - True if the record was deleted, False otherwise
         """
-        # set the INDIRECTION_COLUMN of the base record to a tombstone value
-        # get page number and offset
-        tail, page_num, offset = rid_to_coords(base_RID)
-        if not tail:
-            self.delete_record_from_index(base_RID)
-        page = self.page_directory.retrieve_page(INDIRECTION_COLUMN, False, page_num)
-        page.overwrite_direct(int_to_bytearray(RID_TOMBSTONE_VALUE, self.record_size), offset)
-        return True
+        with self.write_lock:
+            # set the INDIRECTION_COLUMN of the base record to a tombstone value
+            # get page number and offset
+            tail, page_num, offset = rid_to_coords(base_RID)
+            if not tail:
+                self.delete_record_from_index(base_RID)
+                self.statistics.delete(base_RID)
+                self.record_cache.evict(base_RID)
+                self.version_arrays.drop(base_RID)
+            page = self.page_directory.retrieve_page(INDIRECTION_COLUMN, False, page_num)
+            page.overwrite_direct(int_to_bytearray(RID_TOMBSTONE_VALUE, self.record_size), offset, RID_TOMBSTONE_VALUE)
+            self.index.record_changed(base_RID)
+            return True
 
     def delete_record_from_index(self, base_RID:int) -> None:
         """
         Helper function for removing an entire record from the index
         """
+        # the B+ tree keeps no value for each RID, read the record's current values
+        values = self.locate_record(base_RID, self.key, [1]*self.num_columns).columns if self.use_bplus else None
         for i in range(self.num_columns):
+            if self.index.indices[i] is None:
+                continue
             #value = self.get_partial_record(base_RID, i + NUM_METADATA_COLUMNS)
-            value = self.index.indices[i].rid_val_map[base_RID]
+            value = values[i] if values is not None else self.index.indices[i].rid_val_map[base_RID]
             self.index.remove_record_from_index(i, value, base_RID)
+        self.index.remove_record_from_record_indices(base_RID)
 
     ### Methods for merging ###
 
@@ -560,7 +1069,7 @@ class Table:
                 if tail_page is None:
                     raise KeyError("Base record is not deleted but its indirection column points to a non-existent tail page")
                 new_val = bytearray_to_int(tail_page.retrieve_direct(tail_record_offset))
-                cons_base_page.overwrite_direct(int_to_bytearray(new_val, FIXED_PARTIAL_RECORD_SIZE), offset)
+                cons_base_page.overwrite_direct(int_to_bytearray(new_val, FIXED_PARTIAL_RECORD_SIZE), offset, new_val)
 
             # swap the cons base page with the original base page
             self.page_directory.swap_page(cons_base_page, col_num, False, page_num)
@@ -600,7 +1109,7 @@ class Table:
                     if tail_page is None:
                         raise KeyError("Base record is not deleted but its indirection column points to a non-existent tail page")
                     new_val = bytearray_to_int(tail_page.retrieve_direct(tail_record_offset))
-                    base_page_copy.overwrite_direct(int_to_bytearray(new_val, FIXED_PARTIAL_RECORD_SIZE), offset)
+                    base_page_copy.overwrite_direct(int_to_bytearray(new_val, FIXED_PARTIAL_RECORD_SIZE), offset, new_val)
                     updated_page.overwrite_direct(int_to_bytearray(time_ns()-self.ref_time, FIXED_PARTIAL_RECORD_SIZE), offset)     #Change updated at
                 #Swap base page copy with original base page //TODO: MUTEX LOCKS!
                 self.page_directory.swap_page(base_page_copy, col_number, False, page_num)
@@ -0,0 +1,52 @@
+from lstore.db import Database
+from lstore.query import Query
+
+# import necessary libraries for unit testing
+import unittest
+import tempfile
+
+
+class TableTestCase(unittest.TestCase):
+    """
+    Base class for unit tests run against a table, each test gets a new database in a temporary directory.
+    The table is named grades, with num_columns columns and the primary key in column 0.
+    Only the primary key is indexed, other indices are created by the tests.
+    """
+    num_columns: int = 3
+    table_options: dict = {}
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db = Database()
+        self.db.open(self.directory.name)
+        self.table = self.create_table("grades", self.num_columns)
+        self.query = Query(self.table)
+        # the current values of the records by primary key, for tests that keep them up to date with update
+        self.rows: dict[int, list[int]] = {}
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def create_table(self, name: str, num_columns: int):
+        #Create a table in the database with only its primary key indexed
+        table = self.db.create_table(name, num_columns, 0, **self.table_options)
+        # the advisor would index columns on its own
+        table.index.advisor = None
+        return table
+
+    def reopen(self) -> None:
+        #Close the database and open it again from disk
+        self.db.close()
+        self.db = Database()
+        self.db.open(self.directory.name)
+        self.table = self.db.get_table("grades")
+        self.table.index.advisor = None
+        self.query = Query(self.table)
+
+    def update(self, key: int, columns: list[int | None], table=None, rows: dict[int, list[int]] | None = None) -> None:
+        #Update a record in the table and in rows, by default self.table and self.rows
+        table = self.table if table is None else table
+        rows = self.rows if rows is None else rows
+        self.assertTrue(Query(table).update(key, *columns))
+        row = rows.pop(key)
+        rows[columns[0] if columns[0] is not None else key] = [old if new is None else new for old, new in zip(row, columns)]
@@ -0,0 +1,62 @@
+from lstore.table_test_case import TableTestCase
+
+# import necessary libraries for unit testing
+import unittest
+
+
+class TestAggregate(TableTestCase):
+    num_columns = 4
+
+    def setUp(self):
+        super().setUp()
+        # records over several page rows, grouped by column 1, the current values are kept in rows
+        self.rows = {key: [key, key % 7, (key * 37) % 1000, key % 3] for key in range(1500)}
+        self.query.insert_many([list(row) for row in self.rows.values()])
+        for key in range(0, 1500, 4):
+            self.update(key, [None, None, key + 2000, None])
+        # records moved to another group, and a primary key moved out of the key ranges below
+        for key in range(1, 1500, 10):
+            self.update(key, [None, 9, None, None])
+        self.update(2, [5000, None, None, None])
+        for key in (5, 6, 700):
+            self.query.delete(key)
+            del self.rows[key]
+
+    def expected(self, group_by_col: int, agg_specs: list, key_range=None) -> dict[int, list]:
+        #The aggregates computed from rows
+        groups: dict[int, list[list[int]]] = {}
+        for key, row in self.rows.items():
+            if key_range is None or min(key_range) <= key <= max(key_range):
+                groups.setdefault(row[group_by_col], []).append(row)
+        functions = {"sum": sum, "count": len, "min": min, "max": max, "avg": lambda values: sum(values) / len(values)}
+        return {group: [functions[function]([row[column if column is not None else 0] for row in rows]) for function, column in agg_specs]
+                for group, rows in groups.items()}
+
+    def test_each_function(self):
+        for function in ("sum", "count", "min", "max", "avg"):
+            for column in (2, 3):
+                specs = [(function, column)]
+                self.assertEqual(self.query.aggregate(1, specs), self.expected(1, specs), specs)
+        # count needs no column
+        self.assertEqual(self.query.aggregate(1, [("count", None)]), self.expected(1, [("count", None)]))
+
+    def test_several_specs_and_key_range(self):
+        specs = [("sum", 2), ("count", None), ("min", 2), ("max", 3), ("avg", 2), ("avg", 3), ("sum", 0)]
+        self.assertEqual(self.query.aggregate(1, specs), self.expected(1, specs))
+        self.assertEqual(set(self.query.aggregate(1, specs)), set(range(7)) | {9})
+        for key_range in ((0, 100), (600, 0), (1400, 6000), (3, 3), (1500, 4000), (4000, 6000)):
+            self.assertEqual(self.query.aggregate(1, specs, key_range), self.expected(1, specs, key_range), key_range)
+        self.assertEqual(self.query.aggregate(1, specs, (5, 6)), {})
+        # grouped by the primary key, every group has one record
+        self.assertEqual(self.query.aggregate(0, [("count", None), ("max", 2)], (0, 50)), self.expected(0, [("count", None), ("max", 2)], (0, 50)))
+
+    def test_malformed(self):
+        for group_by_col, specs in ((1, [("median", 2)]), (1, [("sum", None)]), (1, [("min", 4)]), (1, [("avg", -1)]),
+                                    (4, [("count", None)]), (-1, [("sum", 2)])):
+            with self.assertRaises(ValueError):
+                self.query.aggregate(group_by_col, specs)
+
+
+# run unit tests
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+from lstore.table_test_case import TableTestCase
+
+# import necessary libraries for unit testing
+import unittest
+
+
+class TestCompositeIndex(TableTestCase):
+    num_columns = 4
+
+    def setUp(self):
+        super().setUp()
+        self.rows = {key: [key, key % 5, key % 20, key] for key in range(800)}
+        self.query.insert_many([list(row) for row in self.rows.values()])
+        # a tail record before the index exists
+        self.update(3, [None, 4, 1, None])
+        self.table.index.create_composite_index((1, 2))
+
+    def keys_of(self, rids: list[int]) -> list[int]:
+        #The primary keys of the records, sorted
+        return sorted(self.table.locate_record(rid, 0, [1, 0, 0, 0]).columns[0] for rid in rids)
+
+    def expected(self, test) -> list[int]:
+        return sorted(key for key, row in self.rows.items() if test(row))
+
+    def assert_index_matches(self) -> None:
+        #Prefix, point and range lookups of the (1, 2) index agree with rows
+        index = self.table.index
+        for a in range(6):
+            self.assertEqual(self.keys_of(index.locate_composite((1, 2), (a,))), self.expected(lambda row: row[1] == a))
+            for b in (0, 1, 4, 19):
+                self.assertEqual(self.keys_of(index.locate_composite((1, 2), (a, b))), self.expected(lambda row: row[1:3] == [a, b]))
+            self.assertEqual(self.keys_of(index.locate_composite_range((1, 2), (a,), 3, 9)), self.expected(lambda row: row[1] == a and 3 <= row[2] <= 9))
+
+    def test_lookups(self):
+        self.assert_index_matches()
+        self.assertEqual(self.keys_of(self.table.index.locate_composite((1, 2), (4, 1))), [3])
+        self.assertEqual(self.keys_of(self.table.index.locate_composite((1, 2), (3, 4))), [])
+        self.assertEqual(self.table.index.locate_composite((1, 2), (7,)), [])
+        # a range on the first column, with an empty prefix
+        self.assertEqual(self.keys_of(self.table.index.locate_composite_range((1, 2), (), 1, 2)), self.expected(lambda row: 1 <= row[1] <= 2))
+        with self.assertRaises(ValueError):
+            self.table.index.locate_composite((1, 2), (1, 2, 3))
+        with self.assertRaises(ValueError):
+            self.table.index.locate_composite_range((1, 2), (1, 2), 0, 5)
+        with self.assertRaises(ValueError):
+            self.table.index.create_composite_index((1, 1))
+
+    def test_locate_where(self):
+        for conditions, test in (({1: 2, 2: 7}, lambda row: row[1:3] == [2, 7]),
+                                 ({1: 2, 2: (5, 12)}, lambda row: row[1] == 2 and 5 <= row[2] <= 12),
+                                 ({2: 7, 1: 2}, lambda row: row[1:3] == [2, 7]),
+                                 ({1: 3}, lambda row: row[1] == 3),
+                                 ({1: (1, 2), 2: 7}, lambda row: 1 <= row[1] <= 2 and row[2] == 7)):
+            self.assertEqual(self.keys_of(self.table.index.locate_where(conditions)), self.expected(test), conditions)
+
+    def test_maintained_through_writes(self):
+        self.query.insert(1000, 2, 7, 0)
+        self.rows[1000] = [1000, 2, 7, 0]
+        self.query.insert_many([[key, key % 3, 19, 0] for key in range(1001, 1020)])
+        for key in range(1001, 1020):
+            self.rows[key] = [key, key % 3, 19, 0]
+        # one column of the key, both columns, no column of the key, and the primary key
+        self.update(10, [None, 3, None, None])
+        self.update(11, [None, 0, 0, None])
+        self.update(12, [None, None, None, 5])
+        self.update(13, [2000, None, None, None])
+        self.update(2000, [None, None, 8, None])
+        self.query.update_many([(key, [None, 1, None, None]) for key in range(100, 200, 3)])
+        for key in range(100, 200, 3):
+            self.rows[key][1] = 1
+        for key in (14, 100, 1000):
+            self.query.delete(key)
+            del self.rows[key]
+        self.assert_index_matches()
+        # the moved primary key is found under its new key, and the record's new values
+        self.assertIn(2000, self.keys_of(self.table.index.locate_composite((1, 2), (3, 8))))
+        self.assertNotIn(2000, self.keys_of(self.table.index.locate_composite((1, 2), (3, 13))))
+
+    def test_rebuilt_on_reopen(self):
+        self.update(20, [None, 4, 4, None])
+        self.query.delete(21)
+        del self.rows[21]
+        self.reopen()
+        self.assertEqual(list(self.table.index.composites), [(1, 2)])
+        self.assert_index_matches()
+        # once dropped it is not rebuilt
+        self.table.index.drop_composite_index((1, 2))
+        self.reopen()
+        self.assertEqual(self.table.index.composites, {})
+
+
+# run unit tests
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+from lstore.table_test_case import TableTestCase
+
+# import necessary libraries for unit testing
+import unittest
+
+
+class TestCoveringIndex(TableTestCase):
+    num_columns = 4
+
+    def setUp(self):
+        super().setUp()
+        self.query.insert_many([[key, key % 13, key * 2, 1] for key in range(1200)])
+        # tail records before the index exists
+        self.query.update_many([(key, [None, 100 + key, None, None]) for key in range(0, 1200, 5)])
+        self.table.index.create_covering_index((1, 2))
+
+    def record_sum(self, start: int, end: int, column_num: int) -> int:
+        #The sum of the column over the primary key range, read from the records one at a time
+        total = 0
+        for key in range(start, end + 1):
+            for record in self.query.select(key, 0, [1, 1, 1, 1]):
+                total += record.columns[column_num]
+        return total
+
+    def assert_sums_match(self) -> None:
+        for start, end in ((0, 1199), (0, 0), (17, 403), (500, 2500), (1100, 5000), (3000, 4000)):
+            for column_num in (1, 2):
+                expected = self.record_sum(start, end, column_num)
+                # answered by the covering index alone
+                self.assertEqual(self.table.index.sum_covered(start, end, column_num), expected, (start, end, column_num))
+                self.assertEqual(self.query.sum(start, end, column_num), expected, (start, end, column_num))
+        # columns not covered are read from the records
+        self.assertIsNone(self.table.index.sum_covered(0, 1199, 3))
+        self.assertEqual(self.query.sum(0, 1199, 3), self.record_sum(0, 1199, 3))
+
+    def test_sum_after_updates_and_deletes(self):
+        self.assert_sums_match()
+        self.query.update(7, None, 500, None, None)
+        self.query.update(8, None, None, 9, 9)
+        self.query.update_many([(key, [None, key % 3, key, None]) for key in range(0, 1200, 11)])
+        # primary key changes move the record's values in the index
+        self.query.update(20, 2600, None, None, None)
+        self.query.update(21, 4000, None, 1, None)
+        for key in (30, 31, 1199, 2600):
+            self.query.delete(key)
+        self.query.insert(2000, 5, 5, 5)
+        self.assert_sums_match()
+
+    def test_rebuilt_on_reopen(self):
+        self.query.update(7, None, 500, None, None)
+        self.query.delete(30)
+        self.reopen()
+        self.assertIsNotNone(self.table.index.covering)
+        self.assert_sums_match()
+        self.table.index.drop_covering_index()
+        self.assertIsNone(self.table.index.sum_covered(0, 1199, 1))
+        self.assertEqual(self.query.sum(0, 1199, 1), self.record_sum(0, 1199, 1))
+
+
+# run unit tests
+if __name__ == '__main__':
+    unittest.main()
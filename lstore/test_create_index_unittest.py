@@ -0,0 +1,62 @@
+from lstore.table_test_case import TableTestCase
+
+# import necessary libraries for unit testing
+import unittest
+import random
+
+
+class TestCreateIndex(TableTestCase):
+
+    def setUp(self):
+        super().setUp()
+        for key in range(1000):
+            self.rows[key] = [key, key % 50, key * 3]
+            self.query.insert(*self.rows[key])
+        # give some records tail records before the index exists
+        for key in range(0, 1000, 7):
+            self.update(key, [None, key % 50 + 100, None])
+
+    def assert_index_matches(self, column_num: int) -> None:
+        #Every value of the column locates exactly the records holding it
+        self.assertIsNotNone(self.table.index.indices[column_num])
+        expected: dict[int, set[int]] = {}
+        for key, row in self.rows.items():
+            expected.setdefault(row[column_num], set()).add(key)
+        for value, keys in expected.items():
+            rids = self.table.index.locate(column_num, value)
+            found = {self.table.locate_record(rid, 0, [1, 0, 0]).columns[0] for rid in rids}
+            self.assertEqual(found, keys)
+
+    def test_create_index_on_populated_table(self):
+        self.assertIsNone(self.table.index.indices[1])
+        self.table.index.create_index(1)
+        self.assert_index_matches(1)
+        # past values kept by the hash index come from the tail records, records never updated keep their base value
+        self.assertEqual({record.columns[0] for record in self.query.select_version(7, 1, [1, 0, 0], -1)}, set(range(7, 1000, 50)))
+        self.assertEqual({record.columns[0] for record in self.query.select_version(107, 1, [1, 0, 0], 0)}, {7, 357, 707})
+        self.assertEqual(self.query.select_version(107, 1, [1, 0, 0], -1), [])
+        # the index is maintained from now on
+        self.update(1, [None, 999, None])
+        self.assert_index_matches(1)
+
+    def test_background_build_with_concurrent_writes(self):
+        rng = random.Random(5)
+        thread = self.table.index.create_index(1, background=True)
+        self.assertIsNotNone(thread)
+        # keep writing while the index is built
+        for _ in range(600):
+            key = rng.randrange(1000)
+            self.update(key, [None, rng.randrange(200), None])
+        for key in range(1000, 1050):
+            self.rows[key] = [key, key % 7, 0]
+            self.query.insert(*self.rows[key])
+        for key in range(1000, 1010):
+            self.query.delete(key)
+            del self.rows[key]
+        thread.join()
+        self.assert_index_matches(1)
+
+
+# run unit tests
+if __name__ == '__main__':
+    unittest.main()
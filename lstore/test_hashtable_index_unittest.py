@@ -0,0 +1,293 @@
+from lstore.hashtable_index import HashtableIndex, PostingList, RID
+from lstore.db import Database
+from lstore.query import Query
+from lstore.table_test_case import TableTestCase
+from lstore.config import INDEX_VERSION_RETENTION, coords_to_rid
+from lstore.compact_index import CompactHashtableIndex
+from lstore.bitmap_index import BitmapIndex
+import lstore.config as config
+
+# import necessary libraries for unit testing
+import unittest
+from unittest import mock
+import tempfile
+
+
+class TestRangeQuery(unittest.TestCase):
+
+    def setUp(self):
+        self.index = HashtableIndex()
+        for i in range(100):
+            self.index.insert(i % 10 * 7, RID(i))
+
+    def test_range_query_correctness(self):
+        expected = [RID(i) for i in range(100) if i % 10 in (0, 1, 2)]
+        self.assertEqual(sorted(self.index.range_query(0, 14)), expected)
+
+    def test_range_query_huge_range(self):
+        # only keys in the index are visited, so this returns immediately
+        self.assertEqual(len(self.index.range_query(-10**12, 10**12)), 100)
+        self.assertEqual(self.index.range_query(64, 10**12), [])
+
+    def test_sorted_keys_follow_updates(self):
+        # move every RID with key 0 to a new key, key 0 should be dropped
+        for i in range(0, 100, 10):
+            self.index.update(1000, RID(i))
+        self.assertNotIn(0, self.index.sorted_keys)
+        self.assertEqual(self.index.sorted_keys[-1], 1000)
+        self.assertEqual(len(self.index.range_query(1000, 1000)), 10)
+
+
+class TestInsertMany(unittest.TestCase):
+
+    def test_same_as_insert(self):
+        single = HashtableIndex()
+        bulk = HashtableIndex()
+        keys = [i * 37 % 50 for i in range(200)]
+        for i, key in enumerate(keys):
+            single.insert(key, RID(i))
+        bulk.insert_many(keys[:100], [RID(i) for i in range(100)])
+        bulk.insert_many(keys[100:], [RID(i) for i in range(100, 200)])
+        self.assertEqual(bulk.sorted_keys, single.sorted_keys)
+        self.assertEqual(bulk.rid_val_map, single.rid_val_map)
+        self.assertEqual(sorted(bulk.range_query(10, 20)), sorted(single.range_query(10, 20)))
+
+
+class TestPostingList(unittest.TestCase):
+
+    def setUp(self):
+        self.index = HashtableIndex()
+        # low cardinality column, 10 values shared by 1000 RIDs
+        for i in range(1000):
+            self.index.insert(i % 10, RID(i))
+
+    def test_point_query_is_not_copied(self):
+        self.assertIs(self.index.point_query(3), self.index.hashtable[3].rids)
+        self.assertEqual(sorted(self.index.point_query(3)), [RID(i) for i in range(3, 1000, 10)])
+
+    def test_update_and_delete(self):
+        self.index.update(3, RID(0))
+        self.assertIn(RID(0), self.index.hashtable[3])
+        self.assertNotIn(RID(0), self.index.hashtable[0])
+        self.assertTrue(self.index.delete(3, RID(0)))
+        self.assertFalse(self.index.delete(3, RID(0)))
+        self.assertFalse(self.index.delete(12345, RID(0)))
+        self.assertEqual(len(self.index.point_query(3)), 100)
+
+    def test_swap_remove_keeps_positions(self):
+        postings = PostingList([RID(i) for i in range(5)])
+        postings.remove(RID(1))
+        postings.remove(RID(4))
+        self.assertEqual(sorted(postings), [RID(0), RID(2), RID(3)])
+        for rid in postings:
+            self.assertEqual(postings.rids[postings.positions[rid]], rid)
+
+
+class TestVersionQuery(unittest.TestCase):
+
+    def setUp(self):
+        self.index = HashtableIndex(retention=3)
+        self.index.insert(5, RID(1))
+        self.index.insert(5, RID(2))
+
+    def update(self, new_val, rid):
+        # same order as Table.append_tail_record
+        self.index.save_version(rid)
+        self.index.update(new_val, rid)
+
+    def test_version_query_correctness(self):
+        self.update(6, RID(1))
+        self.update(7, RID(1))
+        self.assertEqual(sorted(self.index.version_query(5, 0)), [RID(2)])
+        self.assertEqual(self.index.version_query(6, -1), [RID(1)])
+        self.assertEqual(sorted(self.index.version_query(5, -2)), [RID(1), RID(2)])
+        # older than the number of updates gives the base value
+        self.assertEqual(sorted(self.index.version_query(5, -3)), [RID(1), RID(2)])
+
+    def test_retention_bound(self):
+        for new_val in range(10, 20):
+            self.update(new_val, RID(1))
+        self.assertEqual(len(self.index.version_history[RID(1)]), 3)
+        self.assertNotIn(5, self.index.history_table)
+        self.assertEqual(self.index.version_query(16, -3), [RID(1)])
+        with self.assertRaises(ValueError):
+            self.index.version_query(5, -4)
+
+    def test_delete_drops_history(self):
+        self.update(6, RID(1))
+        self.index.delete(6, RID(1))
+        self.assertNotIn(RID(1), self.index.version_history)
+        self.assertEqual(self.index.version_query(5, -1), [RID(2)])
+
+
+class TestVersionFallback(TableTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.table.index.create_index(1)
+        # values of column 1 of each record, oldest first, past the history kept by the hash index
+        self.history: dict[int, list[int]] = {key: [key % 4] for key in range(40)}
+        for key in self.history:
+            self.query.insert(key, key % 4, key)
+        for n in range(1, INDEX_VERSION_RETENTION + 4):
+            for key in range(0, 40, 3):
+                # column 2 changes alone in between, column 1 keeps its value
+                self.query.update(key, None, None, n)
+                self.query.update(key, None, (key + n) % 4, None)
+                self.history[key] += [self.history[key][-1], (key + n) % 4]
+
+    def test_deep_versions_match_history(self):
+        for relative_version in range(0, -2 * INDEX_VERSION_RETENTION - 12, -1):
+            for value in range(4):
+                expected = sorted(key for key, values in self.history.items() if values[max(len(values) - 1 + relative_version, 0)] == value)
+                found = sorted(record.columns[0] for record in self.query.select_version(value, 1, [1, 0, 0], relative_version))
+                self.assertEqual(found, expected, (relative_version, value))
+
+
+class TestCompactIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = CompactHashtableIndex(retention=2)
+        for i in range(100):
+            self.index.insert(i % 10, RID(i))
+        self.index.merge()
+
+    def test_queries_across_arrays_and_delta(self):
+        self.index.insert(3, RID(100))
+        self.index.update(3, RID(0))
+        self.assertEqual(self.index.rid_val_map[RID(0)], 3)
+        self.assertEqual(sorted(self.index.point_query(3)), [RID(0)] + [RID(i) for i in range(3, 100, 10)] + [RID(100)])
+        self.assertNotIn(RID(0), self.index.point_query(0))
+        self.assertEqual(len(self.index.range_query(0, 3)), 41)
+
+    def test_delete_and_merge(self):
+        self.assertTrue(self.index.delete(5, RID(5)))
+        self.assertFalse(self.index.delete(5, RID(5)))
+        self.assertNotIn(RID(5), self.index.rid_val_map)
+        self.index.merge()
+        self.assertEqual(len(self.index.rid_order), 99)
+        self.assertEqual(len(self.index.point_query(5)), 9)
+
+    def test_version_query(self):
+        self.index.save_version(RID(1))
+        self.index.update(7, RID(1))
+        self.assertIn(RID(1), self.index.version_query(1, -1))
+        self.assertIn(RID(1), self.index.version_query(7, 0))
+
+
+class TestCompactIndexReopen(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def save_and_reopen(self, compact_on_save: bool, compact_on_open: bool) -> None:
+        #Save a table with one kind of hash index and reopen it configured for the other
+        with mock.patch.object(config, "INDEX_USE_COMPACT_HASH", compact_on_save):
+            db = Database()
+            db.open(self.directory.name)
+            table = db.create_table("grades", 3, 0)
+            table.index.create_index(1)
+            query = Query(table)
+            for key in range(100):
+                query.insert(key, key % 10, key)
+            query.update(5, None, 42, None)
+            db.close()
+        with mock.patch.object(config, "INDEX_USE_COMPACT_HASH", compact_on_open):
+            db = Database()
+            db.open(self.directory.name)
+            table = db.get_table("grades")
+        # the saved files decide the kind of index
+        self.assertEqual([isinstance(index, CompactHashtableIndex) for index in table.index.indices[:2]], [compact_on_save] * 2)
+        query = Query(table)
+        self.assertEqual(sorted(record.columns[0] for record in query.select(3, 1, [1, 0, 0])), list(range(3, 100, 10)))
+        self.assertEqual([record.columns for record in query.select(42, 1, [1, 1, 1])], [[5, 42, 5]])
+        db.close()
+
+    def test_compact_reopened_as_plain(self):
+        self.save_and_reopen(True, False)
+
+    def test_plain_reopened_as_compact(self):
+        self.save_and_reopen(False, True)
+class TestBitmapIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = BitmapIndex()
+        # records spread over 3 base pages, grades 0-100
+        self.rids = [coords_to_rid(False, i % 3, i // 3) for i in range(300)]
+        for i, rid in enumerate(self.rids):
+            self.index.insert(i % 101, rid)
+
+    def test_point_and_range_query(self):
+        self.assertEqual(self.index.point_query(5), sorted([self.rids[5], self.rids[106], self.rids[207]]))
+        expected = sorted(rid for i, rid in enumerate(self.rids) if 10 <= i % 101 <= 12)
+        self.assertEqual(self.index.range_query(10, 12), expected)
+        self.assertEqual(self.index.point_query(500), [])
+
+    def test_update_and_delete(self):
+        self.index.update(100, self.rids[5])
+        self.assertNotIn(self.rids[5], self.index.point_query(5))
+        self.assertIn(self.rids[5], self.index.point_query(100))
+        self.assertFalse(self.index.delete(5, self.rids[5]))
+        for i in (5, 106, 207):
+            self.index.delete(100 if i == 5 else 5, self.rids[i])
+        self.assertFalse(self.index.contains(5))
+        self.assertNotIn(5, self.index.sorted_keys)
+
+    def test_and_or_count(self):
+        low = self.index.range_bitmap(0, 50)
+        ones_and_fours = self.index.bitmap(1) | self.index.bitmap(4)
+        self.assertEqual(len(low & ones_and_fours), len([i for i in range(300) if i % 101 in (1, 4)]))
+        self.assertEqual((low | ones_and_fours).rids(), self.index.range_query(0, 50))
+
+    def test_version_query(self):
+        self.index.save_version(self.rids[1])
+        self.index.update(7, self.rids[1])
+        self.assertIn(self.rids[1], self.index.version_query(1, -1))
+        self.assertIn(self.rids[1], self.index.version_query(7, 0))
+
+
+class TestSelectWhere(TableTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.table.index.create_index(1, bitmap=True)
+        self.rows = {key: [key, key % 5, key % 7] for key in range(600)}
+        for row in self.rows.values():
+            self.query.insert(*row)
+        self.update(10, [None, 4, None])
+        self.update(11, [None, None, 6])
+        self.query.delete(12)
+        del self.rows[12]
+
+    def select_where(self, conditions, match_all=True) -> list[int]:
+        #The primary keys of the records selected by select_where
+        return sorted(record.columns[0] for record in self.query.select_where(conditions, [1, 0, 0], match_all))
+
+    def expected(self, conditions, match_all=True) -> list[int]:
+        #The primary keys of the rows matching the conditions
+        def test(row, col, condition):
+            low, high = condition if isinstance(condition, tuple) else (condition, condition)
+            return low <= row[col] <= high
+        combine = all if match_all else any
+        return sorted(key for key, row in self.rows.items() if combine(test(row, col, condition) for col, condition in conditions.items()))
+
+    def test_bitmap_and_scanned_conditions(self):
+        for conditions in ({1: 4}, {1: (1, 2)}, {1: 4, 2: 6}, {1: (0, 1), 2: (5, 6)}, {0: (5, 30), 1: 2}):
+            self.assertEqual(self.select_where(conditions), self.expected(conditions), conditions)
+            self.assertEqual(self.select_where(conditions, False), self.expected(conditions, False), conditions)
+            self.assertEqual(self.table.index.count_where(conditions), len(self.expected(conditions)), conditions)
+        with self.assertRaises(ValueError):
+            self.table.index.locate_where({})
+
+    def test_bitmap_reopened(self):
+        self.reopen()
+        self.assertIsInstance(self.table.index.indices[1], BitmapIndex)
+        self.assertEqual(self.select_where({1: 4}), self.expected({1: 4}))
+
+
+# run unit tests
+if __name__ == '__main__':
+    unittest.main()
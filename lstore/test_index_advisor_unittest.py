@@ -0,0 +1,90 @@
+from lstore.db import Database
+from lstore.query import Query
+from lstore.index_advisor import IndexAdvisor
+from lstore.table_test_case import TableTestCase
+
+# import necessary libraries for unit testing
+import unittest
+import threading
+import time
+
+
+class TestIndexAdvisor(TableTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # advise every 20 operations
+        self.advisor = IndexAdvisor(self.table.index, interval=20)
+        self.table.index.advisor = self.advisor
+        for key in range(200):
+            self.query.insert(key, key % 10, key)
+
+    def tearDown(self):
+        for thread in self.advisor.builds.values():
+            thread.join()
+        super().tearDown()
+
+    def test_unindexed_column_is_scanned(self):
+        self.table.index.advisor = None
+        self.assertIsNone(self.table.index.indices[1])
+        self.query.update(13, None, 42, None)
+        self.assertEqual(sorted(record.columns[0] for record in self.query.select(3, 1, [1, 0, 0])), [key for key in range(3, 200, 10) if key != 13])
+        self.assertEqual([record.columns[0] for record in self.query.select(42, 1, [1, 0, 0])], [13])
+        self.assertEqual([record.columns[0] for record in self.query.select_version(42, 1, [1, 0, 0], -1)], [])
+        self.assertEqual(len(self.query.select_version(3, 1, [1, 0, 0], -1)), 20)
+        self.assertIsNone(self.table.index.indices[1])
+
+    def test_searched_column_gets_an_index(self):
+        for n in range(20):
+            # every select counts as a read of column 1
+            self.assertEqual(len(self.query.select(n % 10, 1, [1, 1, 1])), 20)
+        self.assertIn(1, self.advisor.builds)
+        self.advisor.builds[1].join()
+        self.assertIsNotNone(self.table.index.indices[1])
+        self.assertIsNone(self.table.index.indices[2])
+        self.assertEqual(len(self.query.select(5, 1, [1, 1, 1])), 20)
+
+    def test_written_column_loses_its_index(self):
+        self.table.index.create_index(2)
+        # 200 inserts count as writes of every column, only updates follow
+        self.advisor.reads = [0] * 3
+        self.advisor.writes = [0] * 3
+        for key in range(200):
+            self.query.update(key, None, None, key + 1)
+        self.assertIsNone(self.table.index.indices[2])
+        # the primary key is always kept
+        self.assertIsNotNone(self.table.index.indices[0])
+        self.assertEqual([record.columns[0] for record in self.query.select(51, 2, [1, 0, 0])], [50])
+
+    def test_close_during_build(self):
+        read_versions = self.table.get_column_versions
+
+        def slow_read_versions(*args, **kwargs):
+            #Builds run outside the main thread, slow them down so the database is closed while they run
+            if threading.current_thread() is not threading.main_thread():
+                time.sleep(0.5)
+            return read_versions(*args, **kwargs)
+
+        self.table.get_column_versions = slow_read_versions
+        for n in range(20):
+            self.query.select(n % 10, 1, [1, 1, 1])
+        # one build started by the advisor, one by the user
+        self.assertTrue(self.advisor.builds[1].is_alive())
+        self.table.index.create_index(2, background=True)
+        self.db.close()
+        self.assertIsNotNone(self.table.index.indices[1])
+        self.assertIsNotNone(self.table.index.indices[2])
+        db = Database()
+        db.open(self.directory.name)
+        table = db.get_table("grades")
+        table.index.advisor = None
+        # both indices were saved and loaded
+        self.assertIsNotNone(table.index.indices[1])
+        self.assertIsNotNone(table.index.indices[2])
+        self.assertEqual(sorted(record.columns[0] for record in Query(table).select(4, 1, [1, 0, 0])), list(range(4, 200, 10)))
+        self.assertEqual([record.columns[0] for record in Query(table).select(8, 2, [1, 0, 0])], [8])
+
+
+# run unit tests
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+from lstore.query import Query
+from lstore.table_test_case import TableTestCase
+
+# import necessary libraries for unit testing
+import unittest
+
+
+class TestInsertMany(TableTestCase):
+
+    def test_duplicate_keys(self):
+        self.query.insert(1, 10, 10)
+        results = self.query.insert_many([[0, 0, 0], [1, 1, 1], [2, 2, 2], [2, 3, 3], [3, 4, 4]])
+        # key 1 is already in the table, the second key 2 repeats one earlier in the batch
+        self.assertEqual(results, [True, False, True, False, True])
+        self.assertEqual(self.query.select(1, 0, [1, 1, 1])[0].columns, [1, 10, 10])
+        self.assertEqual(self.query.select(2, 0, [1, 1, 1])[0].columns, [2, 2, 2])
+        self.assertEqual(self.table.statistics.row_count, 4)
+
+    def test_malformed_rows(self):
+        with self.assertRaises(ValueError):
+            self.query.insert_many([[0, 0, 0], [None, 1, 1]])
+        with self.assertRaises(ValueError):
+            self.query.insert_many([[0, 0, 0], [1, 1]])
+        # nothing is written when a row is malformed
+        self.assertEqual(self.query.select(0, 0, [1, 1, 1]), [])
+        self.assertEqual(self.query.insert_many([]), [])
+
+    def test_rows_spanning_page_rows(self):
+        # 512 records fit a page, start part way into one and fill several more
+        self.query.insert_many([[key, key, key + 5] for key in range(100)])
+        rows = [[key, key * 2, key % 7] for key in range(100, 2000)]
+        self.assertEqual(self.query.insert_many(rows), [True] * len(rows))
+        self.assertEqual(self.table.current_base_page_number, 3)
+        other = Query(self.create_table("other", 3))
+        for row in [[key, key, key + 5] for key in range(100)] + rows:
+            other.insert(*row)
+        for key in range(0, 2000, 37):
+            record = self.query.select(key, 0, [1, 1, 1])[0]
+            self.assertEqual(record.columns, other.select(key, 0, [1, 1, 1])[0].columns)
+            self.assertEqual(record.rid, other.select(key, 0, [1, 1, 1])[0].rid)
+        self.assertEqual(self.query.sum(0, 1999, 1), other.sum(0, 1999, 1))
+        # records inserted together can be updated and deleted one by one
+        self.query.update(600, None, 1, None)
+        self.query.delete(601)
+        self.assertEqual(self.query.select(600, 0, [0, 1, 0])[0].columns, [None, 1, None])
+        self.assertEqual(self.query.select(601, 0, [1, 1, 1]), [])
+
+    def test_saved_and_reopened(self):
+        # pages of new page rows are only written to disk when evicted or saved
+        self.query.insert_many([[key, key % 9, key * 3] for key in range(1500)])
+        self.query.update(700, None, 100, None)
+        self.reopen()
+        self.assertEqual(self.table.current_base_page_number, 2)
+        self.assertEqual(self.query.select(700, 0, [1, 1, 1])[0].columns, [700, 100, 2100])
+        self.assertEqual(self.query.sum(0, 1499, 2), sum(key * 3 for key in range(1500)))
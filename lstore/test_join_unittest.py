@@ -0,0 +1,95 @@
+from lstore.table_test_case import TableTestCase
+from lstore.query import Query
+import lstore.join
+
+# import necessary libraries for unit testing
+import unittest
+from unittest import mock
+
+
+class TestJoin(TableTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # a large table over several page rows and a small one, both with duplicate join values in column 1
+        self.large = self.create_table("large", 3)
+        self.small = self.create_table("small", 3)
+        self.large_rows: dict[int, list[int]] = {key: [key, key % 40, key * 2] for key in range(1500)}
+        self.small_rows: dict[int, list[int]] = {key: [key, key % 25, key + 7] for key in range(0, 60)}
+        for table, rows in ((self.large, self.large_rows), (self.small, self.small_rows)):
+            Query(table).insert_many([list(row) for row in rows.values()])
+        # join values changed by tail records, and deleted records
+        self.update(3, [None, 1000, None], self.large, self.large_rows)
+        self.update(4, [None, 7, 5], self.large, self.large_rows)
+        self.update(9, [None, 1000, None], self.small, self.small_rows)
+        self.update(10, [90, None, None], self.small, self.small_rows)
+        for table, rows, key in ((self.large, self.large_rows, 5), (self.small, self.small_rows, 11)):
+            Query(table).delete(key)
+            del rows[key]
+
+    def expected(self, left_rows, right_rows, left_col: int, right_col: int, left_mask: list[int], right_mask: list[int]) -> list[list[int]]:
+        #The joined rows computed from the rows, sorted
+        joined = []
+        for left in left_rows.values():
+            for right in right_rows.values():
+                if left[left_col] == right[right_col]:
+                    joined.append([v for v, m in zip(left, left_mask) if m] + [v for v, m in zip(right, right_mask) if m])
+        return sorted(joined)
+
+    def assert_joins_match(self) -> None:
+        #Join both ways round, over key and non key columns, with every kind of projection
+        for left, right, left_rows, right_rows in ((self.large, self.small, self.large_rows, self.small_rows),
+                                                  (self.small, self.large, self.small_rows, self.large_rows)):
+            for left_col, right_col in ((1, 1), (1, 0), (0, 1)):
+                for left_mask, right_mask in (([1, 1, 1], [1, 1, 1]), ([0, 0, 1], [1, 0, 0]), ([0, 0, 0], [0, 1, 0]),
+                                              ([1, 0, 0], [0, 0, 0]), ([0, 0, 0], [0, 0, 0])):
+                    found = sorted(Query(left).join(right, left_col, right_col, (left_mask, right_mask)))
+                    self.assertEqual(found, self.expected(left_rows, right_rows, left_col, right_col, left_mask, right_mask),
+                                     (left.name, left_col, right_col, left_mask, right_mask))
+
+    def test_hash_join(self):
+        self.assertFalse(self.large.index.is_indexed(1) or self.small.index.is_indexed(1))
+        with mock.patch("lstore.join._hash_join", wraps=lstore.join._hash_join) as hash_join:
+            found = list(Query(self.large).join(self.small, 1, 1, ([1, 0, 0], [1, 0, 0])))
+            # the smaller table is built, on either side
+            self.assertFalse(hash_join.call_args.kwargs["build_is_left"])
+            found_swapped = list(Query(self.small).join(self.large, 1, 1, ([1, 0, 0], [1, 0, 0])))
+            self.assertTrue(hash_join.call_args.kwargs["build_is_left"])
+        self.assertEqual(sorted(found), sorted(row[1:] + row[:1] for row in found_swapped))
+        # duplicate join values on both sides give every pair
+        self.assertEqual(len(found), len(self.expected(self.large_rows, self.small_rows, 1, 1, [1, 0, 0], [1, 0, 0])))
+        self.assertGreater(len(found), len(self.large_rows) // 2)
+        self.assertIn([3, 9], found)
+        self.assertNotIn([5, 5], found)
+        self.assert_joins_match()
+
+    def test_index_nested_loop(self):
+        # index on the small table's join column, the large table is scanned
+        self.small.index.create_index(1)
+        with mock.patch("lstore.join._index_nested_loop", wraps=lstore.join._index_nested_loop) as index_nested_loop:
+            list(Query(self.large).join(self.small, 1, 1, ([1, 1, 1], [1, 1, 1])))
+            self.assertTrue(index_nested_loop.call_args.kwargs["outer_is_left"])
+            list(Query(self.small).join(self.large, 1, 1, ([1, 1, 1], [1, 1, 1])))
+            self.assertFalse(index_nested_loop.call_args.kwargs["outer_is_left"])
+        self.assert_joins_match()
+        # both indexed, the smaller table is scanned
+        self.large.index.create_index(1)
+        with mock.patch("lstore.join._index_nested_loop", wraps=lstore.join._index_nested_loop) as index_nested_loop:
+            list(Query(self.large).join(self.small, 1, 1, ([1, 1, 1], [1, 1, 1])))
+            self.assertFalse(index_nested_loop.call_args.kwargs["outer_is_left"])
+        self.assert_joins_match()
+        # records changed after the index was created
+        self.update(12, [None, 3, None], self.small, self.small_rows)
+        self.update(6, [None, 12, None], self.large, self.large_rows)
+        Query(self.small).delete(13)
+        del self.small_rows[13]
+        self.assert_joins_match()
+
+    def test_malformed_projection(self):
+        with self.assertRaises(ValueError):
+            list(Query(self.large).join(self.small, 1, 1, ([1, 1], [1, 1, 1])))
+
+
+# run unit tests
+if __name__ == '__main__':
+    unittest.main()
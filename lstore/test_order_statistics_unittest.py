@@ -0,0 +1,53 @@
+from lstore.bplus_tree import BPlusTree
+from lstore.hashtable_index import HashtableIndex, RID
+from lstore.compact_index import CompactHashtableIndex
+
+# import necessary libraries for unit testing
+import unittest
+import random
+
+
+class TestOrderStatistics(unittest.TestCase):
+
+    def check(self, index, values: dict[RID, int]) -> None:
+        # compare count_range, rank and select_kth with the sorted current values
+        ordered = sorted(values.values())
+        for start, end in [(0, 100), (10, 20), (30, 30), (150, 200)]:
+            self.assertEqual(index.count_range(start, end), sum(start <= value <= end for value in ordered))
+        for key in [0, 1, 50, 99, 150]:
+            self.assertEqual(index.rank(key), sum(value < key for value in ordered))
+        for k in range(0, len(ordered), 37):
+            self.assertEqual(index.select_kth(k), ordered[k])
+        with self.assertRaises(IndexError):
+            index.select_kth(len(ordered))
+
+    def run_workload(self, index, update) -> None:
+        rng = random.Random(7)
+        values: dict[RID, int] = {}
+        for n in range(1000):
+            rid = RID(n)
+            values[rid] = rng.randrange(100)
+            index.insert(values[rid], rid)
+        self.check(index, values)
+        for rid in rng.sample(sorted(values), 300):
+            new_value = rng.randrange(100)
+            update(index, rid, values[rid], new_value)
+            values[rid] = new_value
+        for rid in rng.sample(sorted(values), 200):
+            index.delete(values.pop(rid), rid)
+        self.check(index, values)
+
+    def test_bplus_tree(self):
+        for degree in (3, 4, 16):
+            self.run_workload(BPlusTree(max_degree=degree), lambda index, rid, old, new: index.update(new, old, rid))
+
+    def test_hashtable_index(self):
+        self.run_workload(HashtableIndex(), lambda index, rid, old, new: index.update(new, rid))
+
+    def test_compact_index(self):
+        self.run_workload(CompactHashtableIndex(), lambda index, rid, old, new: index.update(new, rid))
+
+
+# run unit tests
+if __name__ == '__main__':
+    unittest.main()
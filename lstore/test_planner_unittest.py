@@ -0,0 +1,75 @@
+from lstore.table_test_case import TableTestCase
+from lstore.planner import INDEX_LOOKUP, INDEX_RANGE, SCAN
+import lstore.config as config
+
+# import necessary libraries for unit testing
+import unittest
+from unittest import mock
+
+
+class TestPlanner(TableTestCase):
+    num_columns = 4
+
+    def setUp(self):
+        super().setUp()
+        self.planner = self.table.planner
+        # column 1 has two values, column 2 a distinct value per record, column 3 is not indexed
+        self.query.insert_many([[key, key % 2, key + 10000, key % 100] for key in range(3000)])
+        self.table.index.create_index(1)
+        self.table.index.create_index(2)
+
+    def test_plan_methods(self):
+        # a primary key value is always looked up
+        self.assertEqual(self.planner.plan(0, 5, 5).method, INDEX_LOOKUP)
+        self.assertEqual(self.planner.plan(0, 5, 5).estimated_rows, 1)
+        # a rare value is looked up, a common one is scanned
+        self.assertEqual(self.planner.plan(2, 10005, 10005).method, INDEX_LOOKUP)
+        self.assertEqual(self.planner.plan(1, 1, 1).method, SCAN)
+        # a narrow range uses the index, a wide one is scanned
+        self.assertEqual(self.planner.plan(0, 100, 150).method, INDEX_RANGE)
+        self.assertEqual(self.planner.plan(2, 10100, 10150).method, INDEX_RANGE)
+        self.assertEqual(self.planner.plan(0, 0, 2000).method, SCAN)
+        # records read grouped by page are cheaper, so a wider range uses the index
+        self.assertEqual(self.planner.plan(0, 0, 2000, batched=True).method, INDEX_RANGE)
+        # an unindexed column is always scanned
+        self.assertEqual(self.planner.plan(3, 5, 5).method, SCAN)
+        self.assertEqual(self.planner.plan(3, 5, 6).method, SCAN)
+        plan = self.planner.plan(0, 100, 150)
+        self.assertAlmostEqual(plan.estimated_rows, 51, delta=15)
+        self.assertEqual(plan.cost, plan.estimated_rows * config.PLANNER_RECORD_COST)
+
+    def test_plans_follow_writes(self):
+        self.assertEqual(self.planner.plan(2, 14000, 22499).method, INDEX_RANGE)
+        # once most records of column 2 are moved into the range, it is scanned
+        self.query.update_many([(key, [None, None, key + 20000, None]) for key in range(2500)])
+        stats = self.planner.get_statistics(2)
+        # the min is widened by writes but never narrowed
+        self.assertEqual((stats.row_count, stats.min_value, stats.max_value), (3000, 10000, 22499))
+        self.assertEqual(self.planner.plan(2, 14000, 22499).method, SCAN)
+        self.assertEqual(self.planner.plan(2, 12990, 12999).method, INDEX_RANGE)
+
+    def test_without_planner(self):
+        with mock.patch.object(config, "QUERY_USE_PLANNER", False):
+            self.assertEqual(self.planner.plan(1, 1, 1).method, INDEX_LOOKUP)
+            self.assertEqual(self.planner.plan(0, 0, 2000).method, INDEX_RANGE)
+            # there is no index to use on an unindexed column
+            self.assertEqual(self.planner.plan(3, 5, 5).method, SCAN)
+            without = ([record.columns for record in self.query.select(1, 1, [1, 1, 1, 1])], self.query.sum(0, 2000, 3))
+        # the plan changes how records are found, not which ones
+        self.assertEqual(sorted(without[0]), sorted(record.columns for record in self.query.select(1, 1, [1, 1, 1, 1])))
+        self.assertEqual(len(without[0]), 1500)
+        self.assertEqual(without[1], self.query.sum(0, 2000, 3))
+
+    def test_explain(self):
+        self.assertEqual(self.query.explain(0, 5), str(self.planner.plan(0, 5, 5)))
+        self.assertTrue(self.query.explain(0, 5).startswith(f"{INDEX_LOOKUP} on column 0 = 5"))
+        self.assertTrue(self.query.explain(1, 1).startswith(f"{SCAN} on column 1 = 1"))
+        # a range is explained as sum reads it, grouped by page, and may be given in either order
+        self.assertEqual(self.query.explain(0, 150, 100), str(self.planner.plan(0, 100, 150, batched=True)))
+        self.assertTrue(self.query.explain(0, 150, 100).startswith(f"{INDEX_RANGE} on column 0 in [100, 150]"))
+        self.assertTrue(self.query.explain(3, 0, 10).startswith(SCAN))
+
+
+# run unit tests
+if __name__ == '__main__':
+    unittest.main()
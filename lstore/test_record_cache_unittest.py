@@ -0,0 +1,122 @@
+from lstore.table_test_case import TableTestCase
+from lstore.record_cache import RecordCache
+from lstore.config import FIXED_PARTIAL_RECORD_SIZE
+
+# import necessary libraries for unit testing
+import unittest
+
+
+class TestRecordCache(unittest.TestCase):
+
+    def setUp(self):
+        # room for 3 records of 2 columns
+        self.cache = RecordCache(2, budget=3 * 2 * FIXED_PARTIAL_RECORD_SIZE)
+        for rid in range(3):
+            self.cache.put(rid, [rid, rid * 10])
+
+    def test_least_recently_used_is_evicted(self):
+        self.assertEqual(self.cache.get(0), [0, 0])
+        self.cache.put(3, [3, 30])
+        self.assertIsNone(self.cache.peek(1))
+        self.assertEqual(self.cache.peek(0), [0, 0])
+        self.assertEqual(len(self.cache.rows), 3)
+
+    def test_update_and_evict(self):
+        self.cache.update(2, [None, 99])
+        self.assertEqual(self.cache.get(2), [2, 99])
+        # records not cached stay uncached
+        self.cache.update(7, [7, 7])
+        self.assertIsNone(self.cache.peek(7))
+        self.cache.evict(2)
+        self.assertIsNone(self.cache.get(2))
+
+    def test_counters(self):
+        self.cache.get(0)
+        self.cache.get(1)
+        self.cache.get(5)
+        self.cache.peek(6)
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["size"], stats["capacity"]), (2, 1, 3, 3))
+
+    def test_zero_budget_disables_cache(self):
+        cache = RecordCache(2, budget=0)
+        cache.put(1, [1, 1])
+        self.assertIsNone(cache.get(1))
+
+
+class TestTableRecordCache(TableTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.rows = {key: [key, key % 9, 0] for key in range(600)}
+        self.query.insert_many([list(row) for row in self.rows.values()])
+        # read every record once, so they are all cached
+        for key in self.rows:
+            self.query.select(key, 0, [1, 1, 1])
+
+    def rid_of(self, key: int) -> int:
+        return self.table.index.locate(0, key)[0]
+
+    def assert_cache_matches(self) -> None:
+        #Every cached record holds its latest values, and reads agree with the rows
+        for key, row in self.rows.items():
+            cached = self.table.record_cache.peek(self.rid_of(key))
+            if cached is not None:
+                self.assertEqual(cached, row, key)
+            self.assertEqual(self.query.select(key, 0, [1, 1, 1])[0].columns, row, key)
+            self.assertEqual(self.query.select(key, 0, [0, 1, 0])[0].columns, [None, row[1], None], key)
+
+    def test_cached_records_follow_writes(self):
+        self.assertEqual(self.table.record_cache.stats()["size"], 600)
+        self.update(3, [None, 50, None])
+        self.query.update_many([(key, [None, None, key]) for key in range(0, 600, 7)] + [(14, [None, 1, None])])
+        for key in range(0, 600, 7):
+            self.rows[key][2] = key
+        self.rows[14][1] = 1
+        # a primary key change keeps the record cached under its base RID
+        rid = self.rid_of(5)
+        self.update(5, [5000, None, None])
+        self.assertEqual(self.table.record_cache.peek(rid), [5000, 5, 0])
+        self.assertEqual(self.query.select(5, 0, [1, 1, 1]), [])
+        # a delete evicts the record
+        rid = self.rid_of(6)
+        self.query.delete(6)
+        del self.rows[6]
+        self.assertIsNone(self.table.record_cache.peek(rid))
+        self.assertIs(self.table.locate_record(rid, 0, [1, 1, 1]), False)
+        self.assertIsNone(self.table.record_cache.peek(rid))
+        self.assert_cache_matches()
+
+    def test_uncached_records_are_read_from_pages(self):
+        self.table.record_cache.clear()
+        self.update(3, [None, 50, None])
+        self.query.update_many([(key, [None, None, 1]) for key in range(10)])
+        for key in range(10):
+            self.rows[key][2] = 1
+        self.update(8, [800, None, None])
+        # records read by the updates are cached, the others are not
+        self.assertIsNone(self.table.record_cache.peek(self.rid_of(500)))
+        self.assert_cache_matches()
+        self.assertEqual(self.table.record_cache.peek(self.rid_of(3)), [3, 50, 1])
+
+    def test_update_during_miss_is_not_cached(self):
+        self.table.record_cache.clear()
+        rid = self.rid_of(10)
+        read_record = self.table._Table__locate_record
+        def read_then_update(*args):
+            # an update lands after the record was read, before it is cached
+            record = read_record(*args)
+            self.table._Table__locate_record = read_record
+            self.query.update(10, None, 77, None)
+            return record
+        self.table._Table__locate_record = read_then_update
+        # the miss returns the values it read, but does not cache them
+        self.assertEqual(self.table.locate_record(rid, 0, [1, 1, 1]).columns, [10, 1, 0])
+        self.assertIsNone(self.table.record_cache.peek(rid))
+        self.assertEqual(self.query.select(10, 0, [1, 1, 1])[0].columns, [10, 77, 0])
+        self.assertEqual(self.table.record_cache.peek(rid), [10, 77, 0])
+
+
+# run unit tests
+if __name__ == '__main__':
+    unittest.main()
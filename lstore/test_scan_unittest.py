@@ -0,0 +1,97 @@
+from lstore.table_test_case import TableTestCase
+
+# import necessary libraries for unit testing
+import unittest
+
+
+class TestScan(TableTestCase):
+    num_columns = 4
+    # cumulative tail records, overridden to run the same tests on non-cumulative ones
+    table_options: dict = {"cumulative_tails": True}
+
+    def setUp(self):
+        super().setUp()
+        # records over several page rows, the current values are kept in rows
+        self.rows = {key: [key, key % 10, key, 0] for key in range(1500)}
+        self.query.insert_many([list(row) for row in self.rows.values()])
+        # tail records spread over columns, one value moved far outside its base page's zone and a moved primary key
+        for key in range(0, 1500, 6):
+            self.update(key, [None, None, None, key + 1])
+        for key in range(0, 1500, 9):
+            self.update(key, [None, (key % 10) + 20, None, None])
+        self.update(3, [None, None, 5000, None])
+        self.update(11, [3000, None, None, None])
+        for key in (4, 513, 1499):
+            self.query.delete(key)
+            del self.rows[key]
+
+    def scan(self, column_mask: list[int], predicate=None) -> dict[int, list[int | None]]:
+        #The scanned records, by primary key (read from the records' RIDs so the key need not be projected)
+        found = {}
+        for record in self.table.scan(column_mask, predicate):
+            key = self.table.locate_record(record.rid, 0, [1, 0, 0, 0]).columns[0]
+            self.assertNotIn(key, found)
+            found[key] = record.columns
+        return found
+
+    def expected(self, column_mask: list[int], test) -> dict[int, list[int | None]]:
+        #The rows matching test, with the columns not in column_mask set to None
+        return {key: [value if projected else None for value, projected in zip(row, column_mask)] for key, row in self.rows.items() if test(row)}
+
+    def test_full_scan_and_projection(self):
+        self.assertEqual(self.scan([1, 1, 1, 1]), self.expected([1, 1, 1, 1], lambda row: True))
+        self.assertEqual(self.scan([0, 1, 0, 1]), self.expected([0, 1, 0, 1], lambda row: True))
+        # deleted records are not returned
+        found = self.scan([1, 0, 0, 0])
+        self.assertNotIn(4, found)
+        self.assertNotIn(1499, found)
+        self.assertIn(3000, found)
+        self.assertNotIn(11, found)
+
+    def test_function_predicates(self):
+        # predicate columns need not be projected
+        found = self.scan([1, 0, 0, 1], {1: lambda value: value >= 20})
+        self.assertEqual(found, self.expected([1, 0, 0, 1], lambda row: row[1] >= 20))
+        # 513 was deleted
+        self.assertEqual(len(found), len(range(0, 1500, 9)) - 1)
+        found = self.scan([1, 1, 1, 1], {1: lambda value: value % 2 == 1, 3: lambda value: value > 0})
+        self.assertEqual(found, self.expected([1, 1, 1, 1], lambda row: row[1] % 2 == 1 and row[3] > 0))
+        self.assertEqual(self.scan([1, 1, 1, 1], {2: lambda value: False}), {})
+
+    def test_range_predicates(self):
+        for predicate, test in (({2: (600, 700)}, lambda row: 600 <= row[2] <= 700),
+                                ({2: (4900, 5100)}, lambda row: 4900 <= row[2] <= 5100),
+                                ({0: (2900, 3100)}, lambda row: 2900 <= row[0] <= 3100),
+                                ({0: (0, 100), 1: (20, 29)}, lambda row: row[0] <= 100 and 20 <= row[1] <= 29),
+                                ({1: (0, 9), 2: lambda value: value < 50}, lambda row: row[1] <= 9 and row[2] < 50)):
+            self.assertEqual(self.scan([1, 1, 1, 1], predicate), self.expected([1, 1, 1, 1], test), predicate)
+        # values moved out by tail records are not matched at their old value
+        self.assertEqual(self.scan([1, 0, 0, 0], {2: (3, 3)}), {})
+        self.assertEqual(self.scan([1, 0, 0, 0], {0: (11, 11)}), {})
+        self.assertEqual(list(self.scan([1, 0, 0, 0], {2: (5000, 5000)})), [3])
+
+    def test_batch_matches_records(self):
+        for column_mask, predicate in (([1, 1, 1, 1], None), ([0, 1, 0, 1], {2: (100, 900)}), ([1, 0, 0, 0], {1: lambda value: value > 20})):
+            records = list(self.table.scan(column_mask, predicate))
+            batches = list(self.table.scan(column_mask, predicate, batch=True))
+            self.assertGreater(len(batches), 1)
+            rids = []
+            for batch_rids, columns in batches:
+                self.assertEqual(len(columns), 4)
+                for i, projected in enumerate(column_mask):
+                    if projected:
+                        self.assertEqual(len(columns[i]), len(batch_rids))
+                    else:
+                        self.assertIsNone(columns[i])
+                for n, rid in enumerate(batch_rids):
+                    rids.append((rid, [column[n] if column is not None else None for column in columns]))
+            self.assertEqual(rids, [(record.rid, record.columns) for record in records])
+
+
+class TestScanNonCumulative(TestScan):
+    table_options: dict = {"cumulative_tails": False}
+
+
+# run unit tests
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+from lstore.table_test_case import TableTestCase
+
+# import necessary libraries for unit testing
+import unittest
+import numpy as np
+
+
+class TestSelectMany(TableTestCase):
+    num_columns = 4
+    # cumulative tail records, overridden to run the same tests on non-cumulative ones
+    table_options: dict = {"cumulative_tails": True}
+
+    def setUp(self):
+        super().setUp()
+        # records over several page rows, some with tail records, a moved primary key and deleted records
+        self.query.insert_many([[key, key % 10, key * 2, 0] for key in range(1500)])
+        self.query.update_many([(key, [None, None, None, key]) for key in range(0, 1500, 4)])
+        self.query.update(9, None, 3, None, None)
+        self.query.update(17, 2000, None, None, None)
+        for key in (20, 21, 700):
+            self.query.delete(key)
+
+    def select_each(self, search_keys: list[int], search_key_index: int, projected: list[int]) -> list[tuple[int, list[int]]]:
+        #The records found by selecting each key on its own
+        return [(record.rid, record.columns) for key in search_keys for record in self.query.select(key, search_key_index, projected)]
+
+    def test_matches_per_key_select(self):
+        keys = list(range(0, 1500, 13)) + [2000, 17, 20, 700, 5000]
+        for projected in ([1, 1, 1, 1], [0, 1, 0, 1]):
+            records = self.query.select_many(keys, 0, projected)
+            self.assertEqual([(record.rid, record.columns) for record in records], self.select_each(keys, 0, projected))
+        # missing and deleted keys are left out
+        found = {record.columns[0] for record in self.query.select_many([17, 20, 21, 700, 5000, 2000], 0, [1, 0, 0, 0])}
+        self.assertEqual(found, {2000})
+        self.assertEqual(self.query.select_many([], 0, [1, 1, 1, 1]), [])
+
+    def test_duplicate_keys(self):
+        keys = [5, 5, 6, 5]
+        records = self.query.select_many(keys, 0, [1, 1, 1, 1])
+        self.assertEqual([record.columns[0] for record in records], keys)
+        self.assertEqual([(record.rid, record.columns) for record in records], self.select_each(keys, 0, [1, 1, 1, 1]))
+
+    def test_unindexed_column(self):
+        self.assertIsNone(self.table.index.indices[1])
+        values = [3, 7, 3, 11]
+        records = self.query.select_many(values, 1, [1, 1, 0, 1])
+        self.assertEqual(sorted((record.rid, record.columns) for record in records), sorted(self.select_each(values, 1, [1, 1, 0, 1])))
+        # record 9 moved into value 3, and the key of a record with value 7 moved
+        threes = [record.columns[0] for record in records if record.columns[1] == 3]
+        self.assertEqual(sorted(threes), sorted(2 * (list(range(3, 1500, 10)) + [9])))
+        self.assertIn(2000, [record.columns[0] for record in records if record.columns[1] == 7])
+        self.assertEqual(self.query.select_many([11], 1, [1, 1, 1, 1]), [])
+        # the same results once the column is indexed
+        self.table.index.create_index(1)
+        indexed = self.query.select_many(values, 1, [1, 1, 0, 1])
+        self.assertEqual(sorted((record.rid, record.columns) for record in indexed), sorted((record.rid, record.columns) for record in records))
+
+    def test_columnar(self):
+        keys = [2, 4, 17, 2000, 20, 5000, 8]
+        columns = self.query.select_many(keys, 0, [1, 0, 1, 1], columnar=True)
+        records = self.query.select_many(keys, 0, [1, 0, 1, 1])
+        self.assertEqual(len(columns), 4)
+        self.assertIsNone(columns[1])
+        for i in (0, 2, 3):
+            self.assertIsInstance(columns[i], np.ndarray)
+            self.assertEqual(columns[i].dtype, np.uint64)
+            self.assertEqual(columns[i].tolist(), [record.columns[i] for record in records])
+        self.assertEqual(columns[0].tolist(), [2, 4, 2000, 8])
+        self.assertEqual(columns[3].tolist(), [0, 4, 0, 8])
+        # no records found
+        self.assertEqual([column.tolist() for column in self.query.select_many([5000], 0, [1, 1, 1, 1], columnar=True)], [[], [], [], []])
+
+    def test_locate_records(self):
+        rids = [self.table.index.locate(0, key)[0] for key in (0, 1, 2000, 1499, 30)]
+        rids.append(rids[0])
+        found = self.table.locate_records(rids, [0, 1, 1, 0])
+        self.assertEqual(found, [self.table.locate_record(rid, 0, [0, 1, 1, 0]).columns for rid in rids])
+        self.assertEqual(found[2], [None, 7, 34, None])
+        # deleted records are None
+        self.query.delete(30)
+        self.assertIsNone(self.table.locate_records(rids, [1, 1, 1, 1])[4])
+        # cached records are read from the cache
+        self.table.locate_record(rids[1], 0, [1, 1, 1, 1])
+        self.assertEqual(self.table.locate_records(rids[:2], [1, 0, 0, 1]), [[0, None, None, 0], [1, None, None, 0]])
+
+
+class TestSelectManyNonCumulative(TestSelectMany):
+    table_options: dict = {"cumulative_tails": False}
+
+
+# run unit tests
+if __name__ == '__main__':
+    unittest.main()
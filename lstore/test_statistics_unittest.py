@@ -0,0 +1,104 @@
+from lstore.statistics import HyperLogLog, TableStatistics, SEEN_LIMIT
+
+# import necessary libraries for unit testing
+import unittest
+import random
+import tempfile
+
+
+class TestHyperLogLog(unittest.TestCase):
+
+    def test_small_and_large_counts(self):
+        for count in (10, 1000, 100000):
+            sketch = HyperLogLog()
+            for value in range(count):
+                # every value twice, repeats do not count
+                sketch.add(value * 7919)
+                sketch.add(value * 7919)
+            self.assertLess(abs(sketch.estimate() - count), 0.05 * count + 1)
+
+    def test_add_many_bounds_seen(self):
+        batches = [list(range(SEEN_LIMIT - 10)), list(range(SEEN_LIMIT, SEEN_LIMIT + 100)), list(range(100000, 150000)), list(range(50))]
+        sketch = HyperLogLog()
+        single = HyperLogLog()
+        for values in batches:
+            sketch.add_many(values)
+            # values past the limit are still added, only not remembered
+            self.assertLessEqual(len(sketch.seen), SEEN_LIMIT)
+            for value in values:
+                single.add(value)
+        self.assertEqual(len(sketch.seen), SEEN_LIMIT)
+        self.assertEqual(sketch.registers, single.registers)
+
+
+class TestTableStatistics(unittest.TestCase):
+
+    def setUp(self):
+        # column 0 is a counting key, column 1 has 10 values, column 2 is skewed
+        self.stats = TableStatistics(3, sample_size=256, buckets=8)
+        self.rng = random.Random(11)
+        self.rows: dict[int, list[int]] = {}
+        for rid in range(5000):
+            self.rows[rid] = [rid, rid % 10, int(self.rng.paretovariate(1.5))]
+        self.stats.insert_many(list(self.rows), list(self.rows.values()))
+
+    def test_counts_and_bounds(self):
+        for rid in range(100):
+            self.stats.delete(rid)
+            del self.rows[rid]
+        self.stats.update(200, [None, 99, None])
+        column = self.stats.column(1)
+        self.assertEqual(column.row_count, 4900)
+        self.assertEqual(column.tombstones, 100)
+        self.assertEqual((column.min_value, column.max_value), (0, 99))
+        self.assertEqual(column.distinct, 11)
+        self.assertEqual(len(self.stats.sample_rids), len(self.stats.sample_positions))
+        self.assertTrue(all(rid in self.rows for rid in self.stats.sample_rids))
+
+    def test_histogram_is_equi_depth(self):
+        histogram = self.stats.histogram(0)
+        self.assertEqual(len(histogram), 8)
+        self.assertAlmostEqual(sum(count for _, _, count in histogram), 5000)
+        self.assertEqual([low for low, _, _ in histogram], sorted(low for low, _, _ in histogram))
+        # ranges of the key are estimated within a few buckets' error
+        estimate = self.stats.column(0).estimate_rows(1000, 2999)
+        self.assertLess(abs(estimate - 2000), 500)
+        skewed = self.stats.column(2).estimate_rows(1, 1)
+        self.assertGreater(skewed, 0)
+
+    def test_batched_inserts_match_single_inserts(self):
+        single = TableStatistics(3, sample_size=256, buckets=8)
+        for rid, row in self.rows.items():
+            single.insert(rid, row)
+        self.assertEqual([sketch.registers for sketch in single.sketches], [sketch.registers for sketch in self.stats.sketches])
+        self.assertEqual((single.min_values, single.max_values, single.row_count),
+                         (self.stats.min_values, self.stats.max_values, self.stats.row_count))
+        # deletes then inserts refill the sample, which only ever holds live records
+        for rid in range(0, 5000, 3):
+            self.stats.delete(rid)
+            del self.rows[rid]
+        new_rows = {rid: [rid, 0, 0] for rid in range(5000, 9000)}
+        self.stats.insert_many(list(new_rows), list(new_rows.values()))
+        self.rows.update(new_rows)
+        self.assertEqual(len(self.stats.sample_rids), 256)
+        self.assertEqual(self.stats.row_count, len(self.rows))
+        self.assertTrue(all(rid in self.rows for rid in self.stats.sample_rids))
+        self.assertEqual(sorted(self.stats.sample_positions.values()), list(range(256)))
+        # new records make up about the same share of the sample as of the live records
+        new_sampled = sum(rid >= 5000 for rid in self.stats.sample_rids)
+        self.assertLess(abs(new_sampled - 256 * 4000 / len(self.rows)), 40)
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as path:
+            self.stats.save(path)
+            loaded = TableStatistics(3, sample_size=256, buckets=8)
+            self.assertTrue(loaded.load(path))
+        self.assertEqual(loaded.histogram(1), self.stats.histogram(1))
+        self.assertEqual(loaded.column(2).distinct, self.stats.column(2).distinct)
+        loaded.delete(loaded.sample_rids[0])
+        self.assertEqual(loaded.row_count, 4999)
+
+
+# run unit tests
+if __name__ == '__main__':
+    unittest.main()
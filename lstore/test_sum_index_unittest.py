@@ -0,0 +1,69 @@
+from lstore.sum_index import SumIndex
+from lstore.hashtable_index import RID
+
+# import necessary libraries for unit testing
+import unittest
+import random
+
+
+class TestSumIndex(unittest.TestCase):
+
+    def setUp(self):
+        # key in column 0, summed columns 1 and 2
+        self.index = SumIndex(0, (1, 2))
+        self.records: dict[int, list[int]] = {}
+        self.rids: dict[int, RID] = {}
+
+    def insert(self, key: int, values: list[int]) -> None:
+        rid = RID(len(self.rids))
+        self.index.insert(rid, [key] + values)
+        self.records[key] = [key] + values
+        self.rids[key] = rid
+
+    def expected(self, start: int, end: int, column: int) -> int:
+        return sum(values[column] for key, values in self.records.items() if start <= key <= end)
+
+    def test_keys_in_order(self):
+        for key in range(1000):
+            self.insert(key, [key, 1])
+        self.assertEqual(self.index.sum_range(10, 19, 1), sum(range(10, 20)))
+        self.assertEqual(self.index.sum_range(-5, 5000, 2), 1000)
+        self.assertEqual(len(self.index.pending), 0)
+
+    def test_keys_out_of_order(self):
+        keys = list(range(0, 2000, 3))
+        random.Random(4).shuffle(keys)
+        for key in keys:
+            self.insert(key, [key % 7, 2])
+        for start, end in [(0, 2000), (100, 101), (33, 999)]:
+            self.assertEqual(self.index.sum_range(start, end, 1), self.expected(start, end, 1))
+        self.index.rebuild()
+        self.assertEqual(self.index.keys, sorted(keys))
+        self.assertEqual(self.index.sum_range(33, 999, 1), self.expected(33, 999, 1))
+
+    def test_update_delete_and_reinsert(self):
+        for key in range(100):
+            self.insert(key, [1, 1])
+        self.index.update(self.rids[5], [None, 10, None])
+        self.records[5][1] = 10
+        self.index.delete(self.rids[6])
+        del self.records[6]
+        self.assertEqual(self.index.sum_range(0, 9, 1), self.expected(0, 9, 1))
+        # key 6 gets its dead slot back
+        self.insert(6, [4, 4])
+        self.assertNotIn(6, self.index.pending)
+        self.assertEqual(self.index.sum_range(6, 6, 2), 4)
+
+    def test_primary_key_update(self):
+        for key in range(0, 100, 10):
+            self.insert(key, [key, 1])
+        self.index.update(self.rids[20], [25, None, 3])
+        self.records[25] = [25, 20, 3]
+        del self.records[20]
+        self.assertEqual(self.index.sum_range(15, 30, 1), 50)
+        self.assertEqual(self.index.sum_range(0, 100, 2), self.expected(0, 100, 2))
+
+
+# run unit tests
+if __name__ == '__main__':
+    unittest.main()
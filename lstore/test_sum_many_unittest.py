@@ -0,0 +1,53 @@
+from lstore.table_test_case import TableTestCase
+
+# import necessary libraries for unit testing
+import unittest
+
+
+class TestSumMany(TableTestCase):
+    num_columns = 5
+
+    def setUp(self):
+        super().setUp()
+        self.query.insert_many([[key, key % 11, key * 3, key % 4, 7] for key in range(1500)])
+        self.query.update_many([(key, [None, key, None, 1, None]) for key in range(0, 1500, 3)])
+        self.query.update_many([(key, [None, None, key, None, 8]) for key in range(0, 1500, 5)])
+        self.query.update(10, 4000, None, None, None, None)
+        for key in (11, 12, 800):
+            self.query.delete(key)
+        # column 1 is answered by the sum index, column 2 by the covering index, and columns 3 and 4 are read from the records
+        self.table.index.create_sum_index(1)
+        self.table.index.create_covering_index((2,))
+
+    def test_matches_per_column_sum(self):
+        self.assertIsNotNone(self.table.index.sum_covered(0, 10, 1))
+        self.assertIsNotNone(self.table.index.sum_covered(0, 10, 2))
+        self.assertIsNone(self.table.index.sum_covered(0, 10, 3))
+        columns = [4, 1, 3, 2, 0, 1]
+        # narrow and wide ranges, an empty reversed range and ranges past the last key
+        for start, end in ((0, 1499), (0, 5000), (20, 40), (900, 100), (1499, 1499), (3000, 3500), (4000, 4000)):
+            self.assertEqual(self.query.sum_many(start, end, columns), [self.query.sum(start, end, column) for column in columns], (start, end))
+        self.query.update(20, None, 5, 5, 5, 5)
+        self.query.delete(21)
+        self.assertEqual(self.query.sum_many(0, 100, columns), [self.query.sum(0, 100, column) for column in columns])
+        self.assertEqual(self.query.sum_many(0, 100, []), [])
+
+    def test_past_version(self):
+        columns = [1, 2, 3, 4]
+        for relative_version in (0, -1, -2):
+            for start, end in ((0, 1499), (20, 40), (3000, 4000)):
+                self.assertEqual(self.query.sum_many_version(start, end, columns, relative_version),
+                                 [self.query.sum_version(start, end, column, relative_version) for column in columns], (start, end, relative_version))
+        # the past version is read from the records, not from the indices holding the latest values
+        expected = 0
+        # sum ranges are over the latest primary keys, key 10 has moved to 4000
+        for key in [key for key in range(0, 31) if key != 10]:
+            for record in self.query.select_version(key, 0, [0, 1, 0, 0, 0], -1):
+                expected += record.columns[1]
+        self.assertEqual(self.query.sum_many_version(0, 30, [1, 1], -1), [expected, expected])
+        self.assertNotEqual(self.query.sum_many_version(0, 30, [1], -1), self.query.sum_many(0, 30, [1]))
+
+
+# run unit tests
+if __name__ == '__main__':
+    unittest.main()
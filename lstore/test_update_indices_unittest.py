@@ -0,0 +1,61 @@
+from lstore.table_test_case import TableTestCase
+
+# import necessary libraries for unit testing
+import unittest
+
+
+class TestUpdateIndices(TableTestCase):
+    num_columns = 4
+    # hash indices, overridden to run the same tests on B+ tree indices
+    table_options: dict = {"use_bplus": False, "use_hash": True}
+
+    def setUp(self):
+        super().setUp()
+        self.rows = {key: [key, key % 10, key % 7, key] for key in range(300)}
+        self.query.insert_many(list(self.rows.values()))
+        for column_num in range(1, 4):
+            self.table.index.create_index(column_num)
+
+    def assert_indices_match(self) -> None:
+        #Every value of every indexed column locates exactly the records holding it
+        for column_num in range(4):
+            expected: dict[int, set[int]] = {}
+            for key, row in self.rows.items():
+                expected.setdefault(row[column_num], set()).add(key)
+            for value, keys in expected.items():
+                found = {self.table.locate_record(rid, 0, [1, 0, 0, 0]).columns[0] for rid in self.table.index.locate(column_num, value)}
+                self.assertEqual(found, keys, f"column {column_num} value {value}")
+
+    def test_update_changes_only_written_columns(self):
+        self.update(3, [None, 42, None, None])
+        self.assert_indices_match()
+        self.assertNotIn(3, {self.table.locate_record(rid, 0, [1, 0, 0, 0]).columns[0] for rid in self.table.index.locate(1, 3)})
+        # an update to the value a column already holds
+        self.update(4, [None, 4, 4, None])
+        self.assert_indices_match()
+
+    def test_update_many_and_primary_key_change(self):
+        updates = [(key, [None, None, key + 100, None]) for key in range(0, 300, 3)]
+        updates += [(5, [500, None, None, None]), (500, [None, 77, None, None])]
+        self.query.update_many(updates)
+        for key in range(0, 300, 3):
+            self.rows[key][2] = key + 100
+        self.rows[500] = self.rows.pop(5)
+        self.rows[500][0] = 500
+        self.rows[500][1] = 77
+        self.assert_indices_match()
+        self.assertEqual(self.query.select(5, 0, [1, 1, 1, 1]), [])
+        self.assertEqual(self.query.select(500, 0, [1, 1, 1, 1])[0].columns, [500, 77, 5, 5])
+        self.update(500, [None, None, None, 9])
+        self.query.delete(6)
+        del self.rows[6]
+        self.assert_indices_match()
+
+
+class TestUpdateBPlusTreeIndices(TestUpdateIndices):
+    table_options: dict = {"use_bplus": True, "use_hash": False}
+
+
+# run unit tests
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+from lstore.query import Query
+from lstore.index_advisor import IndexAdvisor
+from lstore.table_test_case import TableTestCase
+
+# import necessary libraries for unit testing
+import unittest
+
+
+class TestUpdateMany(TableTestCase):
+    num_columns = 5
+
+    def test_matches_single_updates(self):
+        other = Query(self.create_table("other", 5))
+        for query in (self.query, other):
+            query.insert_many([[key, key, 0, 0, 0] for key in range(1200)])
+        updates = [(key % 1200, [None, key, None, key * 2, None]) for key in range(0, 3000, 7)]
+        # a primary key change, and an update of the moved record under its new key
+        updates += [(5, [5000, None, None, None, None]), (5000, [None, 1, 2, 3, 4]), (5, [None, 9, 9, 9, 9])]
+        results = self.query.update_many(updates)
+        self.assertEqual(results, [other.update(key, *columns) for key, columns in updates])
+        self.assertEqual(results[-3:], [True, True, False])
+        for key in list(range(1200)) + [5000]:
+            self.assertEqual([record.columns for record in self.query.select(key, 0, [1] * 5)],
+                             [record.columns for record in other.select(key, 0, [1] * 5)])
+        self.assertEqual(self.query.select_version(5000, 0, [1] * 5, -1)[0].columns, [5000, 5, 0, 0, 0])
+
+    def test_index_built_during_batch(self):
+        # 600 inserts, 12 selects and 300 primary key lookups, then the advisor indexes column 3 88 updates into the batch,
+        # built synchronously to see the pages as they are then
+        advisor = IndexAdvisor(self.table.index, interval=1000)
+        self.table.index.advisor = advisor
+        create_index = self.table.index.create_index
+        self.table.index.create_index = lambda column_num, background=False: create_index(column_num)
+        self.query.insert_many([[key, 0, 0, key, 0] for key in range(600)])
+        for key in range(12):
+            self.query.select(key, 3, [1] * 5)
+        self.query.update_many([(key, [None, None, None, 10000 + key, None]) for key in range(300)])
+        self.assertIsNotNone(self.table.index.indices[3])
+        for key in range(300):
+            self.assertEqual([record.columns[0] for record in self.query.select(10000 + key, 3, [1] * 5)], [key])
+            self.assertEqual(self.query.select(key, 3, [1] * 5), [])
+
+
+# run unit tests
+if __name__ == '__main__':
+    unittest.main()
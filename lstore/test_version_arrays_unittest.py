@@ -0,0 +1,133 @@
+from lstore.table_test_case import TableTestCase
+from lstore.version_arrays import VersionArrays
+from lstore.config import VERSION_ARRAY_MIN_DEPTH, INDIRECTION_COLUMN, int_to_bytearray, rid_to_coords
+
+# import necessary libraries for unit testing
+import unittest
+
+
+class TestVersionArrays(unittest.TestCase):
+
+    def setUp(self):
+        self.arrays = VersionArrays(max_records=2, min_depth=4)
+        # chain of base RID 1 walked from its latest tail record
+        self.versions = self.arrays.build(1, [30, 20, 10])
+
+    def test_version_lookup(self):
+        self.assertEqual(VersionArrays.version_rid(self.versions, 1, 0), 30)
+        self.assertEqual(VersionArrays.version_rid(self.versions, 1, -2), 10)
+        # past the oldest tail record is the base record
+        self.assertEqual(VersionArrays.version_rid(self.versions, 1, -3), 1)
+        self.assertEqual(VersionArrays.version_rid(self.versions, 1, -500), 1)
+
+    def test_append_and_drop(self):
+        self.arrays.append(1, 40)
+        self.assertEqual(VersionArrays.version_rid(self.arrays.get(1), 1, -1), 30)
+        # records without an array are left without one
+        self.arrays.append(2, 50)
+        self.assertIsNone(self.arrays.get(2))
+        self.arrays.drop(1)
+        self.assertIsNone(self.arrays.get(1))
+
+    def test_least_recently_read_is_dropped(self):
+        self.arrays.build(2, [21])
+        self.arrays.get(1)
+        self.arrays.build(3, [31])
+        self.assertIsNone(self.arrays.get(2))
+        self.assertIsNotNone(self.arrays.get(1))
+
+
+class TestTableVersions(TableTestCase):
+    # cumulative tail records, overridden to run the same tests on non-cumulative ones
+    table_options: dict = {"cumulative_tails": True}
+
+    def setUp(self):
+        super().setUp()
+        self.query.insert_many([[key, 0, key] for key in range(100)])
+        # values of column 1 of each record, oldest first
+        self.history: dict[int, list[int]] = {key: [0] for key in range(100)}
+        for n in range(1, 3 * VERSION_ARRAY_MIN_DEPTH):
+            self.update_column(1, n)
+            if n % 2:
+                self.update_column(2, n)
+            # updates in a batch, several of the same record
+            self.query.update_many([(3, [None, n * 10, None]), (4, [None, n, None]), (3, [None, n * 10 + 1, None])])
+            self.history[3] += [n * 10, n * 10 + 1]
+            self.history[4].append(n)
+
+    def update_column(self, key: int, value: int) -> None:
+        #Update column 1 of a record and its history
+        self.assertTrue(self.query.update(key, None, value, None))
+        self.history[key].append(value)
+
+    def walk(self, key: int, relative_version: int) -> list[int]:
+        #Column 1 of the record at the relative version, found by walking the tail chain without version arrays
+        arrays = self.table.version_arrays
+        self.table.version_arrays = VersionArrays(max_records=0)
+        try:
+            return [record.columns[1] for record in self.query.select_version(key, 0, [0, 1, 0], relative_version)]
+        finally:
+            self.table.version_arrays = arrays
+
+    def assert_versions_match(self, key: int) -> None:
+        history = self.history[key]
+        for relative_version in range(0, -len(history) - 3, -1):
+            expected = history[max(0, len(history) - 1 + relative_version)]
+            found = [record.columns[1] for record in self.query.select_version(key, 0, [0, 1, 0], relative_version)]
+            self.assertEqual(found, [expected], (key, relative_version))
+            self.assertEqual(found, self.walk(key, relative_version), (key, relative_version))
+
+    def test_deep_versions_match_chain_walk(self):
+        for key in (1, 2, 3, 4, 5):
+            self.assert_versions_match(key)
+        rid = self.table.index.locate(0, 3)[0]
+        self.assertIsNotNone(self.table.version_arrays.get(rid))
+        # arrays built before more updates, single and batched, are extended
+        for n in range(3):
+            self.update_column(1, 100 + n)
+            self.query.update_many([(3, [None, 200 + n, None])])
+            self.history[3].append(200 + n)
+        for key in (1, 3):
+            self.assert_versions_match(key)
+
+    def test_deleted_record(self):
+        rid = self.table.index.locate(0, 3)[0]
+        self.query.select_version(3, 0, [1, 1, 1], -VERSION_ARRAY_MIN_DEPTH)
+        self.assertIsNotNone(self.table.version_arrays.get(rid))
+        self.query.delete(3)
+        self.assertIsNone(self.table.version_arrays.get(rid))
+        self.assertIs(self.table.locate_record(rid, 0, [1, 1, 1], -VERSION_ARRAY_MIN_DEPTH), False)
+        self.assertEqual(self.query.select_version(3, 0, [1, 1, 1], -VERSION_ARRAY_MIN_DEPTH), [])
+        self.assert_versions_match(1)
+
+    def test_chain_ending_in_a_non_tail_rid(self):
+        # the oldest tail record of key 1 points to RID 0 rather than to its base record, as a tail record never written to disk reads
+        rid = self.table.index.locate(0, 1)[0]
+        oldest = self.chain(rid)[-1]
+        _, page_num, offset = rid_to_coords(oldest)
+        page = self.table.page_directory.retrieve_page(INDIRECTION_COLUMN, True, page_num)
+        page.overwrite_direct(int_to_bytearray(0, self.table.record_size), offset, 0)
+        self.table.version_arrays.drop(rid)
+        # the walk stops there, deep and shallow reads past the oldest tail record give the base record
+        for relative_version in (-len(self.history[1]) - 5, -2):
+            self.assertEqual(self.table.locate_record(rid, 0, [1, 1, 1], relative_version).columns[1],
+                             self.history[1][max(0, len(self.history[1]) - 1 + relative_version)])
+        self.assertIsNotNone(self.table.version_arrays.get(rid))
+
+    def chain(self, rid: int) -> list[int]:
+        #Tail RIDs of the record, newest first
+        newest_first = []
+        tail_rid = self.table.get_partial_record(rid, INDIRECTION_COLUMN)
+        while tail_rid != rid:
+            newest_first.append(tail_rid)
+            tail_rid = self.table.get_partial_record(tail_rid, INDIRECTION_COLUMN)
+        return newest_first
+
+
+class TestTableVersionsNonCumulative(TestTableVersions):
+    table_options: dict = {"cumulative_tails": False}
+
+
+# run unit tests
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+from lstore.table_test_case import TableTestCase
+from lstore.page import Page
+from lstore.config import NUM_METADATA_COLUMNS, int_to_bytearray, ints_to_bytearray
+
+# import necessary libraries for unit testing
+import unittest
+
+
+class TestPageZone(unittest.TestCase):
+
+    def test_given_and_decoded_zones_agree(self):
+        values = [40, 7, 93, 12]
+        decoded = Page()
+        decoded.write_many(ints_to_bytearray(values))
+        given = Page()
+        given.write_many(ints_to_bytearray(values), (min(values), max(values)))
+        self.assertEqual((decoded.min_value, decoded.max_value), (7, 93))
+        self.assertEqual((given.min_value, given.max_value), (7, 93))
+        # overwrites only widen the zone
+        given.overwrite_direct(int_to_bytearray(50), 2, 50)
+        given.write_direct(int_to_bytearray(3))
+        self.assertEqual((given.min_value, given.max_value), (3, 93))
+
+
+class TestZoneMaps(TableTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # 2000 records over several page rows, column 1 increasing with the key
+        self.query.insert_many([[key, key, 0] for key in range(2000)])
+
+    def scan_keys(self, predicate):
+        return sorted(record.columns[0] for record in self.table.scan([1, 0, 0], predicate))
+
+    def test_zone_maps_survive_reopen(self):
+        self.query.update(5, None, 7000, None)
+        base_pages = self.table.current_base_page_number + 1
+        zones = [self.table.page_directory.get_zone_map(NUM_METADATA_COLUMNS + 1, False, page_num) for page_num in range(base_pages)]
+        self.assertEqual(zones[0], (0, 511))
+        self.reopen()
+        # read from the page files' trailers, then from the loaded pages
+        self.assertEqual([self.table.page_directory.get_zone_map(NUM_METADATA_COLUMNS + 1, False, page_num) for page_num in range(base_pages)], zones)
+        page = self.table.page_directory.retrieve_page(NUM_METADATA_COLUMNS + 1, False, 1)
+        self.assertEqual((page.min_value, page.max_value), zones[1])
+        tail_zone = self.table.page_directory.get_zone_map(NUM_METADATA_COLUMNS + 1, True, 0)
+        self.assertEqual(tail_zone, (7000, 7000))
+        self.assertEqual([record.columns[0] for record in self.table.scan([1, 0, 0], {1: (7000, 7000)})], [5])
+
+    def test_range_scan_follows_tail_records(self):
+        # values moved out of their base page's zone, and a primary key moved past every base page's zone
+        self.query.update(5, None, 1900, None)
+        self.query.update_many([(1990, [None, 3, None]), (7, [9000, None, None])])
+        self.assertEqual(self.scan_keys({1: (1900, 1900)}), [5, 1900])
+        self.assertEqual(self.scan_keys({1: (0, 4)}), [0, 1, 2, 3, 4, 1990])
+        self.assertEqual(self.scan_keys({0: (9000, 9000)}), [9000])
+        self.assertEqual(self.scan_keys({0: (7, 7)}), [])
+        self.assertEqual(self.table.dumb_index.locate_range(1900, 1900, 1), sorted(self.table.dumb_index.locate(1, 1900)))
+        self.assertEqual(len(self.table.dumb_index.locate_range(1900, 1900, 1)), 2)
+        # deleted records are not returned
+        self.query.delete(1900)
+        self.assertEqual(self.scan_keys({1: (1900, 1900)}), [5])
+
+
+# run unit tests
+if __name__ == '__main__':
+    unittest.main()
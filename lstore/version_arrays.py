@@ -0,0 +1,71 @@
+"""
+Version Arrays
+
+Per record arrays of tail record RIDs, oldest first, so a past version of a record is found with one array lookup
+instead of a walk down its indirection chain, which costs a page lookup per hop (500 for version -500).
+    - an array is only built for a record once a version at least VERSION_ARRAY_MIN_DEPTH back is read from it,
+      by walking its chain once, shallower reads keep walking the chain
+    - the table appends each new tail record of a record with an array to it, a delete drops the array
+    - arrays hold 8 bytes per tail record, and at most VERSION_ARRAY_MAX_RECORDS records keep one,
+      the least recently read array is dropped once full
+    - arrays are not saved, records read deeply after the database is opened again build theirs again
+Without cumulative tail records the found tail record is still merged with the older ones, but the hops to reach it are skipped.
+"""
+
+from array import array
+from collections import OrderedDict
+import lstore.config as config
+from lstore.config import debug_print as print
+
+class VersionArrays:
+
+    def __init__(self, max_records: int = config.VERSION_ARRAY_MAX_RECORDS, min_depth: int = config.VERSION_ARRAY_MIN_DEPTH):
+        self.max_records: int = max_records
+        self.min_depth: int = min_depth
+        # base RID -> RIDs of its tail records, oldest first, least recently read record first
+        self.arrays: OrderedDict[int, array] = OrderedDict()
+
+    # public methods
+
+    def get(self, base_rid: int) -> array | None:
+        """
+        Return the tail RIDs of a record, oldest first, or None if the record has no array
+        """
+        versions = self.arrays.get(base_rid)
+        if versions is not None:
+            self.arrays.move_to_end(base_rid)
+        return versions
+
+    def build(self, base_rid: int, newest_first: list[int]) -> array:
+        """
+        Keep the tail RIDs of a record, given newest first as found by walking its chain, and return its array
+        """
+        versions = array("Q", reversed(newest_first))
+        if self.max_records == 0:
+            return versions
+        self.arrays[base_rid] = versions
+        while len(self.arrays) > self.max_records:
+            self.arrays.popitem(last=False)
+        return versions
+
+    def append(self, base_rid: int, tail_rid: int) -> None:
+        """
+        Add a new tail record of a record, records without an array are left without one
+        """
+        versions = self.arrays.get(base_rid)
+        if versions is not None:
+            versions.append(tail_rid)
+
+    def drop(self, base_rid: int) -> None:
+        self.arrays.pop(base_rid, None)
+
+    def clear(self) -> None:
+        self.arrays.clear()
+
+    @staticmethod
+    def version_rid(versions: array, base_rid: int, version: int) -> int:
+        """
+        Return the RID of a relative version (0 latest, negative past) from a record's array, the base RID if it goes past the oldest
+        """
+        position = len(versions) - 1 + version
+        return versions[position] if position >= 0 else base_rid